@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark header translation, ingest and raw reads for the star trackers.
+
+Synthetic frames are made for each of StarTrackerWide, StarTrackerNarrow and
+StarTrackerFast by copying the test raws in ``data/input/raw`` with new
+sequence numbers.  Each benchmark is run in a fresh process so that its
+peak memory use can be measured (that of the process itself and of the
+largest of any worker processes it started), and the results are written as
+JSON, e.g.
+
+.. code-block:: sh
+
+   python benchmarks/runBenchmarks.py --nFrame 500 -o bench-$(date +%F).json
+
+Results from different versions of the stack may be compared with
+``--compare old.json``.
+"""
+
+import argparse
+import datetime
+import gzip
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import astropy.io.fits as pyfits
+
+PACKAGE_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+RAWDIR = os.path.join(PACKAGE_DIR, "data", "input", "raw")
+HEADERDIR = os.path.join(PACKAGE_DIR, "tests", "headers")
+
+INSTRUMENTS = {"StarTrackerWide": "GC101", "StarTrackerNarrow": "GC102", "StarTrackerFast": "GC103"}
+DAYOBS = "20221208"
+
+
+def makeFrames(instrument, nFrame, outputDir):
+    """Write synthetic raws for an instrument, copied from the test data.
+
+    Parameters
+    ----------
+    instrument : `str`
+        The instrument, e.g. ``StarTrackerFast``.
+    nFrame : `int`
+        Number of frames to write.
+    outputDir : `str`
+        Directory in which to write the frames.
+
+    Returns
+    -------
+    files : `list` [`str`]
+        The files that were written.
+    """
+    camCode = INSTRUMENTS[instrument]
+    template = os.path.join(RAWDIR, f"{camCode}_O_{DAYOBS}_000211.fits.gz")
+    files = []
+    with pyfits.open(template) as hdul:
+        for seqNum in range(1, nFrame + 1):
+            obsId = f"{camCode}_O_{DAYOBS}_{seqNum:06d}"
+            hdul[0].header["OBSID"] = obsId
+            hdul[0].header["SEQNUM"] = seqNum
+            hdul[0].header["FILENAME"] = f"{obsId}.fits"
+            filename = os.path.join(outputDir, f"{obsId}.fits.gz")
+            with gzip.open(filename, "wb", compresslevel=1) as fd:
+                hdul.writeto(fd)
+            files.append(filename)
+
+    return files
+
+
+def _timed(func, nRepeat):
+    """Return the times taken by ``nRepeat`` calls to ``func``"""
+    times = []
+    for i in range(nRepeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def _summarise(times, nItem=1):
+    """Summarise times taken to process ``nItem`` items"""
+    times = sorted(times)
+    median = times[len(times) // 2]
+    return dict(nItem=nItem, nRepeat=len(times),
+                min=times[0], median=median, max=times[-1],
+                perItem=median / nItem, itemsPerSecond=nItem / median)
+
+
+def benchTranslation(instrument, nHeader, nRepeat):
+    """Time ObservationInfo, one header at a time and batched"""
+    from astro_metadata_translator import ObservationInfo
+    from astro_metadata_translator.tests import read_test_file
+    from lsst.obs.rubinGenericCamera.translator import RubinGenericCameraTranslator
+
+    header = read_test_file(f"{INSTRUMENTS[instrument]}_O_{DAYOBS}_000211.yaml", dir=HEADERDIR)
+    headers = [dict(header, SEQNUM=i) for i in range(nHeader)]
+
+    def perHeader():
+        for h in headers:
+            ObservationInfo(h, pedantic=False)
+
+    return dict(
+        perHeader=_summarise(_timed(perHeader, nRepeat), nHeader),
+        batched=_summarise(_timed(lambda: RubinGenericCameraTranslator.translate_headers(headers), nRepeat),
+                           nHeader),
+    )
+
+
+def benchIngest(instrument, files, nRepeat, processes):
+    """Time ingesting files into a new repository"""
+    from lsst.daf.butler import Butler
+    from lsst.obs.rubinGenericCamera.ingest import StarTrackerRawIngestTask
+    from lsst.utils import doImportType
+
+    times = []
+    for i in range(nRepeat):
+        root = tempfile.mkdtemp()
+        try:
+            Butler.makeRepo(root)
+            butler = Butler(root, writeable=True)
+            doImportType(f"lsst.obs.rubinGenericCamera.{instrument}")().register(butler.registry)
+            config = StarTrackerRawIngestTask.ConfigClass()
+            config.transfer = "direct"
+            config.processes = processes
+            task = StarTrackerRawIngestTask(config=config, butler=butler)
+
+            t0 = time.perf_counter()
+            task.run(files)
+            times.append(time.perf_counter() - t0)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    return dict(ingest=_summarise(times, len(files)), processes=processes)
+
+
+def benchRead(instrument, files, nRepeat):
+    """Time reading raws with the raw formatter"""
+    from lsst.daf.butler import FileDescriptor, Location, StorageClassFactory
+    from lsst.utils import doImportType
+
+    formatterClass = doImportType(f"lsst.obs.rubinGenericCamera.{instrument}")().getRawFormatter({})
+    storageClass = StorageClassFactory().getStorageClass("Exposure")
+
+    def read():
+        for f in files:
+            formatterClass(FileDescriptor(Location(None, f), storageClass)).read()
+
+    formatterClass(FileDescriptor(Location(None, files[0]), storageClass)).read()  # build the camera
+    return dict(read=_summarise(_timed(read, nRepeat), len(files)))
+
+
+def _runIsolated(func, *args):
+    """Run a benchmark in a new process, adding its peak memory use (kB),
+    and that of its largest worker process, to the results"""
+    with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(_callWithPeakMemory, func, *args).result()
+
+
+def _callWithPeakMemory(func, *args):
+    """Call a benchmark, adding the peak memory use of the process and of
+    its largest (finished) child process to its results"""
+    results = func(*args)
+    results["peakMemoryKb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Ingest with processes > 1 does its work in pool workers, which are
+    # joined before the benchmark returns
+    results["peakChildMemoryKb"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return results
+
+
+def compareResults(old, new):
+    """Print the ratio of new to old per-item times for each benchmark"""
+    for instrument, benchmarks in new["results"].items():
+        for name, result in benchmarks.items():
+            for key, value in result.items():
+                if not isinstance(value, dict) or "perItem" not in value:
+                    continue
+                try:
+                    oldValue = old["results"][instrument][name][key]["perItem"]
+                except KeyError:
+                    continue
+                print(f"{instrument:18s} {name:12s} {key:10s} {value['perItem']*1e3:10.3f} ms "
+                      f"({value['perItem']/oldValue:5.2f} x old)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--nFrame", type=int, default=100, help="Number of synthetic frames per instrument")
+    parser.add_argument("--nRepeat", type=int, default=3, help="Number of times to repeat each benchmark")
+    parser.add_argument("-j", "--processes", type=int, default=1, help="Processes to use for ingest")
+    parser.add_argument("--instruments", nargs="+", default=list(INSTRUMENTS), choices=list(INSTRUMENTS))
+    parser.add_argument("--benchmarks", nargs="+", default=["translation", "ingest", "read"],
+                        choices=["translation", "ingest", "read"])
+    parser.add_argument("-o", "--output", default=None, help="JSON file for results (default: stdout)")
+    parser.add_argument("--compare", default=None, help="JSON file of earlier results to compare with")
+    args = parser.parse_args()
+
+    results = {}
+    workDir = tempfile.mkdtemp()
+    try:
+        for instrument in args.instruments:
+            results[instrument] = {}
+            if "translation" in args.benchmarks:
+                results[instrument]["translation"] = _runIsolated(benchTranslation, instrument,
+                                                                  args.nFrame, args.nRepeat)
+            if "ingest" in args.benchmarks or "read" in args.benchmarks:
+                frameDir = os.path.join(workDir, instrument)
+                os.makedirs(frameDir)
+                files = makeFrames(instrument, args.nFrame, frameDir)
+                if "ingest" in args.benchmarks:
+                    results[instrument]["ingest"] = _runIsolated(benchIngest, instrument, files,
+                                                                 args.nRepeat, args.processes)
+                if "read" in args.benchmarks:
+                    results[instrument]["read"] = _runIsolated(benchRead, instrument, files, args.nRepeat)
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+
+    try:
+        from lsst.obs.rubinGenericCamera.version import __version__ as version
+    except ImportError:
+        version = "unknown"
+
+    output = dict(version=version,
+                  date=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                  host=platform.node(),
+                  python=platform.python_version(),
+                  nFrame=args.nFrame,
+                  results=results)
+
+    if args.output:
+        with open(args.output, "w") as fd:
+            json.dump(output, fd, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as fd:
+            compareResults(json.load(fd), output)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,19 +19,91 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-__all__ = ("RubinGenericCamera", "StarTrackerNarrow", "StarTrackerWide", "StarTrackerFast")
-
+import hashlib
+import logging
+import os
 import os.path
+import tempfile
+import threading
 
+import lsst.afw.cameraGeom as cameraGeom
 import lsst.obs.base.yamlCamera as yamlCamera
 from lsst.utils import getPackageDir
 from lsst.obs.base import VisitSystem
 from lsst.obs.lsst import LsstCam
 from .filters import RUBIN_GENERIC_CAMERA_FILTER_DEFINITIONS
-from .translator import StarTrackerNarrowTranslator, StarTrackerWideTranslator, StarTrackerFastTranslator
+from .instrumentation import incrementCounter, timed, timer
+from . import translator
+from .cameras import GENERIC_CAMERAS
+
+__all__ = ["RubinGenericCamera"] + [camera.name for camera in GENERIC_CAMERAS]
 
 PACKAGE_DIR = getPackageDir("obs_rubinGenericCamera")
 
+CAMERA_CACHE_DIR_ENV = "RUBIN_GENERIC_CAMERA_CACHE_DIR"
+"""Name of the environment variable giving a directory in which to keep
+persisted camera geometry, shared between processes."""
+
+_log = logging.getLogger(__name__)
+
+_cameraCache = {}                       # (policy file, mtime, size) -> Camera
+_cameraCacheLock = threading.Lock()
+
+
+@timed("camera.readPersistedCamera")
+def _readPersistedCamera(cameraYamlFile, cacheDir):
+    """Return the camera for a policy file, using a persisted copy in
+    ``cacheDir`` if one exists and creating it if it doesn't.
+
+    Parameters
+    ----------
+    cameraYamlFile : `str`
+        The yamlCamera policy file describing the camera.
+    cacheDir : `str`
+        Directory holding persisted cameras.  The files are named by the
+        SHA1 of the policy file, so an edited policy is never confused
+        with an old one.
+
+    Returns
+    -------
+    camera : `lsst.afw.cameraGeom.Camera`
+        The camera geometry.
+    """
+    with open(cameraYamlFile, "rb") as fd:
+        digest = hashlib.sha1(fd.read()).hexdigest()
+    policyName = os.path.splitext(os.path.basename(cameraYamlFile))[0]
+    cachedFile = os.path.join(cacheDir, f"{policyName}-{digest}.fits")
+
+    if os.path.exists(cachedFile):
+        try:
+            camera = cameraGeom.Camera.readFits(cachedFile)
+            incrementCounter("camera.persistedHit")
+            return camera
+        except Exception as e:
+            _log.warning("Unable to read cached camera %s (%s); rebuilding it", cachedFile, e)
+
+    incrementCounter("camera.persistedMiss")
+    with timer("camera.makeCamera"):
+        camera = yamlCamera.makeCamera(cameraYamlFile)
+    #
+    # Write to a temporary file and rename it, so other processes never see
+    # a partially-written camera
+    #
+    try:
+        os.makedirs(cacheDir, exist_ok=True)
+        fd, tmpFile = tempfile.mkstemp(dir=cacheDir, suffix=".fits")
+        os.close(fd)
+        try:
+            camera.writeFits(tmpFile)
+            os.replace(tmpFile, cachedFile)
+        finally:
+            if os.path.exists(tmpFile):
+                os.remove(tmpFile)
+    except Exception as e:
+        _log.warning("Unable to write cached camera to %s: %s", cacheDir, e)
+
+    return camera
+
 
 class RubinGenericCamera(LsstCam):
     """Gen3 Butler specialization for the Rubin Generic Cameras
@@ -74,17 +146,56 @@ class RubinGenericCamera(LsstCam):
     policyName = None                   # you must specialise this class
     translatorClass = None              # you must specialise this class
     visitSystem = VisitSystem.BY_SEQ_START_END
+    cameraCacheDir = None
+    """Directory in which to persist the camera geometry for use by other
+    processes; if `None` use ``$RUBIN_GENERIC_CAMERA_CACHE_DIR`` (if set)"""
 
     @classmethod
     def getCamera(cls):
-        # Constructing a YAML camera takes a long time but we rely on
-        # yamlCamera to cache for us.
+        """Return the camera geometry for this instrument.
+
+        Constructing a YAML camera takes a long time, so the camera is built
+        at most once per process for each version (as given by the
+        modification time and size) of the policy file.  If a cache
+        directory is configured (see ``cameraCacheDir``) the camera is also
+        persisted there, so new processes read it rather than rebuilding it.
+
+        Returns
+        -------
+        camera : `lsst.afw.cameraGeom.Camera`
+            The camera geometry.
+        """
         # N.b. can't inherit as PACKAGE_DIR isn't in the class
         cameraYamlFile = os.path.join(PACKAGE_DIR, "policy", f"{cls.policyName}.yaml")
-        return yamlCamera.makeCamera(cameraYamlFile)
+        stat = os.stat(cameraYamlFile)
+        key = (cameraYamlFile, stat.st_mtime_ns, stat.st_size)
+
+        with _cameraCacheLock:
+            camera = _cameraCache.get(key)
+            if camera is not None:
+                incrementCounter("camera.cacheHit")
+            else:
+                incrementCounter("camera.cacheMiss")
+                cacheDir = cls.cameraCacheDir or os.environ.get(CAMERA_CACHE_DIR_ENV)
+                if cacheDir:
+                    camera = _readPersistedCamera(cameraYamlFile, cacheDir)
+                else:
+                    with timer("camera.makeCamera"):
+                        camera = yamlCamera.makeCamera(cameraYamlFile)
+                # Forget any cameras built from older versions of this policy
+                for k in [k for k in _cameraCache if k[0] == cameraYamlFile]:
+                    del _cameraCache[k]
+                _cameraCache[key] = camera
+
+        return camera
 
     def getRawFormatter(self, dataId):
-        return None
+        # Docstring inherited from Instrument.getRawFormatter
+        if self.instrument is None:
+            return None
+        # local import to prevent circular dependency
+        from . import rawFormatter
+        return getattr(rawFormatter, f"{self.instrument}RawFormatter")
 
     def extractDetectorRecord(self, camGeomDetector):
         """Create a Gen3 Detector entry dict from a cameraGeom.Detector.
@@ -99,30 +210,25 @@ class RubinGenericCamera(LsstCam):
         )
 
 
-class StarTrackerNarrow(RubinGenericCamera):
-    """Specialization of Rubin Generic Camera for the narrow-field StarTracker
+def _makeInstrumentClass(camera):
+    """Return the Instrument class for a generic camera.
 
     Parameters
     ----------
-    camera : `lsst.cameraGeom.Camera`
-        Camera object from which to extract detector information.
-    filters : `list` of `FilterDefinition`
-        An ordered list of filters to define the set of PhysicalFilters
-        associated with this instrument in the registry.
+    camera : `~lsst.obs.rubinGenericCamera.cameras.GenericCameraDefinition`
+        The camera.
+
+    Returns
+    -------
+    instrumentClass : `type`
+        A subclass of `RubinGenericCamera`, or of the Instrument class of
+        ``camera.parent`` if it is set.
     """
-    instrument = "StarTrackerNarrow"
-    policyName = "starTrackerNarrow"
-    translatorClass = StarTrackerNarrowTranslator
-
-    def getRawFormatter(self, dataId):
-        # Docstring inherited from Instrument.getRawFormatter
-        # local import to prevent circular dependency
-        from .rawFormatter import StarTrackerNarrowRawFormatter
-        return StarTrackerNarrowRawFormatter
-
-
-class StarTrackerWide(StarTrackerNarrow):
-    """Specialization of Rubin Generic Camera for the wide-field StarTracker
+    base = RubinGenericCamera if camera.parent is None else globals()[camera.parent]
+    return type(camera.name, (base,), dict(
+        __module__=__name__,
+        __qualname__=camera.name,
+        __doc__=f"""Specialization of Rubin Generic Camera for the {camera.description}
 
     Parameters
     ----------
@@ -131,35 +237,13 @@ class StarTrackerWide(StarTrackerNarrow):
     filters : `list` of `FilterDefinition`
         An ordered list of filters to define the set of PhysicalFilters
         associated with this instrument in the registry.
-    """
-    instrument = "StarTrackerWide"
-    policyName = "starTrackerWide"
-    translatorClass = StarTrackerWideTranslator
+    """,
+        instrument=camera.name,
+        policyName=camera.policyName,
+        translatorClass=getattr(translator, f"{camera.name}Translator"),
+    ))
 
-    def getRawFormatter(self, dataId):
-        # Docstring inherited from Instrument.getRawFormatter
-        # local import to prevent circular dependency
-        from .rawFormatter import StarTrackerWideRawFormatter
-        return StarTrackerWideRawFormatter
-
-
-class StarTrackerFast(StarTrackerNarrow):
-    """Specialization of Rubin Generic Camera for the high-cadence Star Tracker
 
-    Parameters
-    ----------
-    camera : `lsst.cameraGeom.Camera`
-        Camera object from which to extract detector information.
-    filters : `list` of `FilterDefinition`
-        An ordered list of filters to define the set of PhysicalFilters
-        associated with this instrument in the registry.
-    """
-    instrument = "StarTrackerFast"
-    policyName = "starTrackerFast"
-    translatorClass = StarTrackerFastTranslator
-
-    def getRawFormatter(self, dataId):
-        # Docstring inherited from Instrument.getRawFormatter
-        # local import to prevent circular dependency
-        from .rawFormatter import StarTrackerFastRawFormatter
-        return StarTrackerFastRawFormatter
+for _camera in GENERIC_CAMERAS:
+    globals()[_camera.name] = _makeInstrumentClass(_camera)
+del _camera
@@ -0,0 +1,183 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Support for files containing a burst of frames.
+
+A burst file holds several frames taken in quick succession, either as a
+3-D cube in the first extension or as a sequence of 2-D image extensions.
+The start time of each frame is taken from (in order of preference) the
+``MJD-BEG`` column of a binary table extension named ``FRAMETIMES``, the
+``MJD-BEG`` card of each image extension, or the ``MJD-BEG`` of the first
+frame plus multiples of ``FRAMEINT`` (or ``EXPTIME``) seconds; these cards
+are looked for in the primary header and then in the first image
+extension's header.
+
+Use `readRawFrames` to get the frames of a raw in a butler repository.
+"""
+
+__all__ = ("BurstFrames", "readRawFrames")
+
+from collections.abc import Sequence
+import io
+
+import numpy as np
+import astropy.io.fits as pyfits
+from astropy.time import Time
+
+import lsst.afw.image as afwImage
+import lsst.geom as geom
+
+FRAMETIMES_EXTNAME = "FRAMETIMES"
+"""Name of the binary table giving the start time of each frame"""
+
+
+class BurstFrames(Sequence):
+    """The frames in a burst file, read when they are first accessed.
+
+    Single-frame files are treated as bursts of one frame.
+
+    Parameters
+    ----------
+    path : `str` or file-like
+        The file, or its contents (e.g. from
+        `~lsst.obs.rubinGenericCamera.fitsUtils.decompressFile`).
+    bbox : `lsst.geom.Box2I`, optional
+        Only read this part of each frame.
+
+    Notes
+    -----
+    The file is kept open until `close` is called (or the object is used
+    as a context manager and the block exits).  Frames are not cached, so
+    each access to a frame reads it again.
+    """
+
+    def __init__(self, path, bbox=None):
+        self.path = path
+        self.bbox = bbox
+        isFileObj = hasattr(path, "read")
+        if isFileObj:
+            path.seek(0)
+        self._hdul = pyfits.open(path, memmap=not isFileObj, lazy_load_hdus=False)
+
+        imageHdus = [i for i, hdu in enumerate(self._hdul)
+                     if hdu.is_image and hdu.header.get("NAXIS", 0) >= 2]
+        if not imageHdus:
+            self.close()
+            raise RuntimeError(f"{path} contains no images")
+
+        if self._hdul[imageHdus[0]].header["NAXIS"] == 3:
+            self._cube = True
+            self._hdus = [imageHdus[0]] * self._hdul[imageHdus[0]].header["NAXIS3"]
+        else:
+            self._cube = False
+            self._hdus = imageHdus
+
+        try:
+            self.times = self._readTimes()
+            """The start time of each frame (`astropy.time.Time`)"""
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the file"""
+        self._hdul.close()
+
+    def __len__(self):
+        return len(self._hdus)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Frame {i} is not in the range 0..{len(self) - 1}")
+
+        hdu = self._hdul[self._hdus[i]]
+        if self.bbox is None:
+            y0, y1, x0, x1 = 0, hdu.header["NAXIS2"], 0, hdu.header["NAXIS1"]
+        else:
+            y0, y1 = self.bbox.getMinY(), self.bbox.getMaxY() + 1
+            x0, x1 = self.bbox.getMinX(), self.bbox.getMaxX() + 1
+        # section only reads (and decompresses) the pixels we ask for
+        if self._cube:
+            array = hdu.section[i, y0:y1, x0:x1]
+        else:
+            array = hdu.section[y0:y1, x0:x1]
+
+        return afwImage.Image(np.ascontiguousarray(array), deep=False, xy0=geom.Point2I(x0, y0))
+
+    def _readTimes(self):
+        """Return the start time of each frame"""
+        if FRAMETIMES_EXTNAME in self._hdul:
+            mjd = np.array(self._hdul[FRAMETIMES_EXTNAME].data["MJD-BEG"], dtype=float)
+            if len(mjd) != len(self):
+                raise RuntimeError(f"{self.path} has {len(self)} frames but {len(mjd)} frame times")
+        elif not self._cube and all("MJD-BEG" in self._hdul[i].header for i in self._hdus):
+            mjd = np.array([self._hdul[i].header["MJD-BEG"] for i in self._hdus], dtype=float)
+        else:
+            # Bursts may only carry these cards in their image extension
+            headers = [self._hdul[0].header, self._hdul[self._hdus[0]].header]
+            mjd0 = next((h["MJD-BEG"] for h in headers if "MJD-BEG" in h), None)
+            if mjd0 is None:
+                raise RuntimeError(f"{self.path} has no MJD-BEG card or {FRAMETIMES_EXTNAME} table")
+            frameInterval = next((h[key] for key in ("FRAMEINT", "EXPTIME") for h in headers if key in h),
+                                 0.0)
+            mjd = mjd0 + np.arange(len(self)) * frameInterval / 86400.0
+
+        return Time(mjd, scale="tai", format="mjd")
+
+
+def readRawFrames(butler, dataId, *, datasetType="raw", collections=None, bbox=None):
+    """Return the frames of a raw in a butler repository.
+
+    ``butler.get`` returns the first frame of a burst as the raw's
+    Exposure; this gives access to all of them.
+
+    Parameters
+    ----------
+    butler : `lsst.daf.butler.Butler`
+        The butler to read from.
+    dataId : `dict` or `lsst.daf.butler.DataCoordinate`
+        The raw to read.
+    datasetType : `str`, optional
+        The dataset type to read.
+    collections : `str` or `list` [`str`], optional
+        Collections to search; if `None` use the butler's defaults.
+    bbox : `lsst.geom.Box2I`, optional
+        Only read this part of each frame.
+
+    Returns
+    -------
+    frames : `BurstFrames`
+        The frames, with their start times in ``frames.times``.  A raw
+        that isn't a burst is returned as a single frame.
+    """
+    uri = butler.getURI(datasetType, dataId, collections=collections)
+    # Remote files are read into memory, as BurstFrames keeps its file open
+    return BurstFrames(uri.ospath if uri.isLocal else io.BytesIO(uri.read()), bbox=bbox)
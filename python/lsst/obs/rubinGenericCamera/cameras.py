@@ -0,0 +1,95 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""The table of generic cameras.
+
+Each camera's Instrument, MetadataTranslator and raw Formatter classes are
+generated from its entry here when the package is imported, so adding a
+camera means adding a line to `GENERIC_CAMERAS` (and its camera geometry
+to ``policy/``).  This module must stay cheap to import as the package's
+``__init__`` uses it to know the names of the instruments.
+"""
+
+__all__ = ("GenericCameraDefinition", "GENERIC_CAMERAS", "CAMERAS_BY_ID", "getCameraDefinition")
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class GenericCameraDefinition:
+    """What distinguishes one generic camera from another."""
+
+    cameraId: int
+    """The camera ID encoded in ``OBSID`` and the filename, e.g. 101 for
+    ``GC101_O_20221208_000211``"""
+
+    name: str
+    """The instrument name, e.g. ``StarTrackerWide``; also the name of the
+    Instrument class, with ``Translator`` and ``RawFormatter`` appended
+    for the other generated classes"""
+
+    policyName: str
+    """The name of the camera geometry file in ``policy/``, without the
+    ``.yaml``"""
+
+    serial: str
+    """The detector serial number (the camera's MAC address)"""
+
+    description: str
+    """A short description, used in the docstrings of the generated
+    classes"""
+
+    parent: str | None = None
+    """The name of the camera whose Instrument class this camera's
+    Instrument class inherits from, or `None` to inherit directly from
+    `~lsst.obs.rubinGenericCamera.RubinGenericCamera`.  The parent must
+    come earlier in `GENERIC_CAMERAS`"""
+
+
+GENERIC_CAMERAS = (
+    GenericCameraDefinition(102, "StarTrackerNarrow", "starTrackerNarrow", "00:0f:31:03:ae:60",
+                            "narrow-field StarTracker"),
+    GenericCameraDefinition(101, "StarTrackerWide", "starTrackerWide", "00:0f:31:03:60:c2",
+                            "wide-field StarTracker", parent="StarTrackerNarrow"),
+    GenericCameraDefinition(103, "StarTrackerFast", "starTrackerFast", "00:0F:31:03:3F:BA",
+                            "high-cadence StarTracker (dome seeing monitor)", parent="StarTrackerNarrow"),
+)
+"""All the generic cameras"""
+
+CAMERAS_BY_ID = {camera.cameraId: camera for camera in GENERIC_CAMERAS}
+"""The generic cameras, indexed by camera ID"""
+
+
+def getCameraDefinition(cameraId):
+    """Return the definition of a generic camera.
+
+    Parameters
+    ----------
+    cameraId : `int`
+        The camera ID, e.g. 101.
+
+    Returns
+    -------
+    camera : `GenericCameraDefinition` or `None`
+        The camera, or `None` if there is no camera with that ID.
+    """
+    return CAMERAS_BY_ID.get(cameraId)
@@ -0,0 +1,303 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Track the centroids of a few bright stars through a sequence of frames,
+e.g. for StarTrackerFast dome-seeing measurements."""
+
+__all__ = ("findBrightStars", "measureCentroids",
+           "StarTrackerCentroidConnections", "StarTrackerCentroidConfig", "StarTrackerCentroidTask")
+
+import numpy as np
+from astropy.table import Table
+
+import lsst.pex.config as pexConfig
+import lsst.pipe.base as pipeBase
+import lsst.pipe.base.connectionTypes as cT
+
+
+def _asArray(frame):
+    """Return the pixels of an Exposure, MaskedImage, Image or array"""
+    for attr in ("image", "array"):
+        if hasattr(frame, attr):
+            frame = getattr(frame, attr)
+    return np.asarray(frame)
+
+
+def findBrightStars(image, nStar, boxSize, threshold=10.0, saturation=None):
+    """Find the brightest isolated stars in an image.
+
+    Parameters
+    ----------
+    image : `numpy.ndarray`
+        The image.
+    nStar : `int`
+        The maximum number of stars to find.
+    boxSize : `int`
+        The size of the box around each star; stars closer than this to
+        the edge of the image or to a brighter star are rejected.
+    threshold : `float`, optional
+        Minimum peak height above the background, in units of the
+        background noise.
+    saturation : `float`, optional
+        Reject stars with peaks at or above this level.
+
+    Returns
+    -------
+    x, y : `numpy.ndarray`
+        The column and row of each star's peak pixel, brightest first.
+    """
+    image = np.asarray(image, dtype=float)
+    background = np.median(image)
+    sigma = 1.4826 * np.median(np.abs(image - background))
+    if sigma == 0:
+        sigma = np.std(image)
+
+    half = boxSize // 2
+    work = image.copy()
+    # Ignore the edges, where a full box doesn't fit
+    work[:half, :] = work[-half:, :] = work[:, :half] = work[:, -half:] = -np.inf
+
+    xs, ys = [], []
+    while len(xs) < nStar:
+        y, x = np.unravel_index(np.argmax(work), work.shape)
+        peak = work[y, x]
+        if not np.isfinite(peak) or peak - background < threshold * sigma:
+            break
+        work[max(0, y - boxSize):y + boxSize + 1, max(0, x - boxSize):x + boxSize + 1] = -np.inf
+        if saturation is not None and peak >= saturation:
+            continue
+        xs.append(x)
+        ys.append(y)
+
+    return np.array(xs, dtype=int), np.array(ys, dtype=int)
+
+
+def measureCentroids(frames, x, y, boxSize):
+    """Measure the centroids of stars in a stack of frames.
+
+    All the stars in all the frames are measured at once using the
+    (background-subtracted) first and second moments of a box around each
+    star.
+
+    Parameters
+    ----------
+    frames : `numpy.ndarray`, (nFrame, ny, nx)
+        The frames; only the cutouts are converted to floating point, so
+        there's no need to convert integer raws first.
+    x, y : `numpy.ndarray` of `int`, (nStar,)
+        The centres of the boxes.
+    boxSize : `int`
+        The size of the boxes.
+
+    Returns
+    -------
+    result : `dict` [`str`, `numpy.ndarray`]
+        The ``x`` and ``y`` centroids, ``flux``, and second moments ``xx``,
+        ``yy`` and ``xy``, each with shape (nFrame, nStar).
+    """
+    return _measureStamps(_cutStamps(np.asarray(frames), x, y, boxSize), x, y)
+
+
+def _cutStamps(frames, x, y, boxSize):
+    """Return the boxes around stars in a frame or stack of frames, with
+    shape (..., nStar, box, box) and the frames' pixel type"""
+    half = boxSize // 2
+    offsets = np.arange(-half, half + 1)
+    rows = (y[:, None] + offsets)[:, :, None]             # (nStar, box, 1)
+    cols = (x[:, None] + offsets)[:, None, :]             # (nStar, 1, box)
+    return frames[..., rows, cols]
+
+
+def _measureStamps(stamps, x, y):
+    """Measure the centroids of stars in stamps returned by `_cutStamps`;
+    see `measureCentroids`"""
+    half = stamps.shape[-1] // 2
+    offsets = np.arange(-half, half + 1)
+    cutouts = stamps.astype(float)                        # (nFrame, nStar, box, box)
+
+    border = np.concatenate([cutouts[..., 0, :], cutouts[..., -1, :],
+                             cutouts[..., 1:-1, 0], cutouts[..., 1:-1, -1]], axis=-1)
+    cutouts = cutouts - np.median(border, axis=-1)[..., None, None]
+    cutouts = np.clip(cutouts, 0, None)
+
+    flux = cutouts.sum(axis=(-2, -1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dx = (cutouts * offsets[None, :]).sum(axis=(-2, -1)) / flux
+        dy = (cutouts * offsets[:, None]).sum(axis=(-2, -1)) / flux
+        xx = (cutouts * offsets[None, :]**2).sum(axis=(-2, -1)) / flux - dx**2
+        yy = (cutouts * offsets[:, None]**2).sum(axis=(-2, -1)) / flux - dy**2
+        xy = (cutouts * np.outer(offsets, offsets)).sum(axis=(-2, -1)) / flux - dx * dy
+
+    return dict(x=x + dx, y=y + dy, flux=flux, xx=xx, yy=yy, xy=xy)
+
+
+class StarTrackerCentroidConnections(pipeBase.PipelineTaskConnections,
+                                     dimensions=("instrument", "detector")):
+    exposures = cT.Input(
+        name="postISRCCD",
+        doc="Sequence of exposures in which to track stars.",
+        storageClass="Exposure",
+        dimensions=["instrument", "exposure", "detector"],
+        multiple=True,
+        deferLoad=True,
+    )
+    centroids = cT.Output(
+        name="starTrackerCentroids",
+        doc="Centroid time series of the tracked stars.",
+        storageClass="AstropyTable",
+        dimensions=["instrument", "detector"],
+    )
+
+
+class StarTrackerCentroidConfig(pipeBase.PipelineTaskConfig,
+                                pipelineConnections=StarTrackerCentroidConnections):
+    nStar = pexConfig.Field(
+        dtype=int,
+        default=5,
+        doc="Maximum number of stars to track.",
+    )
+    boxSize = pexConfig.Field(
+        dtype=int,
+        default=15,
+        doc="Size of the box used to measure each star (pixels); should be odd.",
+        check=lambda x: x >= 3 and x % 2 == 1,
+    )
+    threshold = pexConfig.Field(
+        dtype=float,
+        default=20.0,
+        doc="Minimum peak height of tracked stars above the background (in units of the noise).",
+    )
+    saturation = pexConfig.Field(
+        dtype=float,
+        default=65535.0,
+        doc="Stars with peaks at or above this level aren't tracked.",
+    )
+    chunkSize = pexConfig.Field(
+        dtype=int,
+        default=100,
+        doc="Number of frames measured together; the boxes are recentred on the stars "
+        "between chunks.",
+    )
+
+
+class StarTrackerCentroidTask(pipeBase.PipelineTask):
+    """Track the centroids of bright stars through a sequence of frames.
+
+    The stars are found once, in the first frame, and then measured in
+    chunks of frames with array operations over all the stars and frames
+    in the chunk.  Only the boxes around the stars are kept from each
+    frame, so a chunk takes ``chunkSize * nStar * boxSize**2`` pixels
+    rather than ``chunkSize`` frames.  Between chunks each box is
+    recentred on its star's latest position, so slow drifts are followed.
+    """
+    ConfigClass = StarTrackerCentroidConfig
+    _DefaultName = "starTrackerCentroid"
+
+    def runQuantum(self, butlerQC, inputRefs, outputRefs):
+        handles = sorted(butlerQC.get(inputRefs.exposures), key=lambda h: h.dataId["exposure"])
+        exposureIds = [h.dataId["exposure"] for h in handles]
+        result = self.run((h.get() for h in handles), exposureIds=exposureIds)
+        butlerQC.put(result, outputRefs)
+
+    def run(self, frames, exposureIds=None, times=None):
+        """Track stars through a sequence of frames.
+
+        Parameters
+        ----------
+        frames : iterable
+            The frames (`lsst.afw.image.Exposure`, `lsst.afw.image.Image` or
+            `numpy.ndarray`), in time order; they are only read as needed,
+            so this may be a generator or a
+            `~lsst.obs.rubinGenericCamera.burst.BurstFrames`.
+        exposureIds : sequence of `int`, optional
+            The exposure ID of each frame.
+        times : `astropy.time.Time`, optional
+            The time of each frame; if `None`, and the frames are Exposures,
+            the times are taken from their visitInfos.
+
+        Returns
+        -------
+        result : `lsst.pipe.base.Struct`
+            Result struct with component:
+
+            ``centroids``
+                A table with a row per star per frame, with columns
+                ``frame``, ``star``, ``exposure`` (if ``exposureIds`` was
+                given), ``mjd``, ``x``, ``y``, ``flux``, ``xx``, ``yy`` and
+                ``xy`` (`astropy.table.Table`).
+        """
+        x = y = None
+        shape = None
+        columns = {name: [] for name in ("frame", "mjd", "x", "y", "flux", "xx", "yy", "xy")}
+        chunk, mjds = [], []
+        iFrame = 0
+
+        def measureChunk():
+            nonlocal x, y
+            result = _measureStamps(np.stack(chunk), x, y)
+            nStar = len(x)
+            columns["frame"].append(np.repeat(np.arange(iFrame - len(chunk), iFrame), nStar))
+            columns["mjd"].append(np.repeat(mjds, nStar))
+            for name in ("x", "y", "flux", "xx", "yy", "xy"):
+                columns[name].append(result[name].ravel())
+            # Recentre the boxes on the stars, keeping them on the image
+            half = self.config.boxSize // 2
+            good = np.isfinite(result["x"][-1]) & np.isfinite(result["y"][-1])
+            x = np.where(good, np.rint(result["x"][-1]), x).astype(int)
+            y = np.where(good, np.rint(result["y"][-1]), y).astype(int)
+            x = np.clip(x, half, shape[1] - half - 1)
+            y = np.clip(y, half, shape[0] - half - 1)
+            chunk.clear()
+            mjds.clear()
+
+        for frame in frames:
+            if times is not None:
+                mjds.append(times[iFrame].mjd)
+            elif hasattr(frame, "visitInfo"):
+                mjds.append(frame.visitInfo.date.toAstropy().tai.mjd)
+            else:
+                mjds.append(np.nan)
+            array = _asArray(frame)
+
+            if x is None:
+                x, y = findBrightStars(array, self.config.nStar, self.config.boxSize,
+                                       threshold=self.config.threshold, saturation=self.config.saturation)
+                self.log.info("Tracking %d stars", len(x))
+                if len(x) == 0:
+                    break
+                shape = array.shape
+            chunk.append(_cutStamps(array, x, y, self.config.boxSize))
+            iFrame += 1
+            if len(chunk) == self.config.chunkSize:
+                measureChunk()
+        if chunk and x is not None and len(x) > 0:
+            measureChunk()
+
+        nStar = 0 if x is None else len(x)
+        table = Table({name: (np.concatenate(values) if values else np.array([]))
+                       for name, values in columns.items()})
+        table["star"] = np.tile(np.arange(nStar), iFrame) if nStar else np.array([], dtype=int)
+        if exposureIds is not None and nStar:
+            table["exposure"] = np.asarray(exposureIds)[table["frame"]]
+        table.meta["nStar"] = nStar
+        table.meta["boxSize"] = self.config.boxSize
+
+        return pipeBase.Struct(centroids=table)
@@ -0,0 +1,202 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""An in-memory index of header corrections.
+
+`astro_metadata_translator.fix_header` looks for a correction file for
+every header it fixes, probing each directory in the translator's search
+path (and its resource root) for ``<obsid>.yaml``.  For tens of thousands
+of headers on a network filesystem those probes cost more than the
+translation, so the star tracker translators instead load all the
+correction files once into an index keyed by observation ID, and only
+look at the directories again (at most every ``checkInterval`` seconds)
+to see whether anything has changed.
+
+Corrections are read from the package's ``corrections`` directory and any
+directories listed (separated by ``os.pathsep``) in
+``$RUBIN_GENERIC_CAMERA_CORRECTIONS_PATH``, including their
+subdirectories.  Each file is a YAML mapping of header keywords to their
+corrected values, named ``<obsid>.yaml`` or ``<instrument>-<obsid>.yaml``;
+where several files correct the same observation, later directories win.
+"""
+
+__all__ = ("CORRECTIONS_PATH_ENV", "CorrectionsIndex", "getCorrectionsIndex")
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import yaml
+
+from lsst.utils import getPackageDir
+from .instrumentation import incrementCounter
+
+CORRECTIONS_PATH_ENV = "RUBIN_GENERIC_CAMERA_CORRECTIONS_PATH"
+"""Environment variable listing extra directories of correction files"""
+
+_log = logging.getLogger(__name__)
+
+
+class CorrectionsIndex:
+    """Header corrections, indexed by observation ID.
+
+    Parameters
+    ----------
+    directories : `list` [`str`]
+        Directories to search (recursively) for correction files; those
+        that don't exist are ignored.
+    checkInterval : `float`, optional
+        Minimum time between checks for changed files (s); if 0, check
+        on every lookup.
+    """
+
+    def __init__(self, directories, checkInterval=10.0):
+        self.directories = list(directories)
+        self.checkInterval = checkInterval
+        self._lock = threading.Lock()
+        self._corrections = {}
+        self._signature = None
+        self._lastCheck = None
+
+    def _scan(self):
+        """Return the correction files and a signature that changes if any
+        of them (or the directories holding them) change"""
+        files = []
+        signature = []
+        for top in self.directories:
+            for dirPath, dirNames, fileNames in os.walk(top):
+                dirNames.sort()
+                signature.append((dirPath, os.stat(dirPath).st_mtime_ns))
+                for fileName in sorted(fileNames):
+                    if fileName.endswith(".yaml"):
+                        path = os.path.join(dirPath, fileName)
+                        try:
+                            signature.append((path, os.stat(path).st_mtime_ns))
+                        except FileNotFoundError:   # removed since os.walk listed it
+                            continue
+                        files.append(path)
+
+        return files, tuple(signature)
+
+    def _load(self, files):
+        corrections = {}
+        for path in files:
+            stem = os.path.basename(path)[:-len(".yaml")]
+            obsId = stem.split("-", 1)[-1]
+            try:
+                with open(path) as fd:
+                    values = yaml.safe_load(fd)
+            except (OSError, yaml.YAMLError) as e:
+                _log.warning("Unable to read header corrections from %s: %s", path, e)
+                continue
+            if not isinstance(values, dict):
+                _log.warning("Ignoring %s as it doesn't contain a mapping", path)
+                continue
+            corrections.setdefault(obsId, {}).update(values)
+
+        return corrections
+
+    def refresh(self, force=False):
+        """Reload the corrections if any of the files have changed.
+
+        Parameters
+        ----------
+        force : `bool`, optional
+            Check for changes even if ``checkInterval`` hasn't elapsed
+            since the last check.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._lastCheck is not None and now - self._lastCheck < self.checkInterval:
+                return
+            self._lastCheck = now
+            files, signature = self._scan()
+            if signature != self._signature:
+                self._corrections = self._load(files)
+                self._signature = signature
+                incrementCounter("corrections.reload")
+                _log.debug("Loaded header corrections for %d observations", len(self._corrections))
+
+    def get(self, obsId):
+        """Return the corrections for an observation.
+
+        Parameters
+        ----------
+        obsId : `str`
+            The observation ID (e.g. ``GC101_O_20221208_000211``).
+
+        Returns
+        -------
+        corrections : `dict` or `None`
+            The corrected values of header keywords, or `None` if there
+            are no corrections for this observation.
+        """
+        self.refresh()
+        return self._corrections.get(obsId)
+
+    def getDigest(self, obsId):
+        """Return a digest of the corrections for an observation.
+
+        Parameters
+        ----------
+        obsId : `str`
+            The observation ID.
+
+        Returns
+        -------
+        digest : `str`
+            A string that changes whenever the observation's corrections
+            do; empty if there are no corrections for it.
+        """
+        corrections = self.get(obsId)
+        if not corrections:
+            return ""
+        return hashlib.sha1(json.dumps(corrections, sort_keys=True, default=str).encode()).hexdigest()
+
+    def __len__(self):
+        self.refresh()
+        return len(self._corrections)
+
+
+_index = None
+_indexLock = threading.Lock()
+
+
+def getCorrectionsIndex():
+    """Return the index of the package's (and
+    ``$RUBIN_GENERIC_CAMERA_CORRECTIONS_PATH``'s) header corrections.
+
+    Returns
+    -------
+    index : `CorrectionsIndex`
+        The index, shared by all the translators in this process.
+    """
+    global _index
+    with _indexLock:
+        if _index is None:
+            directories = [os.path.join(getPackageDir("obs_rubinGenericCamera"), "corrections")]
+            directories += [d for d in os.environ.get(CORRECTIONS_PATH_ENV, "").split(os.pathsep) if d]
+            _index = CorrectionsIndex(directories)
+        return _index
@@ -0,0 +1,191 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Utilities to read star tracker FITS files as cheaply as possible."""
+
+__all__ = ("GZIP", "TILE", "getFitsCompression", "readRawHeader", "decompressFile", "verifyChecksums")
+
+import gzip
+import io
+import warnings
+
+import astropy.io.fits as pyfits
+from astro_metadata_translator import merge_headers
+from lsst.afw.fits import readMetadata
+from .instrumentation import incrementCounter, timed
+
+GZIP = "gzip"
+"""The whole file is gzipped (e.g. ``GC101_O_20221208_000211.fits.gz``)"""
+
+TILE = "tile"
+"""The image HDUs are tile compressed (e.g. by ``fpack``)"""
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_BLOCK_SIZE = 2880                      # size of a FITS block
+
+
+def _dataSize(header):
+    """Return the number of bytes (including padding) in the data part of
+    an HDU with the given header"""
+    naxis = header.get("NAXIS", 0)
+    if naxis == 0:
+        return 0
+
+    nPixel = 1
+    for i in range(1, naxis + 1):
+        nPixel *= header[f"NAXIS{i}"]
+    nByte = abs(header["BITPIX"]) // 8 * header.get("GCOUNT", 1) * (header.get("PCOUNT", 0) + nPixel)
+
+    return -(-nByte // _BLOCK_SIZE) * _BLOCK_SIZE
+
+
+def getFitsCompression(path):
+    """Return how a FITS file is compressed.
+
+    Parameters
+    ----------
+    path : `str`
+        The file.
+
+    Returns
+    -------
+    compression : `str` or `None`
+        `GZIP` if the whole file is gzipped, `TILE` if its first extension
+        is tile compressed, or `None` if it is not compressed.
+    """
+    with open(path, "rb") as fd:
+        if fd.read(len(_GZIP_MAGIC)) == _GZIP_MAGIC:
+            return GZIP
+        fd.seek(0)
+
+        header = pyfits.Header.fromfile(fd)
+        fd.seek(_dataSize(header), 1)
+        try:
+            header = pyfits.Header.fromfile(fd)
+        except EOFError:                # no extensions
+            return None
+
+    return TILE if header.get("ZIMAGE", False) else None
+
+
+@timed("fitsUtils.readRawHeader")
+def readRawHeader(path):
+    """Read the merged primary and first extension headers of a raw file.
+
+    Only the header blocks of whole-file gzipped files are decompressed,
+    so the cost doesn't depend on the size of the image; other files are
+    read with `lsst.afw.fits.readMetadata`, which understands
+    tile-compressed HDUs.
+
+    Parameters
+    ----------
+    path : `str`
+        The file.
+
+    Returns
+    -------
+    header : `dict`
+        The primary header updated with the cards from the first extension,
+        as in `lsst.obs.base.RawIngestTask.extractMetadata`.
+    """
+    if getFitsCompression(path) != GZIP:
+        return merge_headers([readMetadata(path, 0), readMetadata(path)], mode="overwrite")
+
+    with gzip.open(path, "rb") as fd:
+        primary = pyfits.Header.fromfile(fd)
+        nSkip = _dataSize(primary)
+        if nSkip > 0:
+            fd.seek(nSkip, 1)           # decompresses, but doesn't keep, the data
+        extension = pyfits.Header.fromfile(fd)
+        incrementCounter("fitsUtils.headerBytesDecompressed", fd.tell())
+
+    return merge_headers([primary, extension], mode="overwrite")
+
+
+@timed("fitsUtils.decompressFile")
+def decompressFile(path):
+    """Decompress a whole-file gzipped FITS file into memory.
+
+    Useful when a file is to be read in full more than once (e.g. to verify
+    its checksums and then make a preview), as each read of a ``.fits.gz``
+    file otherwise decompresses it again.
+
+    Parameters
+    ----------
+    path : `str`
+        The file.
+
+    Returns
+    -------
+    fileObj : `io.BytesIO`
+        The decompressed file, which may be passed to `verifyChecksums`
+        and `~lsst.obs.rubinGenericCamera.burst.BurstFrames` in place of
+        its name.
+
+    Raises
+    ------
+    OSError, EOFError
+        Raised if the file can't be read or is truncated.
+    """
+    with gzip.open(path, "rb") as fd:
+        data = fd.read()
+    incrementCounter("fitsUtils.bytesDecompressed", len(data))
+
+    return io.BytesIO(data)
+
+
+@timed("fitsUtils.verifyChecksums")
+def verifyChecksums(path):
+    """Check that a FITS file is complete and matches its checksums.
+
+    The ``DATASUM`` and ``CHECKSUM`` cards of every HDU are checked; cards
+    that are missing or blank (as written by some of the star tracker
+    software) are ignored.  The whole file is read, so a truncated file or
+    a corrupt gzip stream is also detected.
+
+    Parameters
+    ----------
+    path : `str` or file-like
+        The file, or its contents (e.g. from `decompressFile`).
+
+    Returns
+    -------
+    problems : `list` [`str`]
+        Descriptions of the problems found; empty if the file is good.
+    """
+    problems = []
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            if hasattr(path, "seek"):
+                path.seek(0)
+            with pyfits.open(path, memmap=False, checksum=False) as hdul:
+                hdul.readall()
+                for i, hdu in enumerate(hdul):
+                    for key, verify in (("DATASUM", hdu.verify_datasum),
+                                        ("CHECKSUM", hdu.verify_checksum)):
+                        if str(hdu.header.get(key, "")).strip() and verify() == 0:
+                            problems.append(f"{key} mismatch in HDU {i}")
+        problems += [str(w.message) for w in caught if "truncated" in str(w.message)]
+    except Exception as e:
+        problems.append(f"unable to read file: {e}")
+
+    return problems
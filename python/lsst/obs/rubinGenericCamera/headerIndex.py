@@ -0,0 +1,209 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+__all__ = ("HeaderIndex",)
+
+import hashlib
+import json
+import os
+import sqlite3
+
+from astro_metadata_translator import ObservationInfo
+from .corrections import getCorrectionsIndex
+from .fitsUtils import readRawHeader
+from .instrumentation import incrementCounter
+
+
+def _getPackageVersion():
+    """Return the version of obs_rubinGenericCamera, used to invalidate
+    translations made by older versions of the translators.
+
+    If the version isn't known (e.g. in a development checkout that hasn't
+    been built) a digest of the translators' source is used instead, so
+    that editing them still invalidates the index.
+    """
+    try:
+        from .version import __version__
+    except ImportError:
+        with open(os.path.join(os.path.dirname(__file__), "translator.py"), "rb") as fd:
+            return f"unknown-{hashlib.sha1(fd.read()).hexdigest()}"
+    return __version__
+
+
+class HeaderIndex:
+    """A persistent index of star tracker headers and their translations.
+
+    The headers and `~astro_metadata_translator.ObservationInfo` of each
+    file are kept in an SQLite database, keyed by the file's path, size and
+    modification time, so re-reading the metadata of an unchanged file
+    doesn't require it to be opened (and for ``.fits.gz`` files
+    decompressed).  The translation is also tagged with the version of
+    this package and a digest of the observation's header corrections (see
+    `~lsst.obs.rubinGenericCamera.corrections`), so it is redone after the
+    translators or the corrections change.
+
+    The index may be shared between processes; each process opens its own
+    connection on first use.
+
+    Parameters
+    ----------
+    filename : `str`
+        The SQLite file; created if it doesn't exist.
+    version : `str`, optional
+        The version of the translators; if `None` use the version of this
+        package.
+    journalMode : `str`, optional
+        The SQLite journal mode.  The default, ``WAL``, lets readers and a
+        writer proceed concurrently, but relies on shared memory so isn't
+        safe if the file is on a network filesystem (e.g. NFS) and is used
+        from more than one machine; use ``DELETE`` there.
+    """
+
+    def __init__(self, filename, version=None, journalMode="WAL"):
+        self.filename = filename
+        self.version = _getPackageVersion() if version is None else version
+        self.journalMode = journalMode
+        self._connection = None
+        self._pid = None
+
+    def __getstate__(self):
+        # Connections can't be pickled (or shared with child processes)
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_pid"] = None
+        return state
+
+    @property
+    def connection(self):
+        """The connection to the database for this process
+        (`sqlite3.Connection`)
+        """
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.filename, timeout=60)
+            self._connection.execute(f"PRAGMA journal_mode={self.journalMode}")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS headers ("
+                                     "path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, "
+                                     "version TEXT, header TEXT, obsInfo TEXT)")
+            self._connection.commit()
+            self._pid = os.getpid()
+
+        return self._connection
+
+    def close(self):
+        """Close this process's connection to the database"""
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+        self._pid = None
+
+    @staticmethod
+    def _stat(path):
+        """Return the absolute path, size and modification time of a file"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        return path, stat.st_size, stat.st_mtime_ns
+
+    def _getTranslationVersion(self, header):
+        """Return the tag of a header's translation, which combines the
+        version of the translators and a digest of the corrections applied
+        to the header"""
+        digest = getCorrectionsIndex().getDigest(header.get("OBSID"))
+        return f"{self.version}+{digest}" if digest else self.version
+
+    def get(self, path):
+        """Return the indexed header and translation of a file.
+
+        Parameters
+        ----------
+        path : `str`
+            The file.
+
+        Returns
+        -------
+        header : `dict` or `None`
+            The file's header, or `None` if the file is not in the index or
+            has changed since it was indexed.
+        obsInfo : `~astro_metadata_translator.ObservationInfo` or `None`
+            The translated header, or `None` if it is not in the index or was
+            translated by a different version of the translators or with
+            different corrections.
+        """
+        path, size, mtime = self._stat(path)
+        row = self.connection.execute("SELECT version, header, obsInfo FROM headers "
+                                      "WHERE path = ? AND size = ? AND mtime = ?",
+                                      (path, size, mtime)).fetchone()
+        if row is None:
+            incrementCounter("headerIndex.miss")
+            return None, None
+
+        version, header, obsInfo = row
+        header = json.loads(header)
+        if obsInfo is None or version != self._getTranslationVersion(header):
+            incrementCounter("headerIndex.headerOnlyHit")
+            return header, None
+
+        incrementCounter("headerIndex.hit")
+        return header, ObservationInfo.from_json(obsInfo)
+
+    def put(self, path, header, obsInfo=None):
+        """Add (or replace) a file's header and translation in the index.
+
+        Parameters
+        ----------
+        path : `str`
+            The file.
+        header : `dict`-like
+            The file's header.
+        obsInfo : `~astro_metadata_translator.ObservationInfo`, optional
+            The translated header.
+        """
+        path, size, mtime = self._stat(path)
+        version = self._getTranslationVersion(header)
+        header = json.dumps({k: header[k] for k in header}, default=str)
+        obsInfo = None if obsInfo is None else obsInfo.to_json()
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO headers VALUES (?, ?, ?, ?, ?, ?)",
+                                    (path, size, mtime, version, header, obsInfo))
+
+    def getObservationInfo(self, path):
+        """Return the translated header of a file, using the index if
+        possible and updating it if not.
+
+        Parameters
+        ----------
+        path : `str`
+            The file.
+
+        Returns
+        -------
+        obsInfo : `~astro_metadata_translator.ObservationInfo`
+            The translated header.
+        """
+        header, obsInfo = self.get(path)
+        if obsInfo is not None:
+            return obsInfo
+
+        if header is None:
+            header = readRawHeader(path)
+        obsInfo = ObservationInfo(header, pedantic=False, filename=path)
+        self.put(path, header, obsInfo)
+
+        return obsInfo
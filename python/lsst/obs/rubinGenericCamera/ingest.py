@@ -0,0 +1,745 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+__all__ = ("StarTrackerRawIngestConfig", "StarTrackerRawIngestTask")
+
+import os
+import shutil
+import sys
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+
+import lsst.pex.config as pexConfig
+from lsst.resources import ResourcePath
+from lsst.obs.base import RawIngestConfig, RawIngestTask
+from lsst.obs.base.ingest import RawFileData
+from .fitsUtils import GZIP, decompressFile, getFitsCompression, readRawHeader, verifyChecksums
+from .headerIndex import HeaderIndex
+from .instrumentation import initializeWorker
+from .preview import getPreviewPath, writePreview
+from .translator import findStarTrackerTranslator, parseStarTrackerFilename
+
+
+class StarTrackerRawIngestConfig(RawIngestConfig):
+    processes = pexConfig.Field(
+        dtype=int,
+        default=1,
+        doc="Number of processes to use to read and translate headers",
+    )
+    readUnrecognisedHeaders = pexConfig.Field(
+        dtype=bool,
+        default=True,
+        doc="Read the header of files whose names aren't of the standard form (e.g. "
+        "GC101_O_20221208_000211.fits.gz) to see if they come from a star tracker? "
+        "If False, such files are rejected without being opened",
+    )
+    headerIndex = pexConfig.Field(
+        dtype=str,
+        default=None,
+        optional=True,
+        doc="SQLite file used to save the headers and translations of ingested files, so that "
+        "unchanged files needn't be read again when they are re-ingested; see HeaderIndex",
+    )
+    headerIndexJournalMode = pexConfig.ChoiceField(
+        dtype=str,
+        default="WAL",
+        allowed={"WAL": "Write-ahead log; allows concurrent readers, but only on a local filesystem",
+                 "DELETE": "Rollback journal; use if the header index is on a network filesystem"},
+        doc="SQLite journal mode of the header index",
+    )
+    followInstruments = pexConfig.ListField(
+        dtype=str,
+        default=["StarTrackerFast"],
+        doc="Instruments whose files are ingested by follow()",
+    )
+    followPollInterval = pexConfig.Field(
+        dtype=float,
+        default=0.5,
+        doc="Interval between scans of the directories being followed (s)",
+    )
+    followMaxLatency = pexConfig.Field(
+        dtype=float,
+        default=2.0,
+        doc="Maximum time a file waits to be ingested once it is complete (s); a partial "
+        "batch is ingested when its oldest file has waited this long",
+    )
+    followBatchSize = pexConfig.Field(
+        dtype=int,
+        default=50,
+        doc="Maximum number of files ingested together by follow()",
+    )
+    followMaxPending = pexConfig.Field(
+        dtype=int,
+        default=500,
+        doc="Maximum number of files waiting to be ingested by follow(); once this many "
+        "files are queued no new files are looked for until the backlog drops",
+    )
+    followMaxRetries = pexConfig.Field(
+        dtype=int,
+        default=3,
+        doc="Number of times follow() tries again to ingest files from a batch that failed",
+    )
+    doVerifyChecksums = pexConfig.Field(
+        dtype=bool,
+        default=False,
+        doc="Verify the DATASUM and CHECKSUM cards of each file while its header is being "
+        "translated, and don't ingest files that fail?",
+    )
+    backgroundThreads = pexConfig.Field(
+        dtype=int,
+        default=4,
+        doc="Number of threads used to verify checksums and write previews",
+    )
+    quarantineDir = pexConfig.Field(
+        dtype=str,
+        default=None,
+        optional=True,
+        doc="Directory to which files that fail checksum verification are moved; "
+        "if None they are left where they are",
+    )
+    compactRaws = pexConfig.Field(
+        dtype=bool,
+        default=False,
+        doc="Record the raws with formatters that return their native uint16 pixels rather than "
+        "converting them to float32",
+    )
+    doWritePreviews = pexConfig.Field(
+        dtype=bool,
+        default=False,
+        doc="Write a small binned PNG preview of each file while its header is being translated?",
+    )
+    previewDir = pexConfig.Field(
+        dtype=str,
+        default=None,
+        optional=True,
+        doc="Directory for the previews; if None they are written next to the raws",
+    )
+    previewBinFactor = pexConfig.Field(
+        dtype=int,
+        default=4,
+        doc="Factor by which the raws are binned to make the previews",
+    )
+
+
+class StarTrackerRawIngestTask(RawIngestTask):
+    """Ingest large numbers of star tracker raws.
+
+    Files are first sorted by instrument using their names (so files from
+    other cameras are rejected without being opened), then the headers of
+    each instrument's files are read and translated by a pool of processes
+    and the exposure records for all the files are inserted into the
+    registry in a single batch before the datasets are ingested.
+
+    If ``config.doVerifyChecksums`` is set the files' checksums are verified
+    by a pool of threads while their headers are being translated; files
+    that fail are not ingested, are listed in ``corruptFiles``, and are
+    moved to ``config.quarantineDir`` if it is set.  If
+    ``config.doWritePreviews`` is set the same threads write a binned PNG
+    preview of each good file (see `lsst.obs.rubinGenericCamera.preview`);
+    ingest doesn't wait for the previews, but they are all written before
+    `run` returns.
+    """
+    ConfigClass = StarTrackerRawIngestConfig
+    _DefaultName = "starTrackerRawIngest"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.headerIndex = None
+        if self.config.headerIndex is not None:
+            self.headerIndex = HeaderIndex(self.config.headerIndex,
+                                           journalMode=self.config.headerIndexJournalMode)
+        self.corruptFiles = {}          # problems with files that failed verification, indexed by path
+        self._checkFutures = {}
+
+    def classifyFiles(self, files):
+        """Sort files by the star tracker that took them.
+
+        Parameters
+        ----------
+        files : iterable of `lsst.resources.ResourcePath`
+            The files to classify.
+
+        Returns
+        -------
+        byInstrument : `dict` [`str`, `list` [`lsst.resources.ResourcePath`]]
+            The files from each instrument, indexed by instrument name.
+        rejected : `list` [`lsst.resources.ResourcePath`]
+            Files that do not come from a star tracker.
+        """
+        byInstrument = defaultdict(list)
+        rejected = []
+        for file in files:
+            translatorClass = findStarTrackerTranslator(file.ospath,
+                                                        readHeader=self.config.readUnrecognisedHeaders)
+            if translatorClass is None:
+                rejected.append(file)
+            else:
+                byInstrument[translatorClass.supported_instrument].append(file)
+
+        return byInstrument, rejected
+
+    def extractMetadata(self, filename):
+        """Extract and process metadata from a single raw file, using the
+        header index (if configured) to avoid reading the file, and reading
+        only the headers of gzipped files.
+
+        Parameters
+        ----------
+        filename : `lsst.resources.ResourcePath`
+            The file.
+
+        Returns
+        -------
+        data : `lsst.obs.base.ingest.RawFileData`
+            A structure containing the metadata extracted from the file.
+        """
+        try:
+            if self.headerIndex is None:
+                header, obsInfo = None, None
+            else:
+                header, obsInfo = self.headerIndex.get(filename.ospath)
+
+            if obsInfo is None:
+                if header is None:
+                    header = readRawHeader(filename.ospath)
+                datasetInfo = self._calculate_dataset_info(header, filename)
+                if self.headerIndex is not None:
+                    self.headerIndex.put(filename.ospath, header, datasetInfo.obsInfo)
+            else:
+                datasetInfo = self._calculate_dataset_info(obsInfo, filename)
+        except Exception as e:
+            # Let the base class handle (and report) the failure
+            self.log.warning("Unable to get the metadata of %s from the header index or the header "
+                             "(%s); trying again without the index", filename, e)
+            return super().extractMetadata(filename)
+
+        instrument, formatterClass = self._determine_instrument_formatter(datasetInfo.dataId, filename)
+        if instrument is None:
+            return super().extractMetadata(filename)
+
+        return RawFileData(datasets=[datasetInfo], filename=filename, FormatterClass=formatterClass,
+                           instrument=instrument)
+
+    def _determine_instrument_formatter(self, dataId, filename):
+        # Docstring inherited from RawIngestTask
+        instrument, formatterClass = super()._determine_instrument_formatter(dataId, filename)
+        if self.config.compactRaws and formatterClass is not None:
+            compactName = formatterClass.__name__.replace("RawFormatter", "CompactRawFormatter")
+            formatterClass = getattr(sys.modules[formatterClass.__module__], compactName, formatterClass)
+
+        return instrument, formatterClass
+
+    def prep(self, files, *, pool=None):
+        # Docstring inherited from RawIngestTask.prep
+        exposureData, badFiles = super().prep(files, pool=pool)
+        exposureData = self.removeCorruptFiles(exposureData)
+        self.insertExposureRecords(exposureData)
+
+        return iter(exposureData), badFiles
+
+    def checkFilesInBackground(self, files, executor):
+        """Start verifying the checksums of files and writing their
+        previews, as configured.
+
+        Only the verification is waited for (by `removeCorruptFiles`);
+        the previews are written while ingest proceeds.
+
+        Parameters
+        ----------
+        files : iterable of `lsst.resources.ResourcePath`
+            The files to check.
+        executor : `concurrent.futures.Executor` or `None`
+            Executor used to check the files and write the previews; if `None`
+            nothing is done.
+        """
+        if executor is None:
+            return
+        for file in files:
+            if self.config.doVerifyChecksums:
+                self._checkFutures[file.ospath] = executor.submit(self.checkFile, file.ospath, executor)
+            elif self.config.doWritePreviews:
+                executor.submit(self._writePreview, file.ospath)
+
+    def checkFile(self, path, executor=None):
+        """Verify the checksums of a file and write its preview, as
+        configured.
+
+        Parameters
+        ----------
+        path : `str`
+            The file.
+        executor : `concurrent.futures.Executor`, optional
+            Executor used to write the preview, so that the caller needn't
+            wait for it; if `None` it is written before returning.
+
+        Returns
+        -------
+        problems : `list` [`str`]
+            Problems found by
+            `~lsst.obs.rubinGenericCamera.fitsUtils.verifyChecksums`; empty
+            if the file is good (or wasn't verified).
+        """
+        source = path
+        if self.config.doVerifyChecksums and self.config.doWritePreviews and getFitsCompression(path) == GZIP:
+            # Decompress the file once, rather than for each reader
+            try:
+                source = decompressFile(path)
+            except (OSError, EOFError) as e:
+                return [f"unable to read file: {e}"]
+
+        problems = verifyChecksums(source) if self.config.doVerifyChecksums else []
+        if not problems and self.config.doWritePreviews:
+            try:
+                if executor is None:
+                    raise RuntimeError("no executor")
+                executor.submit(self._writePreview, path, source)
+            except RuntimeError:        # including an executor that has been shut down
+                self._writePreview(path, source)
+
+        return problems
+
+    def _writePreview(self, path, source=None):
+        """Write the preview of a file, logging (rather than raising) any
+        failure.
+
+        Parameters
+        ----------
+        path : `str`
+            The file.
+        source : `str` or file-like, optional
+            The file's contents (e.g. from
+            `~lsst.obs.rubinGenericCamera.fitsUtils.decompressFile`); if
+            `None` read ``path``.
+        """
+        try:
+            if self.config.previewDir is not None:
+                os.makedirs(self.config.previewDir, exist_ok=True)
+            writePreview(path if source is None else source, getPreviewPath(path, self.config.previewDir),
+                         binFactor=self.config.previewBinFactor)
+        except Exception as e:
+            self.log.warning("Unable to write a preview of %s: %s", path, e)
+
+    def removeCorruptFiles(self, exposureData):
+        """Remove files that failed checksum verification.
+
+        Waits for the verification of each file started by
+        `checkFilesInBackground`; files that fail are recorded in
+        ``corruptFiles`` and moved to ``config.quarantineDir`` (if set).
+
+        Parameters
+        ----------
+        exposureData : iterable of `lsst.obs.base.ingest.RawExposureData`
+            The exposures to check.
+
+        Returns
+        -------
+        exposureData : `list` [`lsst.obs.base.ingest.RawExposureData`]
+            The exposures, without the corrupt files; exposures with no
+            good files are omitted.
+        """
+        good = []
+        for exposure in exposureData:
+            files = []
+            for fileData in exposure.files:
+                future = self._checkFutures.pop(fileData.filename.ospath, None)
+                problems = [] if future is None else future.result()
+                if problems:
+                    self.quarantine(fileData.filename.ospath, problems)
+                else:
+                    files.append(fileData)
+            if files:
+                exposure.files = files
+                good.append(exposure)
+
+        return good
+
+    def quarantine(self, path, problems):
+        """Record that a file is corrupt, and move it to
+        ``config.quarantineDir`` if it is set.
+
+        Parameters
+        ----------
+        path : `str`
+            The file.
+        problems : `list` [`str`]
+            What is wrong with it.
+        """
+        self.corruptFiles[path] = problems
+        self.log.warning("Not ingesting %s as it is corrupt: %s", path, "; ".join(problems))
+        if self.config.quarantineDir is not None:
+            os.makedirs(self.config.quarantineDir, exist_ok=True)
+            try:
+                shutil.move(path, os.path.join(self.config.quarantineDir, os.path.basename(path)))
+            except OSError as e:
+                self.log.warning("Unable to move %s to %s: %s", path, self.config.quarantineDir, e)
+
+    def _makeBackgroundExecutor(self):
+        """Return a thread pool to verify checksums and write previews, or
+        `None` if neither is wanted"""
+        if not (self.config.doVerifyChecksums or self.config.doWritePreviews):
+            return None
+        return ThreadPoolExecutor(self.config.backgroundThreads, thread_name_prefix="checkFile")
+
+    def insertExposureRecords(self, exposureData):
+        """Insert the dimension records for many exposures at once.
+
+        The per-exposure synchronisation in `ingestFiles` then finds the
+        records already present rather than inserting them one at a time.
+        Existing records are left alone, so ``update_exposure_records``
+        still updates them.  This doesn't affect
+        ``skip_existing_exposures``, as
+        `lsst.obs.base.RawIngestTask.ingestExposureDatasets` decides what
+        to skip by looking for the raws' datasets in the run, not at
+        whether their exposure records already existed.
+
+        Parameters
+        ----------
+        exposureData : `list` [`lsst.obs.base.ingest.RawExposureData`]
+            The exposures about to be ingested.
+        """
+        if not exposureData:
+            return
+
+        records = defaultdict(dict)
+        for exposure in exposureData:
+            # The records that the exposure depends on (e.g. day_obs) must
+            # be inserted first, so put them first in the dict
+            for name, record in getattr(exposure, "dependencyRecords", {}).items():
+                records[name][record.dataId] = record
+        for exposure in exposureData:
+            records["exposure"][exposure.record.dataId] = exposure.record
+
+        with self.butler.registry.transaction():
+            for name, byDataId in records.items():
+                self.butler.registry.insertDimensionData(name, *byDataId.values(), skip_existing=True)
+
+    def run(self, files, *, pool=None, processes=None, run=None,
+            file_filter=r"\.fit[s]?\b", group_files=True, **kwargs):
+        """Ingest star tracker raws, one instrument at a time.
+
+        Parameters
+        ----------
+        files : iterable of `str` or `lsst.resources.ResourcePath`
+            Files or directories to ingest.
+        pool : `multiprocessing.Pool`, optional
+            Pool to use to read and translate headers; if `None` one is
+            created with ``processes`` processes.  Create it with
+            ``initializer=instrumentation.initializeWorker`` to collect
+            the workers' metrics.
+        processes : `int`, optional
+            Number of processes to use if ``pool`` is `None`; if `None` use
+            ``config.processes``.
+        run : `str`, optional
+            Name of the RUN collection to ingest into.
+        file_filter : `str` or `re.Pattern`, optional
+            Regular expression used to select files found in directories.
+        group_files : `bool`, optional
+            Passed to `lsst.resources.ResourcePath.findFileResources`.
+        **kwargs
+            Passed to `lsst.obs.base.RawIngestTask.run`.
+
+        Returns
+        -------
+        refs : `list` [`lsst.daf.butler.DatasetRef`]
+            The datasets that were ingested; files that failed checksum
+            verification are listed in ``corruptFiles``.
+        """
+        if processes is None:
+            processes = self.config.processes
+
+        files = list(ResourcePath.findFileResources(files, file_filter, group_files=False))
+        byInstrument, rejected = self.classifyFiles(files)
+        for file in rejected:
+            self.log.warning("Skipping %s as it is not from a star tracker", file)
+        self.log.info("Ingesting %d files: %s", sum(len(f) for f in byInstrument.values()),
+                      ", ".join(f"{len(f)} from {inst}" for inst, f in sorted(byInstrument.items())))
+
+        self.corruptFiles = {}
+        backgroundExecutor = self._makeBackgroundExecutor()
+        createdPool = pool is None and processes > 1
+        if createdPool:
+            pool = Pool(processes, initializer=initializeWorker)
+        succeeded = False
+        try:
+            # Check files and write previews while headers are translated
+            for instrumentFiles in byInstrument.values():
+                self.checkFilesInBackground(instrumentFiles, backgroundExecutor)
+
+            refs = []
+            for instrument, instrumentFiles in sorted(byInstrument.items()):
+                refs += super().run(instrumentFiles, pool=pool, run=run, file_filter=file_filter,
+                                    group_files=group_files, **kwargs)
+            succeeded = True
+        finally:
+            if createdPool:
+                pool.close()
+                pool.join()
+            if backgroundExecutor is not None:
+                # Let the previews of the ingested files be written
+                backgroundExecutor.shutdown(cancel_futures=not succeeded)
+            self._checkFutures.clear()
+
+        if self.corruptFiles:
+            self.log.warning("%d files failed checksum verification and were not ingested%s",
+                             len(self.corruptFiles),
+                             "" if self.config.quarantineDir is None else
+                             f"; they have been moved to {self.config.quarantineDir}")
+
+        return refs
+
+    def follow(self, directories, *, run=None, timeout=None, pool=None, processes=None):
+        """Ingest new files as they appear in one or more directories.
+
+        Each directory is checked every ``config.followPollInterval``
+        seconds, and listed again if it has been modified.  A file is
+        considered complete once its size is unchanged between two checks;
+        complete files from ``config.followInstruments`` are ingested in
+        batches of up to ``config.followBatchSize`` files, or sooner if the
+        oldest has been waiting for ``config.followMaxLatency`` seconds.
+        No more than ``config.followMaxPending`` files are queued; while the
+        queue is full the directories are not checked, so a slow registry
+        makes the follower fall behind rather than use unbounded memory.
+        The files of a batch that fails are tried again, up to
+        ``config.followMaxRetries`` times, unless their raws turn out to
+        have been ingested before the failure; files that are removed from
+        the directories are forgotten.
+
+        Parameters
+        ----------
+        directories : `str` or `list` [`str`]
+            The directories to follow.
+        run : `str`, optional
+            Name of the RUN collection to ingest into.
+        timeout : `float`, optional
+            Return if no new files have appeared for this many seconds; if
+            `None` follow the directories forever.
+        pool : `multiprocessing.Pool`, optional
+            Pool to use to read and translate headers.
+        processes : `int`, optional
+            Number of processes to use if ``pool`` is `None`; if `None` use
+            ``config.processes``.
+
+        Returns
+        -------
+        nIngested : `int`
+            The number of datasets ingested.
+        """
+        if isinstance(directories, str):
+            directories = [directories]
+        if processes is None:
+            processes = self.config.processes
+        instruments = set(self.config.followInstruments)
+
+        done = set()                    # files that have been ingested or rejected
+        queued = set()                  # files in pending
+        sizes = {}                      # size of incomplete files at the previous check
+        failures = defaultdict(int)     # number of failed attempts to ingest each file
+        listings = {}                   # see _scanDirectories
+        pending = deque()               # (file, time it was found to be complete)
+        nIngested = 0
+        lastNewFile = time.monotonic()
+
+        backgroundExecutor = self._makeBackgroundExecutor()
+        createdPool = pool is None and processes > 1
+        if createdPool:
+            pool = Pool(processes, initializer=initializeWorker)
+        succeeded = False
+        try:
+            while True:
+                now = time.monotonic()
+                if len(pending) < self.config.followMaxPending:
+                    paths, changed = self._scanDirectories(directories, listings)
+                    if changed:         # forget files that have gone away
+                        done &= paths
+                        for forgotten in [sizes, failures]:
+                            for path in forgotten.keys() - paths:
+                                del forgotten[path]
+
+                    for path in sorted(paths - done - queued):
+                        if path not in sizes and not self._isFollowed(path, instruments, readHeader=False):
+                            done.add(path)
+                            continue
+
+                        try:
+                            size = os.stat(path).st_size
+                        except FileNotFoundError:
+                            continue
+                        if sizes.get(path) != size:  # new, or still being written
+                            sizes[path] = size
+                            lastNewFile = now
+                            continue
+                        del sizes[path]
+                        # Files with non-standard names are only opened
+                        # once they are complete
+                        if not self._isFollowed(path, instruments, readHeader=True):
+                            done.add(path)
+                            continue
+
+                        queued.add(path)
+                        pending.append((path, now))
+                        self.checkFilesInBackground([ResourcePath(path)], backgroundExecutor)
+                        if len(pending) >= self.config.followMaxPending:
+                            self.log.warning("%d files are waiting to be ingested; pausing directory scans",
+                                             len(pending))
+                            break
+
+                if pending and (len(pending) >= self.config.followBatchSize
+                                or now - pending[0][1] >= self.config.followMaxLatency):
+                    batch = [pending.popleft()[0]
+                             for _ in range(min(self.config.followBatchSize, len(pending)))]
+                    queued.difference_update(batch)
+                    # A failed batch may have been partly ingested
+                    retried = [path for path in batch if path in failures and self._isIngested(path, run)]
+                    if retried:
+                        done.update(retried)
+                        for path in retried:
+                            del failures[path]
+                        batch = [path for path in batch if path not in done]
+                        if not batch:
+                            continue
+                    try:
+                        refs = super().run([ResourcePath(path) for path in batch], pool=pool, run=run)
+                    except Exception as e:
+                        self.log.warning("Failed to ingest batch of %d files starting with %s: %s",
+                                         len(batch), batch[0], e)
+                        for path in batch:
+                            failures[path] += 1
+                            if failures[path] > self.config.followMaxRetries:
+                                self.log.error("Giving up on %s after %d attempts", path, failures[path])
+                                done.add(path)
+                            # otherwise it is found again by the next scan
+                    else:
+                        nIngested += len(refs)
+                        done.update(batch)
+                        for path in batch:
+                            failures.pop(path, None)
+                    for path in batch:  # files whose metadata couldn't be read
+                        self._checkFutures.pop(ResourcePath(path).ospath, None)
+                    self.log.debug("Ingested %d files; %d waiting", len(batch), len(pending))
+                    continue
+
+                if timeout is not None and not pending and time.monotonic() - lastNewFile > timeout:
+                    break
+
+                time.sleep(self.config.followPollInterval)
+            succeeded = True
+        finally:
+            if createdPool:
+                pool.close()
+                pool.join()
+            if backgroundExecutor is not None:
+                backgroundExecutor.shutdown(cancel_futures=not succeeded)
+            self._checkFutures.clear()
+
+        return nIngested
+
+    def _isFollowed(self, path, instruments, readHeader):
+        """Return whether follow() should ingest a file.
+
+        Parameters
+        ----------
+        path : `str`
+            The file.
+        instruments : `set` [`str`]
+            The instruments being followed.
+        readHeader : `bool`
+            Read the header if the name isn't of the standard form?  If
+            `False` such files are assumed to be followed (if
+            ``config.readUnrecognisedHeaders`` is set) until their headers
+            can be read.
+
+        Returns
+        -------
+        followed : `bool`
+            `True` if the file should be ingested.
+        """
+        if parseStarTrackerFilename(path) is None:
+            if not self.config.readUnrecognisedHeaders:
+                return False
+            if not readHeader:
+                return True
+
+        translatorClass = findStarTrackerTranslator(path, readHeader=readHeader)
+        return translatorClass is not None and translatorClass.supported_instrument in instruments
+
+    def _isIngested(self, path, run):
+        """Return whether all the raws in a file are already in the butler.
+
+        Parameters
+        ----------
+        path : `str`
+            The file.
+        run : `str` or `None`
+            The RUN collection being ingested into; if `None` the
+            instrument's default raw collection.
+
+        Returns
+        -------
+        ingested : `bool`
+            `True` if there is a dataset for every raw in the file.
+        """
+        fileData = self.extractMetadata(ResourcePath(path))
+        if not fileData.datasets or fileData.instrument is None:
+            return False
+        if run is None:
+            run = fileData.instrument.makeDefaultRawIngestRunName()
+
+        return all(self.butler.registry.findDataset(self.datasetType, dataset.dataId, collections=run)
+                   is not None for dataset in fileData.datasets)
+
+    @staticmethod
+    def _scanDirectories(directories, listings):
+        """Return the paths of the FITS files in some directories, only
+        listing the directories that have changed.
+
+        Parameters
+        ----------
+        directories : `list` [`str`]
+            The directories to scan.
+        listings : `dict`
+            The listings from previous calls, which are reused if their
+            directories haven't been modified since; updated in place.
+
+        Returns
+        -------
+        paths : `set` [`str`]
+            The files.
+        changed : `bool`
+            `True` if any of the directories was listed.
+        """
+        paths = set()
+        changed = False
+        for directory in directories:
+            mtime = os.stat(directory).st_mtime_ns
+            listing = listings.get(directory)
+            # A listing made within a few seconds of the modification may
+            # have missed files added in the same tick of a coarse clock
+            if listing is None or listing[0] != mtime or listing[1] - mtime < 2_000_000_000:
+                listedAt = time.time_ns()
+                with os.scandir(directory) as it:
+                    files = frozenset(entry.path for entry in it if ".fits" in entry.name and entry.is_file())
+                listing = listings[directory] = (mtime, listedAt, files)
+                changed = True
+            paths |= listing[2]
+
+        return paths, changed
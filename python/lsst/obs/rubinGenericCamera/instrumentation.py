@@ -0,0 +1,232 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Opt-in timers and counters for the package's hot paths.
+
+Instrumentation is off unless `enable` is called or the environment
+variable ``RUBIN_GENERIC_CAMERA_INSTRUMENTATION`` is set (to anything but
+``0``); while it is off the only cost is a test of a flag.  If
+``RUBIN_GENERIC_CAMERA_METRICS_FILE`` is set, a Prometheus-style dump is
+written there when the process exits; any ``{pid}`` in the name is
+replaced by the process ID, so each worker gets its own file.
+
+Worker processes of a `multiprocessing.Pool` or
+`concurrent.futures.ProcessPoolExecutor` leave via `os._exit`, which
+skips `atexit`, so they only write their dump if the pool was created with
+``initializer=initializeWorker`` and is shut down with ``close`` and
+``join`` (rather than ``terminate``).
+"""
+
+__all__ = ("enable", "disable", "isEnabled", "reset", "timed", "timer", "incrementCounter",
+           "getReport", "formatPrometheus", "writePrometheus", "initializeWorker")
+
+import atexit
+import contextlib
+import functools
+import multiprocessing.util
+import os
+import threading
+import time
+
+_lock = threading.Lock()
+_enabled = os.environ.get("RUBIN_GENERIC_CAMERA_INSTRUMENTATION", "0") not in ("", "0")
+_timers = {}                            # name -> [nCall, total, min, max]
+_counters = {}                          # name -> count
+
+
+def enable():
+    """Start recording timings and counts"""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Stop recording timings and counts (those already recorded are
+    kept)"""
+    global _enabled
+    _enabled = False
+
+
+def isEnabled():
+    """Return `True` if instrumentation is enabled"""
+    return _enabled
+
+
+def reset():
+    """Forget all the timings and counts recorded so far"""
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def _recordTime(name, dt):
+    with _lock:
+        stats = _timers.get(name)
+        if stats is None:
+            _timers[name] = [1, dt, dt, dt]
+        else:
+            stats[0] += 1
+            stats[1] += dt
+            stats[2] = min(stats[2], dt)
+            stats[3] = max(stats[3], dt)
+
+
+def incrementCounter(name, n=1):
+    """Add to a counter, e.g. of cache hits or bytes read.
+
+    Parameters
+    ----------
+    name : `str`
+        The name of the counter.
+    n : `int`, optional
+        The amount to add.
+    """
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+@contextlib.contextmanager
+def timer(name):
+    """A context manager that records the time spent in its body.
+
+    Parameters
+    ----------
+    name : `str`
+        The name of the timer.
+    """
+    if not _enabled:
+        yield
+        return
+
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _recordTime(name, time.perf_counter() - t0)
+
+
+def timed(name):
+    """A decorator that records the time spent in each call to a function.
+
+    Parameters
+    ----------
+    name : `str`
+        The name of the timer.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _recordTime(name, time.perf_counter() - t0)
+
+        return wrapper
+
+    return decorator
+
+
+def getReport():
+    """Return the timings and counts recorded so far.
+
+    Returns
+    -------
+    report : `dict`
+        ``timers`` is a `dict` giving, for each timer, the number of calls
+        (``nCall``) and the ``total``, ``mean``, ``min`` and ``max`` times
+        in seconds; ``counters`` is a `dict` of the value of each counter.
+    """
+    with _lock:
+        timers = {name: dict(nCall=n, total=total, mean=total / n, min=tmin, max=tmax)
+                  for name, (n, total, tmin, tmax) in _timers.items()}
+        counters = dict(_counters)
+
+    return dict(pid=os.getpid(), timers=timers, counters=counters)
+
+
+def formatPrometheus(report=None):
+    """Format a report in the Prometheus text exposition format.
+
+    Parameters
+    ----------
+    report : `dict`, optional
+        The report to format; if `None` use `getReport`.
+
+    Returns
+    -------
+    text : `str`
+        The formatted report.
+    """
+    if report is None:
+        report = getReport()
+    pid = report["pid"]
+
+    lines = ["# TYPE rubin_generic_camera_call_seconds summary"]
+    for name, stats in sorted(report["timers"].items()):
+        lines.append(f'rubin_generic_camera_call_seconds_sum{{name="{name}",pid="{pid}"}} {stats["total"]}')
+        lines.append(f'rubin_generic_camera_call_seconds_count{{name="{name}",pid="{pid}"}} {stats["nCall"]}')
+    lines.append("# TYPE rubin_generic_camera_events_total counter")
+    for name, value in sorted(report["counters"].items()):
+        lines.append(f'rubin_generic_camera_events_total{{name="{name}",pid="{pid}"}} {value}')
+
+    return "\n".join(lines) + "\n"
+
+
+def writePrometheus(filename):
+    """Write the timings and counts recorded so far to a file in the
+    Prometheus text exposition format.
+
+    Parameters
+    ----------
+    filename : `str`
+        The file to write; ``{pid}`` is replaced by the process ID.
+    """
+    filename = filename.replace("{pid}", str(os.getpid()))
+    tmpFile = f"{filename}.tmp{os.getpid()}"
+    with open(tmpFile, "w") as fd:
+        fd.write(formatPrometheus())
+    os.replace(tmpFile, filename)
+
+
+def _writeAtExit():
+    filename = os.environ.get("RUBIN_GENERIC_CAMERA_METRICS_FILE")
+    if filename and (_timers or _counters):
+        writePrometheus(filename)
+
+
+def initializeWorker():
+    """Prepare a pool worker process to record its own timings and counts.
+
+    Pass this as the ``initializer`` of a process pool.  It forgets
+    anything inherited from the parent process, and registers the dump to
+    ``RUBIN_GENERIC_CAMERA_METRICS_FILE`` with `multiprocessing`, which
+    (unlike `atexit`) runs it when the worker exits.
+    """
+    reset()
+    multiprocessing.util.Finalize(None, _writeAtExit, exitpriority=0)
+
+
+atexit.register(_writeAtExit)
@@ -0,0 +1,173 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+__all__ = ("StarTrackerIsrConnections", "StarTrackerIsrConfig", "StarTrackerIsrTask")
+
+import numpy as np
+
+import lsst.afw.image as afwImage
+import lsst.geom as geom
+import lsst.pex.config as pexConfig
+import lsst.pipe.base as pipeBase
+import lsst.pipe.base.connectionTypes as cT
+
+
+def _ampSlices(amp, bbox):
+    """Return the slices of an image array with the given bbox that are
+    part of an amplifier, or `None` if the amplifier isn't in the image.
+    """
+    ampBox = geom.Box2I(amp.getBBox())
+    ampBox.clip(bbox)
+    if ampBox.isEmpty():
+        return None
+    ampBox.shift(-geom.Extent2I(bbox.getMin()))
+
+    return ampBox.getSlices()
+
+
+class StarTrackerIsrConnections(pipeBase.PipelineTaskConnections,
+                                dimensions=("instrument", "exposure", "detector")):
+    ccdExposure = cT.Input(
+        name="raw",
+        doc="Input exposure to process.",
+        storageClass="Exposure",
+        dimensions=["instrument", "exposure", "detector"],
+    )
+    bias = cT.PrerequisiteInput(
+        name="bias",
+        doc="Input bias calibration.",
+        storageClass="ExposureF",
+        dimensions=["instrument", "detector"],
+        isCalibration=True,
+    )
+    outputExposure = cT.Output(
+        name="postISRCCD",
+        doc="Output ISR processed exposure.",
+        storageClass="Exposure",
+        dimensions=["instrument", "exposure", "detector"],
+    )
+
+    def __init__(self, *, config=None):
+        super().__init__(config=config)
+
+        if config.doBias is not True:
+            self.prerequisiteInputs.remove("bias")
+
+
+class StarTrackerIsrConfig(pipeBase.PipelineTaskConfig, pipelineConnections=StarTrackerIsrConnections):
+    doSaturation = pexConfig.Field(
+        dtype=bool,
+        default=True,
+        doc="Mask pixels at or above each amplifier's saturation level?",
+    )
+    saturatedMaskName = pexConfig.Field(
+        dtype=str,
+        default="SAT",
+        doc="Name of mask plane to use in saturation detection.",
+    )
+    doBias = pexConfig.Field(
+        dtype=bool,
+        default=False,
+        doc="Subtract a bias frame?",
+    )
+    doVariance = pexConfig.Field(
+        dtype=bool,
+        default=True,
+        doc="Calculate the variance plane from each amplifier's gain and read noise?",
+    )
+
+
+class StarTrackerIsrTask(pipeBase.PipelineTask):
+    """A minimal ISR for the star trackers.
+
+    The star trackers' raws have a single amplifier with no overscan, so
+    there is nothing to assemble or trim: ISR is just conversion to
+    floating point, saturation masking, and
+    (optionally) bias subtraction and the computation of a variance plane.
+    These are done with whole-amplifier array operations.  The connections
+    are the same as `lsst.ip.isr.IsrTask`'s, so this task may replace it in
+    the star tracker pipelines.
+    """
+    ConfigClass = StarTrackerIsrConfig
+    _DefaultName = "isr"
+
+    def run(self, ccdExposure, bias=None):
+        """Perform ISR on a star tracker exposure.
+
+        Parameters
+        ----------
+        ccdExposure : `lsst.afw.image.Exposure`
+            The raw exposure; it must have a detector.
+        bias : `lsst.afw.image.Exposure`, optional
+            The bias; required if ``config.doBias`` is `True`.
+
+        Returns
+        -------
+        result : `lsst.pipe.base.Struct`
+            Result struct with components:
+
+            ``exposure``
+                The ISR-processed exposure (`lsst.afw.image.ExposureF`).
+            ``outputExposure``
+                The same exposure, for compatibility with
+                `lsst.ip.isr.IsrTask` (`lsst.afw.image.ExposureF`).
+
+        Raises
+        ------
+        RuntimeError
+            Raised if the exposure has no detector, or no bias is provided
+            when one is needed.
+        """
+        detector = ccdExposure.getDetector()
+        if detector is None:
+            raise RuntimeError("The input exposure has no detector")
+        if self.config.doBias and bias is None:
+            raise RuntimeError("Must supply a bias if config.doBias is True")
+
+        if isinstance(ccdExposure, afwImage.ExposureF):
+            exposure = ccdExposure
+        else:
+            exposure = ccdExposure.convertF()
+
+        image = exposure.image.array
+        bbox = exposure.getBBox()
+        if self.config.doSaturation:
+            satBit = exposure.mask.getPlaneBitMask(self.config.saturatedMaskName)
+            mask = exposure.mask.array
+            for amp in detector:
+                ampSlices = _ampSlices(amp, bbox)
+                saturation = amp.getSaturation()
+                if ampSlices is not None and np.isfinite(saturation):
+                    mask[ampSlices][image[ampSlices] >= saturation] |= satBit
+
+        if self.config.doBias:
+            image -= bias[bbox].image.array
+
+        if self.config.doVariance:
+            variance = exposure.variance.array
+            for amp in detector:
+                ampSlices = _ampSlices(amp, bbox)
+                if ampSlices is None:
+                    continue
+                gain, readNoise = amp.getGain(), amp.getReadNoise()
+                variance[ampSlices] = np.maximum(image[ampSlices], 0.0) / gain + (readNoise / gain)**2
+
+        return pipeBase.Struct(exposure=exposure, outputExposure=exposure)
@@ -0,0 +1,161 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Read sequences of frames in order while later ones are read in the
+background.
+
+Reading a raw spends most of its time decompressing and parsing the file,
+so a tool that processes a night's exposures one after another can hide
+most of that time behind its own computation by reading the next few
+exposures in a pool of threads.
+"""
+
+__all__ = ("prefetch", "prefetchRaws")
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .instrumentation import incrementCounter
+
+
+def _nBytes(obj):
+    """Return an estimate of the memory used by an array, Image,
+    MaskedImage or Exposure"""
+    if hasattr(obj, "nbytes"):
+        return obj.nbytes
+    if hasattr(obj, "array"):
+        return obj.array.nbytes
+    if hasattr(obj, "getMaskedImage"):
+        obj = obj.getMaskedImage()
+    if hasattr(obj, "image"):
+        return sum(_nBytes(plane) for plane in (obj.image, obj.mask, obj.variance))
+    return 0
+
+
+def prefetch(items, read, *, nThreads=4, maxAhead=8, maxBytes=None, sizeOf=_nBytes):
+    """Read items in a pool of threads, yielding the results in order.
+
+    Parameters
+    ----------
+    items : iterable
+        The things to read (e.g. data IDs or filenames); consumed lazily.
+    read : callable
+        Function that reads an item and returns the result.
+    nThreads : `int`, optional
+        Number of threads to read with.
+    maxAhead : `int`, optional
+        Maximum number of items that are read (or being read) but haven't
+        been yielded yet.
+    maxBytes : `int`, optional
+        Memory budget for those items; no more items are started than are
+        expected, from the size of the largest item read so far, to fit in
+        it.  Only the first item is read until its size is known, and at
+        least one item is always being read.  If `None`, only ``maxAhead``
+        limits the read-ahead.
+    sizeOf : callable, optional
+        Function returning the number of bytes used by a result; the
+        default understands numpy arrays and afw Images, MaskedImages and
+        Exposures.
+
+    Yields
+    ------
+    result
+        The result of ``read`` for each item, in the order of ``items``.
+        An exception raised by ``read`` is raised when its item is reached.
+
+    Notes
+    -----
+    Items that have been started when the caller stops iterating (e.g. by
+    breaking out of a loop) are abandoned: those still queued are
+    cancelled, and closing the generator waits for those being read to
+    finish.
+    """
+    items = iter(items)
+    futures = deque()
+    largest = None                      # size of the largest result so far
+
+    with ThreadPoolExecutor(nThreads, thread_name_prefix="prefetch") as executor:
+        def refill():
+            while len(futures) < maxAhead:
+                if futures and maxBytes is not None and (largest is None
+                                                         or (len(futures) + 1) * largest > maxBytes):
+                    break
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                futures.append(executor.submit(read, item))
+
+        try:
+            refill()
+            while futures:
+                future = futures.popleft()
+                if future.done():
+                    incrementCounter("prefetch.ready")
+                else:
+                    incrementCounter("prefetch.waited")
+                result = future.result()
+                largest = max(largest or 0, sizeOf(result))
+                refill()
+                yield result
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def prefetchRaws(butler, dataIds, *, datasetType="raw", collections=None, parameters=None,
+                 sort=True, **kwargs):
+    """Get raws from a butler in time order, reading ahead in the
+    background.
+
+    Parameters
+    ----------
+    butler : `lsst.daf.butler.Butler`
+        The butler to read from.
+    dataIds : iterable of `dict` or `lsst.daf.butler.DataCoordinate`
+        The raws to read.
+    datasetType : `str`, optional
+        The dataset type to read.
+    collections : `str` or `list` [`str`], optional
+        Collections to search; if `None` use the butler's defaults.
+    parameters : `dict`, optional
+        Parameters (e.g. ``bbox``) passed to ``butler.get``.
+    sort : `bool`, optional
+        Read the data IDs in order of their ``exposure`` (and so in time
+        order) rather than the order given.
+    **kwargs
+        Passed to `prefetch` (e.g. ``nThreads``, ``maxAhead`` or
+        ``maxBytes``).
+
+    Yields
+    ------
+    exposure : `lsst.afw.image.Exposure`
+        The raws, in order.
+    """
+    if sort:
+        dataIds = sorted(dataIds, key=lambda dataId: (dataId["exposure"], dataId["instrument"],
+                                                      dataId.get("detector", 0)))
+
+    def read(dataId):
+        return butler.get(datasetType, dataId, collections=collections, parameters=parameters)
+
+    yield from prefetch(dataIds, read, **kwargs)
@@ -0,0 +1,179 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Small binned previews of star tracker frames for quick-look displays.
+
+Previews are written as 8-bit greyscale PNG files, which any viewer can
+display without reading (and decompressing) the raw.
+"""
+
+__all__ = ("binImage", "stretchImage", "makePreview", "writePng", "getPreviewPath", "writePreview")
+
+import os
+import struct
+import zlib
+
+import numpy as np
+from astropy.visualization import AsinhStretch, ZScaleInterval
+
+from .burst import BurstFrames
+from .instrumentation import timed
+
+
+def binImage(array, binFactor):
+    """Bin an image by averaging square blocks of pixels.
+
+    Parameters
+    ----------
+    array : `numpy.ndarray`
+        The image.
+    binFactor : `int`
+        The size of the blocks; rows and columns that don't fill a whole
+        block are dropped.
+
+    Returns
+    -------
+    binned : `numpy.ndarray`
+        The binned image, as float32.
+    """
+    if binFactor == 1:
+        return array.astype(np.float32)
+    ny, nx = array.shape[0] // binFactor, array.shape[1] // binFactor
+    blocks = array[:ny * binFactor, :nx * binFactor].reshape(ny, binFactor, nx, binFactor)
+
+    return blocks.mean(axis=(1, 3), dtype=np.float32)
+
+
+def stretchImage(array, asinhA=0.1):
+    """Scale an image to 8 bits using zscale limits and an asinh stretch.
+
+    Parameters
+    ----------
+    array : `numpy.ndarray`
+        The image.
+    asinhA : `float`, optional
+        The ``a`` parameter of `astropy.visualization.AsinhStretch`; smaller
+        values compress bright stars more.
+
+    Returns
+    -------
+    stretched : `numpy.ndarray`
+        The image as uint8.
+    """
+    vmin, vmax = ZScaleInterval().get_limits(array)
+    if vmax <= vmin:
+        vmax = vmin + 1
+    scaled = np.clip((array - vmin) / (vmax - vmin), 0, 1)
+
+    return (AsinhStretch(asinhA)(scaled, clip=True) * 255 + 0.5).astype(np.uint8)
+
+
+def makePreview(array, binFactor=4, asinhA=0.1):
+    """Make an 8-bit preview of an image.
+
+    Parameters
+    ----------
+    array : `numpy.ndarray`
+        The image.
+    binFactor : `int`, optional
+        Factor by which to bin the image.
+    asinhA : `float`, optional
+        The asinh stretch parameter; see `stretchImage`.
+
+    Returns
+    -------
+    preview : `numpy.ndarray`
+        The binned and stretched image, as uint8.
+    """
+    return stretchImage(binImage(array, binFactor), asinhA=asinhA)
+
+
+def writePng(path, array):
+    """Write an 8-bit greyscale image as a PNG file.
+
+    Parameters
+    ----------
+    path : `str`
+        The file to write.
+    array : `numpy.ndarray`
+        The image, as uint8; the first row is at the bottom of the picture,
+        as in FITS.
+    """
+    height, width = array.shape
+    rows = np.empty((height, width + 1), dtype=np.uint8)
+    rows[:, 0] = 0                      # no filtering
+    rows[:, 1:] = array[::-1]
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    png = b"".join([b"\x89PNG\r\n\x1a\n",
+                    chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)),
+                    chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)),
+                    chunk(b"IEND", b"")])
+    tmpPath = f"{path}.tmp{os.getpid()}"
+    with open(tmpPath, "wb") as fd:
+        fd.write(png)
+    os.replace(tmpPath, path)
+
+
+def getPreviewPath(path, previewDir=None):
+    """Return the name of the preview of a raw.
+
+    Parameters
+    ----------
+    path : `str`
+        The raw (e.g. ``.../GC101_O_20221208_000211.fits.gz``).
+    previewDir : `str`, optional
+        Directory for the preview; if `None` use the raw's directory.
+
+    Returns
+    -------
+    previewPath : `str`
+        The preview (e.g. ``.../GC101_O_20221208_000211.png``).
+    """
+    dirName, baseName = os.path.split(path)
+    stem = baseName.split(".fit")[0]
+
+    return os.path.join(dirName if previewDir is None else previewDir, f"{stem}.png")
+
+
+@timed("preview.writePreview")
+def writePreview(path, previewPath, binFactor=4, asinhA=0.1):
+    """Write a PNG preview of the first frame of a raw.
+
+    Parameters
+    ----------
+    path : `str` or file-like
+        The raw, or its contents (e.g. from
+        `~lsst.obs.rubinGenericCamera.fitsUtils.decompressFile`).
+    previewPath : `str`
+        The PNG file to write.
+    binFactor : `int`, optional
+        Factor by which to bin the image.
+    asinhA : `float`, optional
+        The asinh stretch parameter; see `stretchImage`.
+    """
+    with BurstFrames(path) as frames:
+        array = frames[0].array
+
+    writePng(previewPath, makePreview(array, binFactor=binFactor, asinhA=asinhA))
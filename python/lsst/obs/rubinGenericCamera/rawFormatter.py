@@ -1,9 +1,63 @@
-__all__ = ["StarTrackerNarrowRawFormatter", "StarTrackerWideRawFormatter", "StarTrackerFastRawFormatter",]
+import numpy as np
 
-from .translator import StarTrackerNarrowTranslator, StarTrackerWideTranslator, StarTrackerFastTranslator
+import lsst.afw.image as afwImage
+from lsst.afw.image import RotType
+import lsst.geom as geom
+from lsst.daf.base import PropertyList
+from .burst import BurstFrames
+from .fitsUtils import GZIP, getFitsCompression, readRawHeader
+from .instrumentation import incrementCounter, timed
+from .sharedFrame import SharedFrame, getSharedFrameName, isSharedFramesEnabled
+from .wcs import makeRawWcs
+from . import _instrument, translator
 from lsst.obs.base import FitsRawFormatterBase
+from .cameras import GENERIC_CAMERAS
 from .filters import RUBIN_GENERIC_CAMERA_FILTER_DEFINITIONS
-from ._instrument import StarTrackerNarrow, StarTrackerWide, StarTrackerFast
+
+__all__ = [f"{camera.name}{kind}RawFormatter" for camera in GENERIC_CAMERAS for kind in ("", "Compact")] + [
+    "readRawArray",]
+
+
+def readRawArray(path, bbox=None, dtype=np.uint16):
+    """Read the pixels of a raw as a numpy array, without building an
+    Exposure.
+
+    The raws are 16-bit unsigned integers, so by default no conversion is
+    done and the array takes a quarter of the memory of a float64 copy.
+
+    Parameters
+    ----------
+    path : `str`
+        The file.
+    bbox : `lsst.geom.Box2I`, optional
+        Only read this part of the image.
+    dtype : `numpy.dtype`, optional
+        The type of the returned array.
+
+    Returns
+    -------
+    array : `numpy.ndarray`
+        The pixels.
+    """
+    reader = afwImage.ImageFitsReader(path)
+    image = reader.read(bbox=geom.Box2I() if bbox is None else bbox, dtype=np.dtype(dtype))
+    incrementCounter("rawFormatter.pixelBytesRead", image.array.nbytes)
+
+    return image.array
+
+
+_RAW_XY0 = geom.Point2I(0, 0)
+"""The origin of the image of every raw"""
+
+
+def _toParentBBox(bbox, origin):
+    """Return a bbox given relative to a raw's image (LOCAL) or in PARENT
+    coordinates as a PARENT bbox, as needed by
+    `~lsst.obs.rubinGenericCamera.burst.BurstFrames` and
+    `~lsst.obs.rubinGenericCamera.sharedFrame.SharedFrame`."""
+    if bbox is None or origin == afwImage.PARENT:
+        return bbox
+    return geom.Box2I(bbox.getMin() + geom.Extent2I(_RAW_XY0), bbox.getDimensions())
 
 
 class RubinGenericCameraRawFormatter(FitsRawFormatterBase):
@@ -11,20 +65,195 @@ class RubinGenericCameraRawFormatter(FitsRawFormatterBase):
     translatorClass = None
     filterDefinitions = RUBIN_GENERIC_CAMERA_FILTER_DEFINITIONS
 
+    imageDtype = np.float32
+    """The pixel type of the images returned by readImage.  The
+    ``CompactRawFormatter`` subclasses (selected at ingest time with
+    ``StarTrackerRawIngestConfig.compactRaws``) return the raws' native
+    16-bit unsigned integers, so that tools that only compute centroids
+    or statistics don't pay for converting them to float."""
+
+    @timed("rawFormatter.getDetector")
     def getDetector(self, id):
-        return self.cameraClass().getCamera()[id]
+        # getCamera is a classmethod and caches the camera, so there's no
+        # need to construct an instrument for every raw read
+        return self.cameraClass.getCamera()[id]
+
+    @timed("rawFormatter.makeWcs")
+    def makeWcs(self, visitInfo, detector):
+        """Create a SkyWcs from the boresight and camera geometry.
+
+        The detector's pixels → field angle transform is cached (see
+        `lsst.obs.rubinGenericCamera.wcs`), so only the pointing is applied
+        for each raw.  Cases that the cached path doesn't handle (no
+        detector or visitInfo, a non-finite boresight, or a rotation angle
+        that isn't on the sky) are passed to the base class.
+
+        Parameters
+        ----------
+        visitInfo : `~lsst.afw.image.VisitInfo`
+            The visitInfo from which to obtain the boresight information.
+        detector : `~lsst.afw.cameraGeom.Detector`
+            The detector, as returned by `getDetector`.
+
+        Returns
+        -------
+        skyWcs : `~lsst.afw.geom.SkyWcs`
+            Reversible mapping from pixel coordinates to sky coordinates.
+        """
+        if detector is None or visitInfo is None or visitInfo.getRotType() != RotType.SKY:
+            return super().makeWcs(visitInfo, detector)
+        boresight = visitInfo.getBoresightRaDec()
+        if not boresight.isFinite():
+            return super().makeWcs(visitInfo, detector)
+
+        return makeRawWcs(self.cameraClass, detector.getId(), boresight, visitInfo.getBoresightRotAngle(),
+                          flipX=self.wcsFlipX)
+
+    @timed("rawFormatter.readMetadata")
+    def readMetadata(self):
+        """Read all header metadata directly into a PropertyList.
+
+        Only the header blocks of whole-file gzipped files are
+        decompressed, so reading just the metadata (or components derived
+        from it) doesn't require decompressing the image.
+
+        Returns
+        -------
+        metadata : `~lsst.daf.base.PropertyList`
+            Header metadata.
+        """
+        sharedFrame = self._attachSharedFrame()
+        if sharedFrame is not None:
+            return sharedFrame.metadata
+
+        path = self.fileDescriptor.location.path
+        if getFitsCompression(path) != GZIP:
+            return super().readMetadata()
+
+        metadata = PropertyList()
+        for key, value in readRawHeader(path).items():
+            if key not in ("COMMENT", "HISTORY", ""):
+                metadata.set(key, value)
+
+        return metadata
+
+    @timed("rawFormatter.readImage")
+    def readImage(self):
+        """Read just the image component of the Exposure.
+
+        If a ``bbox`` parameter was supplied only that part of the image is
+        read.  For uncompressed files only the rows that overlap the box
+        are read, and for tile-compressed files only the tiles that overlap
+        it are decompressed; whole-file compressed (e.g. ``.fits.gz``)
+        files must still be decompressed in full.  If the frame has been
+        published in shared memory (see
+        `~lsst.obs.rubinGenericCamera.sharedFrame`) the file isn't read at
+        all, and the image shares the published pixels.
+
+        Returns
+        -------
+        image : `~lsst.afw.image.Image`
+            In-memory image component, with pixels of type ``imageDtype``.
+        """
+        bbox = self.checked_parameters.get("bbox")
+        origin = self.checked_parameters.get("origin", afwImage.PARENT)
+        dtype = np.dtype(self.imageDtype)
+
+        sharedFrame = self._attachSharedFrame()
+        if sharedFrame is not None:
+            image = sharedFrame.makeImage(_toParentBBox(bbox, origin))
+        elif self.nFrames > 1:
+            # The Exposure of a burst is its first frame; use readFrames
+            # to get the rest
+            with self.readFrames(_toParentBBox(bbox, origin)) as frames:
+                image = frames[0]
+            incrementCounter("rawFormatter.pixelBytesRead", image.array.nbytes)
+        else:
+            reader = afwImage.ImageFitsReader(self.fileDescriptor.location.path)
+            image = reader.read(bbox=geom.Box2I() if bbox is None else bbox, origin=origin, dtype=dtype)
+            incrementCounter("rawFormatter.pixelBytesRead", image.array.nbytes)
+
+        if image.array.dtype != dtype:
+            image = afwImage.Image(image.array.astype(dtype), xy0=image.getXY0())
+        return image
+
+    def _attachSharedFrame(self):
+        """Return the published copy of this file's frame, or `None` if
+        there isn't one or shared frames aren't enabled"""
+        if not isSharedFramesEnabled():
+            return None
+        if not hasattr(self, "_sharedFrame"):
+            try:
+                path = self.fileDescriptor.location.path
+                self._sharedFrame = SharedFrame.attach(getSharedFrameName(path), path=path)
+                incrementCounter("rawFormatter.sharedFrameHit")
+            except FileNotFoundError:
+                self._sharedFrame = None
+                incrementCounter("rawFormatter.sharedFrameMiss")
+        return self._sharedFrame
+
+    @property
+    def nFrames(self):
+        """The number of frames in the file; more than one for bursts
+        (`int`)"""
+        return getattr(self.observationInfo, "ext_n_frames", None) or 1
+
+    def readFrames(self, bbox=None):
+        """Return the frames in the file, to be read as they are needed.
+
+        `~lsst.obs.rubinGenericCamera.burst.readRawFrames` does the same
+        for a raw in a butler repository.
+
+        Parameters
+        ----------
+        bbox : `lsst.geom.Box2I`, optional
+            Only read this part of each frame.
+
+        Returns
+        -------
+        frames : `~lsst.obs.rubinGenericCamera.burst.BurstFrames`
+            The frames, with their start times in ``frames.times``.  A file
+            that isn't a burst is returned as a single frame.
+        """
+        return BurstFrames(self.fileDescriptor.location.path, bbox=bbox)
+
 
+def _makeRawFormatterClasses(camera):
+    """Return the raw formatter classes for a generic camera.
 
-class StarTrackerNarrowRawFormatter(RubinGenericCameraRawFormatter):
-    cameraClass = StarTrackerNarrow
-    translatorClass = StarTrackerNarrowTranslator
+    Parameters
+    ----------
+    camera : `~lsst.obs.rubinGenericCamera.cameras.GenericCameraDefinition`
+        The camera.
 
+    Returns
+    -------
+    formatterClass : `type`
+        A subclass of `RubinGenericCameraRawFormatter`, returning float32
+        images.
+    compactFormatterClass : `type`
+        A subclass of ``formatterClass`` returning uint16 images.
+    """
+    name = f"{camera.name}RawFormatter"
+    formatterClass = type(name, (RubinGenericCameraRawFormatter,), dict(
+        __module__=__name__,
+        __qualname__=name,
+        __doc__=f"Raw formatter for the {camera.description}",
+        cameraClass=getattr(_instrument, camera.name),
+        translatorClass=getattr(translator, f"{camera.name}Translator"),
+    ))
+    compactName = f"{camera.name}CompactRawFormatter"
+    compactFormatterClass = type(compactName, (formatterClass,), dict(
+        __module__=__name__,
+        __qualname__=compactName,
+        __doc__=f"Raw formatter for the {camera.description} returning the native uint16 pixels",
+        imageDtype=np.uint16,
+    ))
 
-class StarTrackerWideRawFormatter(RubinGenericCameraRawFormatter):
-    cameraClass = StarTrackerWide
-    translatorClass = StarTrackerWideTranslator
+    return formatterClass, compactFormatterClass
 
 
-class StarTrackerFastRawFormatter(RubinGenericCameraRawFormatter):
-    cameraClass = StarTrackerFast
-    translatorClass = StarTrackerFastTranslator
+for _camera in GENERIC_CAMERAS:
+    globals()[f"{_camera.name}RawFormatter"], globals()[f"{_camera.name}CompactRawFormatter"] = \
+        _makeRawFormatterClasses(_camera)
+del _camera
@@ -0,0 +1,277 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Per-pixel statistics of long sequences of star tracker frames, computed
+one frame (or chunk of frames) at a time."""
+
+__all__ = ("RunningStatistics", "StarTrackerRunningStatsConnections", "StarTrackerRunningStatsConfig",
+           "StarTrackerRunningStatsTask")
+
+import numpy as np
+
+import lsst.afw.image as afwImage
+import lsst.pex.config as pexConfig
+import lsst.pipe.base as pipeBase
+import lsst.pipe.base.connectionTypes as cT
+
+
+class RunningStatistics:
+    """Accumulate the per-pixel mean, variance, minimum and maximum of a
+    sequence of frames without keeping the frames.
+
+    The mean and variance are accumulated in float64 using Welford's
+    algorithm, updating the accumulators in place a frame at a time, so
+    the temporary arrays are the size of one frame however many frames are
+    added at once.  If ``nSigma`` is given, each frame is sigma-clipped
+    against the statistics accumulated so far before being added.
+
+    Parameters
+    ----------
+    shape : `tuple` [`int`, `int`]
+        The shape of the frames.
+    nSigma : `float`, optional
+        Ignore pixels more than this many standard deviations from the
+        running mean; no clipping if `None`.  Pixels whose values have all
+        been the same are never clipped, as their standard deviation is 0.
+    minClipFrames : `int`, optional
+        Don't clip until at least this many frames have been added.
+    """
+
+    def __init__(self, shape, nSigma=None, minClipFrames=10):
+        self.shape = tuple(shape)
+        self.nSigma = nSigma
+        self.minClipFrames = minClipFrames
+        self.nFrame = 0
+        self.count = np.zeros(self.shape, dtype=np.int64)
+        self.mean = np.zeros(self.shape, dtype=np.float64)
+        self.m2 = np.zeros(self.shape, dtype=np.float64)
+        self.min = np.full(self.shape, np.inf)
+        self.max = np.full(self.shape, -np.inf)
+
+    def add(self, frames):
+        """Add a frame, or a chunk of frames, to the statistics.
+
+        Parameters
+        ----------
+        frames : `numpy.ndarray`, (ny, nx) or (nFrame, ny, nx), or sequence
+            The frame(s); a sequence of (ny, nx) frames needn't be stacked.
+        """
+        if isinstance(frames, np.ndarray) and frames.ndim == 2:
+            frames = [frames]
+        for frame in frames:
+            if frame.shape != self.shape:
+                raise ValueError(f"Frame shape {frame.shape} doesn't match {self.shape}")
+            self._addFrame(frame)
+
+    def _addFrame(self, frame):
+        frame = np.array(frame, dtype=np.float64)     # a copy, which we modify
+        good = np.isfinite(frame)
+        if self.nSigma is not None and self.nFrame >= self.minClipFrames:
+            sigma = np.sqrt(self.variance)
+            with np.errstate(invalid="ignore"):
+                # N.b. pixels without a non-zero variance yet are never clipped
+                good &= ~((np.abs(frame - self.mean) > self.nSigma * sigma) & (sigma > 0))
+        bad = ~good
+        frame[bad] = 0.0
+
+        self.count += good
+        delta = frame - self.mean
+        delta[bad] = 0.0
+        self.mean += np.divide(delta, self.count, out=np.zeros_like(delta), where=good)
+        delta *= frame - self.mean
+        self.m2 += delta
+
+        frame[bad] = np.inf
+        np.minimum(self.min, frame, out=self.min)
+        frame[bad] = -np.inf
+        np.maximum(self.max, frame, out=self.max)
+        self.nFrame += 1
+
+    @property
+    def variance(self):
+        """The per-pixel (sample) variance (`numpy.ndarray`)"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    def hotPixels(self, nSigma=5.0):
+        """Return the pixels whose mean is far above that of the others.
+
+        Parameters
+        ----------
+        nSigma : `float`, optional
+            Threshold above the median of the per-pixel means, in units of
+            the (robust) scatter of the per-pixel means.
+
+        Returns
+        -------
+        hot : `numpy.ndarray` of `bool`
+            `True` for hot pixels.
+        """
+        good = np.isfinite(self.mean) & (self.count > 0)
+        median = np.median(self.mean[good])
+        sigma = 1.4826 * np.median(np.abs(self.mean[good] - median))
+        return good & (self.mean > median + nSigma * sigma)
+
+
+class StarTrackerRunningStatsConnections(pipeBase.PipelineTaskConnections,
+                                         dimensions=("instrument", "detector")):
+    exposures = cT.Input(
+        name="postISRCCD",
+        doc="Sequence of exposures to combine.",
+        storageClass="Exposure",
+        dimensions=["instrument", "exposure", "detector"],
+        multiple=True,
+        deferLoad=True,
+    )
+    meanImage = cT.Output(
+        name="starTrackerMean",
+        doc="Per-pixel mean and variance of the exposures, with hot pixels masked.",
+        storageClass="ExposureF",
+        dimensions=["instrument", "detector"],
+    )
+    minImage = cT.Output(
+        name="starTrackerMin",
+        doc="Per-pixel minimum of the exposures.",
+        storageClass="ImageF",
+        dimensions=["instrument", "detector"],
+    )
+    maxImage = cT.Output(
+        name="starTrackerMax",
+        doc="Per-pixel maximum of the exposures.",
+        storageClass="ImageF",
+        dimensions=["instrument", "detector"],
+    )
+
+
+class StarTrackerRunningStatsConfig(pipeBase.PipelineTaskConfig,
+                                    pipelineConnections=StarTrackerRunningStatsConnections):
+    chunkSize = pexConfig.Field(
+        dtype=int,
+        default=4,
+        doc="Number of frames read before they are added to the statistics.",
+    )
+    nSigmaClip = pexConfig.Field(
+        dtype=float,
+        default=None,
+        optional=True,
+        doc="Reject pixels more than this many sigma from the running mean; no clipping if None.",
+    )
+    minClipFrames = pexConfig.Field(
+        dtype=int,
+        default=10,
+        doc="Number of frames to accumulate before starting to clip.",
+    )
+    nSigmaHot = pexConfig.Field(
+        dtype=float,
+        default=5.0,
+        doc="Threshold for hot pixels, in units of the scatter of the per-pixel means.",
+    )
+    hotPixelMaskName = pexConfig.Field(
+        dtype=str,
+        default="BAD",
+        doc="Mask plane in which to set hot pixels.",
+    )
+    noDataMaskName = pexConfig.Field(
+        dtype=str,
+        default="NO_DATA",
+        doc="Mask plane in which to set pixels that no frame contributed to (e.g. all non-finite or "
+        "clipped).",
+    )
+
+
+class StarTrackerRunningStatsTask(pipeBase.PipelineTask):
+    """Compute per-pixel statistics of a long sequence of frames.
+
+    The frames are read and accumulated a chunk at a time, so the memory
+    needed doesn't depend on the number of frames.
+    """
+    ConfigClass = StarTrackerRunningStatsConfig
+    _DefaultName = "starTrackerRunningStats"
+
+    def runQuantum(self, butlerQC, inputRefs, outputRefs):
+        handles = butlerQC.get(inputRefs.exposures)
+        result = self.run(h.get() for h in handles)
+        butlerQC.put(result, outputRefs)
+
+    def run(self, exposures):
+        """Compute per-pixel statistics of a sequence of exposures.
+
+        Parameters
+        ----------
+        exposures : iterable of `lsst.afw.image.Exposure`
+            The exposures; they are only read as needed, so this may be a
+            generator.
+
+        Returns
+        -------
+        result : `lsst.pipe.base.Struct`
+            Result struct with components:
+
+            ``meanImage``
+                The per-pixel mean, with the variance plane set to the
+                per-pixel variance, hot pixels masked, pixels with no data
+                set to NaN and masked, and the detector of the first
+                exposure (`lsst.afw.image.ExposureF`).
+            ``minImage``, ``maxImage``
+                The per-pixel extrema (`lsst.afw.image.ImageF`).
+            ``stats``
+                The accumulated statistics (`RunningStatistics`).
+
+        Raises
+        ------
+        RuntimeError
+            Raised if there are no exposures.
+        """
+        stats = None
+        chunk = []
+        for exposure in exposures:
+            if stats is None:
+                stats = RunningStatistics(exposure.image.array.shape, nSigma=self.config.nSigmaClip,
+                                          minClipFrames=self.config.minClipFrames)
+                bbox = exposure.getBBox()
+                detector = exposure.getDetector()
+            chunk.append(exposure.image.array)
+            if len(chunk) == self.config.chunkSize:
+                stats.add(chunk)
+                chunk.clear()
+        if stats is None:
+            raise RuntimeError("No exposures to combine")
+        if chunk:
+            stats.add(chunk)
+        self.log.info("Combined %d frames", stats.nFrame)
+
+        meanImage = afwImage.ExposureF(bbox)
+        meanImage.image.array[:] = stats.mean
+        meanImage.variance.array[:] = stats.variance
+        hot = stats.hotPixels(self.config.nSigmaHot)
+        meanImage.mask.array[hot] |= meanImage.mask.getPlaneBitMask(self.config.hotPixelMaskName)
+        noData = stats.count == 0
+        meanImage.image.array[noData] = np.nan
+        meanImage.mask.array[noData] |= meanImage.mask.getPlaneBitMask(self.config.noDataMaskName)
+        meanImage.setDetector(detector)
+        self.log.info("Found %d hot pixels", np.sum(hot))
+        if np.any(noData):
+            self.log.warning("No data for %d pixels", np.sum(noData))
+
+        minImage = afwImage.ImageF(stats.min.astype(np.float32), xy0=bbox.getMin())
+        maxImage = afwImage.ImageF(stats.max.astype(np.float32), xy0=bbox.getMin())
+
+        return pipeBase.Struct(meanImage=meanImage, minImage=minImage, maxImage=maxImage, stats=stats)
@@ -0,0 +1,103 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Ingest star tracker raws into a butler repository."""
+
+__all__ = ("main",)
+
+import argparse
+import logging
+
+from lsst.daf.butler import Butler
+from lsst.obs.rubinGenericCamera.ingest import StarTrackerRawIngestTask
+
+
+def build_argparser():
+    """Construct an argument parser for the ``ingestStarTrackerRaws.py``
+    script.
+
+    Returns
+    -------
+    argparser : `argparse.ArgumentParser`
+        The argument parser that defines the ``ingestStarTrackerRaws.py``
+        command-line interface.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("repo", help="Butler repository to ingest into")
+    parser.add_argument("locations", nargs="+", help="Files or directories to ingest")
+    parser.add_argument("-j", "--processes", type=int, default=1,
+                        help="Number of processes used to read headers")
+    parser.add_argument("--transfer", default="auto",
+                        help="Transfer mode to use when ingesting files")
+    parser.add_argument("--output-run", default=None,
+                        help="RUN collection to write to (default: the instrument's raw collection)")
+    parser.add_argument("--no-header-fallback", action="store_true",
+                        help="Reject files whose names aren't in the standard form, rather than "
+                        "reading their headers")
+    parser.add_argument("--header-index", default=None,
+                        help="SQLite file in which to save headers, so unchanged files needn't be "
+                        "read when they are ingested again")
+    parser.add_argument("--follow", action="store_true",
+                        help="Follow the given directories, ingesting new files as they appear")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="When following, give up if no new files appear for this many seconds")
+    parser.add_argument("--instruments", nargs="+", default=None,
+                        help="When following, the instruments whose files are ingested "
+                        "(default: StarTrackerFast)")
+    parser.add_argument("--verify-checksums", action="store_true",
+                        help="Verify the files' checksums, and don't ingest files that fail")
+    parser.add_argument("--quarantine-dir", default=None,
+                        help="Directory to which files that fail checksum verification are moved")
+    parser.add_argument("--previews", action="store_true",
+                        help="Write a binned PNG preview of each file")
+    parser.add_argument("--preview-dir", default=None,
+                        help="Directory for the previews (default: next to the raws)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Be chattier")
+
+    return parser
+
+
+def main():
+    args = build_argparser().parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+
+    butler = Butler(args.repo, writeable=True)
+
+    config = StarTrackerRawIngestTask.ConfigClass()
+    config.transfer = args.transfer
+    config.processes = args.processes
+    config.readUnrecognisedHeaders = not args.no_header_fallback
+    config.headerIndex = args.header_index
+    config.doVerifyChecksums = args.verify_checksums
+    config.quarantineDir = args.quarantine_dir
+    config.doWritePreviews = args.previews
+    config.previewDir = args.preview_dir
+    if args.instruments:
+        config.followInstruments = args.instruments
+
+    task = StarTrackerRawIngestTask(config=config, butler=butler)
+    if args.follow:
+        nIngested = task.follow(args.locations, run=args.output_run, timeout=args.timeout)
+    else:
+        nIngested = len(task.run(args.locations, run=args.output_run))
+    print(f"Ingested {nIngested} datasets")
+    for path, problems in sorted(task.corruptFiles.items()):
+        print(f"Corrupt: {path}: {'; '.join(problems)}")
@@ -0,0 +1,70 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Convert a directory of gzipped star tracker raws to tile-compressed
+FITS."""
+
+__all__ = ("main",)
+
+import argparse
+import logging
+import os
+import sys
+
+from lsst.obs.rubinGenericCamera.transcode import COMPRESSION_TYPES, findRawFiles, transcodeFiles
+
+
+def build_argparser():
+    """Construct an argument parser for the ``transcodeStarTrackerRaws.py``
+    script.
+
+    Returns
+    -------
+    argparser : `argparse.ArgumentParser`
+        The argument parser that defines the ``transcodeStarTrackerRaws.py``
+        command-line interface.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("inputDir", help="Directory to search for raws")
+    parser.add_argument("outputDir", help="Directory in which to write the tile-compressed raws")
+    parser.add_argument("-j", "--processes", type=int, default=1, help="Number of processes to use")
+    parser.add_argument("--compression", choices=COMPRESSION_TYPES, default="RICE_1",
+                        help="Tile compression algorithm")
+    parser.add_argument("--manifest", default=None,
+                        help="JSON manifest to write (default: OUTPUTDIR/manifest.json)")
+    parser.add_argument("--clobber", action="store_true", help="Overwrite existing output files")
+
+    return parser
+
+
+def main():
+    args = build_argparser().parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    files = findRawFiles(args.inputDir)
+    manifest = args.manifest or os.path.join(args.outputDir, "manifest.json")
+    os.makedirs(args.outputDir, exist_ok=True)
+    entries = transcodeFiles(files, args.inputDir, args.outputDir, compressionType=args.compression,
+                             processes=args.processes, clobber=args.clobber, manifest=manifest)
+
+    nFailed = sum(entry["status"] == "failed" for entry in entries)
+    print(f"Transcoded {len(entries) - nFailed} of {len(entries)} files; manifest written to {manifest}")
+    sys.exit(1 if nFailed else 0)
@@ -0,0 +1,300 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Hand frames to other local processes through named shared memory.
+
+One process (e.g. the ingest follower) calls `SharedFrame.publish` to read
+a raw once and copy its first frame, translated metadata and detector ID
+into a shared memory block named after the file; other processes on the
+same machine then `SharedFrame.attach` to the block and use the pixels
+without copying them.  Each process maps the pixels copy-on-write, so
+pages are only duplicated if a process modifies them, and the changes are
+never seen by the other processes.  If the environment variable
+``RUBIN_GENERIC_CAMERA_SHARED_FRAMES`` is set (to anything but ``0``),
+`~lsst.obs.rubinGenericCamera.rawFormatter.RubinGenericCameraRawFormatter`
+uses a published frame in preference to reading the file.
+
+The block holds an 8-byte magic string, the length of a JSON description
+of the frame (as a little-endian uint64), the description itself, and then
+(aligned to 64 bytes) the pixels.
+"""
+
+__all__ = ("SHARED_FRAMES_ENV", "getSharedFrameName", "isSharedFramesEnabled", "SharedFrame")
+
+import json
+import mmap
+import os
+import struct
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+from astro_metadata_translator import ObservationInfo
+
+import lsst.afw.image as afwImage
+import lsst.geom as geom
+from lsst.daf.base import PropertyList
+from .burst import BurstFrames
+from .fitsUtils import readRawHeader
+from .instrumentation import incrementCounter, timed
+
+SHARED_FRAMES_ENV = "RUBIN_GENERIC_CAMERA_SHARED_FRAMES"
+"""Environment variable that makes the raw formatter use published frames"""
+
+_MAGIC = b"RGCFRAME"
+_PREFIX = struct.Struct("<8sQ")
+_ALIGNMENT = 64
+_SHM_DIR = "/dev/shm"
+
+
+def getSharedFrameName(path):
+    """Return the name of the shared memory block holding a raw's frame.
+
+    Parameters
+    ----------
+    path : `str`
+        The raw (e.g. ``.../GC101_O_20221208_000211.fits.gz``).
+
+    Returns
+    -------
+    name : `str`
+        The name of the block (e.g. ``rgc_GC101_O_20221208_000211``); short
+        enough for all POSIX shared memory implementations.
+    """
+    return "rgc_" + os.path.basename(path).split(".fit")[0]
+
+
+def isSharedFramesEnabled():
+    """Return `True` if the raw formatter should use published frames"""
+    return os.environ.get(SHARED_FRAMES_ENV, "0") not in ("", "0")
+
+
+def _mapPrivately(shm):
+    """Return a private, copy-on-write mapping of a shared memory block.
+
+    A private mapping, rather than a view of ``shm.buf``, means that writes
+    don't reach the other processes and that the block can be closed while
+    the pixels are still in use.  POSIX shared memory blocks are files in
+    ``/dev/shm`` on Linux; where they aren't, the block is copied.
+    """
+    try:
+        fd = os.open(os.path.join(_SHM_DIR, shm.name.lstrip("/")), os.O_RDONLY)
+    except FileNotFoundError:
+        return bytearray(shm.buf)
+    try:
+        return mmap.mmap(fd, shm.size, access=mmap.ACCESS_COPY)
+    finally:
+        os.close(fd)          # the mapping doesn't need the descriptor
+
+
+class SharedFrame:
+    """A raw frame, with its metadata, in a named shared memory block.
+
+    Use `publish` or `attach` rather than constructing one directly.
+
+    Parameters
+    ----------
+    shm : `multiprocessing.shared_memory.SharedMemory`
+        The block.
+    owner : `bool`
+        Was the block created by this process?
+
+    Notes
+    -----
+    The pixels are mapped copy-on-write, so modifying them (or an image
+    made from them) only affects this process.  The block persists until
+    the publisher calls `unlink`; the pixels stay mapped until ``array``
+    and all the images made from it have been deleted, even if `close`
+    has been called.
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self.owner = owner
+
+        magic, descriptionLength = _PREFIX.unpack_from(shm.buf, 0)
+        if magic != _MAGIC:
+            raise RuntimeError(f"Shared memory block {shm.name} doesn't hold a frame")
+        description = json.loads(bytes(shm.buf[_PREFIX.size:_PREFIX.size + descriptionLength]))
+
+        self.name = shm.name
+        self.path = description["path"]
+        """The absolute path of the raw that the frame was read from
+        (`str`)"""
+        self.detectorId = description["detector"]
+        """The ID of the detector (`int`)"""
+        self._header = description["header"]
+        self._obsInfo = description["obsInfo"]
+        pixels = _mapPrivately(shm)
+        self.array = np.ndarray(description["shape"], dtype=np.dtype(description["dtype"]),
+                                buffer=pixels, offset=description["offset"])
+        """The pixels (`numpy.ndarray`; changes are private to this
+        process)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @classmethod
+    @timed("sharedFrame.publish")
+    def publish(cls, path, name=None):
+        """Read the first frame of a raw into a new shared memory block.
+
+        Parameters
+        ----------
+        path : `str`
+            The raw.
+        name : `str`, optional
+            The name of the block; if `None` use `getSharedFrameName`.
+
+        Returns
+        -------
+        frame : `SharedFrame`
+            The published frame, owned by this process.
+
+        Raises
+        ------
+        FileExistsError
+            Raised if the frame has already been published.
+        """
+        header = {key: value for key, value in readRawHeader(path).items()
+                  if key not in ("COMMENT", "HISTORY", "")}
+        obsInfo = ObservationInfo(header, filename=path)
+        with BurstFrames(path) as frames:
+            array = frames[0].array
+
+        description = dict(path=os.path.abspath(path), detector=obsInfo.detector_num, header=header,
+                           obsInfo=obsInfo.to_json(), shape=list(array.shape), dtype=array.dtype.str)
+        # The offset of the pixels depends on the length of the description,
+        # which includes the offset; allow for it to take 20 digits
+        description["offset"] = 0
+        descriptionLength = len(json.dumps(description, default=lambda v: None)) + 20
+        offset = -(-(_PREFIX.size + descriptionLength) // _ALIGNMENT) * _ALIGNMENT
+        description["offset"] = offset
+        encoded = json.dumps(description, default=lambda v: None).encode()
+
+        shm = shared_memory.SharedMemory(name=name or getSharedFrameName(path), create=True,
+                                         size=offset + array.nbytes)
+        try:
+            _PREFIX.pack_into(shm.buf, 0, _MAGIC, len(encoded))
+            shm.buf[_PREFIX.size:_PREFIX.size + len(encoded)] = encoded
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=offset)[...] = array
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+
+        incrementCounter("sharedFrame.bytesPublished", shm.size)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name, path=None):
+        """Attach to a published frame.
+
+        Parameters
+        ----------
+        name : `str`
+            The name of the block (see `getSharedFrameName`).
+        path : `str`, optional
+            The raw that the frame must have been read from; needed as
+            files in different directories share a name.
+
+        Returns
+        -------
+        frame : `SharedFrame`
+            The frame.
+
+        Raises
+        ------
+        FileNotFoundError
+            Raised if no frame of that name has been published, or it was
+            read from a file other than ``path``.
+        """
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+            # Otherwise the resource tracker unlinks the block when this
+            # process exits, taking it away from the other consumers
+            resource_tracker.unregister(shm._name, "shared_memory")
+
+        frame = cls(shm, owner=False)
+        if path is not None and frame.path != os.path.abspath(path):
+            frame.close()
+            raise FileNotFoundError(f"Shared memory block {name} holds {frame.path}, not {path}")
+
+        return frame
+
+    @property
+    def metadata(self):
+        """The merged primary and extension headers
+        (`lsst.daf.base.PropertyList`)"""
+        metadata = PropertyList()
+        for key, value in self._header.items():
+            if value is not None:
+                metadata.set(key, value)
+        return metadata
+
+    @property
+    def observationInfo(self):
+        """The translated metadata
+        (`astro_metadata_translator.ObservationInfo`)"""
+        return ObservationInfo.from_json(self._obsInfo)
+
+    @property
+    def detector(self):
+        """The detector (`lsst.afw.cameraGeom.Detector`), from the
+        instrument's cached camera"""
+        from . import _instrument
+
+        instrumentClass = getattr(_instrument, self.observationInfo.instrument)
+        return instrumentClass.getCamera()[self.detectorId]
+
+    def makeImage(self, bbox=None):
+        """Return the frame, or part of it, as an Image sharing its pixels.
+
+        Parameters
+        ----------
+        bbox : `lsst.geom.Box2I`, optional
+            The part of the frame wanted.
+
+        Returns
+        -------
+        image : `lsst.afw.image.Image`
+            The image; changes to its pixels are private to this process,
+            but are seen by ``array`` and the other images made from it.
+        """
+        image = afwImage.Image(self.array, deep=False, xy0=geom.Point2I(0, 0))
+        incrementCounter("sharedFrame.pixelBytesShared", self.array.nbytes)
+        return image if bbox is None else image.subset(bbox)
+
+    def close(self):
+        """Detach from the block; the pixels stay mapped until ``array``
+        and any images made from it are deleted"""
+        self.array = None
+        self._shm.close()
+
+    def unlink(self):
+        """Remove the block, so that no new processes can attach to it"""
+        self._shm.unlink()
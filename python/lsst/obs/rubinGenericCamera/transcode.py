@@ -0,0 +1,217 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Convert whole-file gzipped star tracker raws to tile-compressed FITS."""
+
+__all__ = ("COMPRESSION_TYPES", "transcodeFile", "transcodeFiles", "findRawFiles")
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import astropy.io.fits as pyfits
+
+from .instrumentation import initializeWorker
+from .translator import parseStarTrackerFilename
+
+COMPRESSION_TYPES = ("RICE_1", "GZIP_1", "GZIP_2")
+"""Lossless (for integer images) tile compression algorithms"""
+
+_log = logging.getLogger(__name__)
+
+
+def _sha256(path):
+    """Return the SHA256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fd:
+        for block in iter(lambda: fd.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _outputName(inPath):
+    """Return the name of the tile-compressed version of a file"""
+    name = os.path.basename(inPath)
+    for suffix in (".gz", ".fz"):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name + ".fz"
+
+
+def findRawFiles(directory):
+    """Return the star tracker raws in and below a directory.
+
+    Parameters
+    ----------
+    directory : `str`
+        The directory to search.
+
+    Returns
+    -------
+    files : `list` [`str`]
+        The files whose names are of the standard form (e.g.
+        ``GC101_O_20221208_000211.fits.gz``), sorted.
+    """
+    files = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        files += [os.path.join(dirpath, f) for f in filenames if parseStarTrackerFilename(f) is not None]
+
+    return sorted(files)
+
+
+def transcodeFile(inPath, outPath, compressionType="RICE_1", clobber=False):
+    """Rewrite a raw file with its images tile compressed.
+
+    All the header cards are preserved, the CHECKSUM and DATASUM cards are
+    recomputed, and the pixels of the new file are compared with the
+    original's before it is moved into place.
+
+    Parameters
+    ----------
+    inPath : `str`
+        The file to transcode.
+    outPath : `str`
+        The name of the new file.
+    compressionType : `str`, optional
+        The compression algorithm; one of `COMPRESSION_TYPES`.
+    clobber : `bool`, optional
+        Overwrite ``outPath`` if it exists?
+
+    Returns
+    -------
+    entry : `dict`
+        The manifest entry for the file: the input and output names, sizes
+        and SHA256s, the compression type and a status (``"ok"``,
+        ``"exists"`` or ``"failed"``, with a ``message`` if it failed).
+
+    Raises
+    ------
+    ValueError
+        Raised if the compression type isn't lossless.
+    """
+    if compressionType not in COMPRESSION_TYPES:
+        raise ValueError(f"Unknown compression type {compressionType}; "
+                         f"please choose one of {', '.join(COMPRESSION_TYPES)}")
+
+    entry = dict(input=inPath, output=outPath, compression=compressionType,
+                 inputSize=os.path.getsize(inPath), inputSha256=_sha256(inPath))
+
+    if os.path.exists(outPath) and not clobber:
+        entry.update(status="exists", outputSize=os.path.getsize(outPath), outputSha256=_sha256(outPath))
+        return entry
+
+    outDir = os.path.dirname(os.path.abspath(outPath))
+    os.makedirs(outDir, exist_ok=True)
+    fd, tmpPath = tempfile.mkstemp(dir=outDir, suffix=".fits.fz")
+    os.close(fd)
+    try:
+        with pyfits.open(inPath) as inHdul:
+            outHdul = pyfits.HDUList()
+            for hdu in inHdul:
+                if isinstance(hdu, pyfits.PrimaryHDU):
+                    outHdul.append(pyfits.PrimaryHDU(data=hdu.data, header=hdu.header))
+                elif isinstance(hdu, pyfits.ImageHDU):
+                    outHdul.append(pyfits.CompImageHDU(data=hdu.data, header=hdu.header,
+                                                       compression_type=compressionType))
+                else:
+                    outHdul.append(hdu.copy())
+            outHdul.writeto(tmpPath, overwrite=True, checksum=True)
+
+            with pyfits.open(tmpPath) as newHdul:
+                if len(newHdul) != len(inHdul):
+                    raise RuntimeError(f"Wrote {len(newHdul)} HDUs, not {len(inHdul)}")
+                for i, (old, new) in enumerate(zip(inHdul, newHdul)):
+                    if old.data is not None and not np.array_equal(old.data, new.data):
+                        raise RuntimeError(f"Pixels differ in HDU {i}")
+                    missing = set(old.header) - set(new.header)
+                    if missing:
+                        raise RuntimeError(f"Cards {sorted(missing)} are missing from HDU {i}")
+
+        os.replace(tmpPath, outPath)
+    except Exception as e:
+        entry.update(status="failed", message=str(e))
+        return entry
+    finally:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+
+    entry.update(status="ok", outputSize=os.path.getsize(outPath), outputSha256=_sha256(outPath))
+    return entry
+
+
+def _transcodeFile(args):
+    """Call transcodeFile with a tuple of arguments"""
+    return transcodeFile(*args)
+
+
+def transcodeFiles(files, inputDir, outputDir, compressionType="RICE_1", processes=1,
+                   clobber=False, manifest=None):
+    """Transcode many raw files in parallel.
+
+    Parameters
+    ----------
+    files : `list` [`str`]
+        The files to transcode; they must be in or below ``inputDir``.
+    inputDir : `str`
+        The root directory of the input files.
+    outputDir : `str`
+        The root directory of the output files; the directory structure
+        below ``inputDir`` is recreated here.
+    compressionType : `str`, optional
+        The compression algorithm; one of `COMPRESSION_TYPES`.
+    processes : `int`, optional
+        The number of processes to use.
+    clobber : `bool`, optional
+        Overwrite existing output files?
+    manifest : `str`, optional
+        Name of a JSON file to which to write the manifest.
+
+    Returns
+    -------
+    entries : `list` [`dict`]
+        The manifest entries for all the files (see `transcodeFile`), in
+        the same order as ``files``.
+    """
+    tasks = []
+    for inPath in files:
+        relDir = os.path.relpath(os.path.dirname(inPath), inputDir)
+        tasks.append((inPath, os.path.join(outputDir, relDir, _outputName(inPath)), compressionType, clobber))
+
+    if processes > 1:
+        with ProcessPoolExecutor(processes, initializer=initializeWorker) as executor:
+            chunksize = max(1, len(tasks) // (4 * processes))
+            entries = list(executor.map(_transcodeFile, tasks, chunksize=chunksize))
+    else:
+        entries = [_transcodeFile(t) for t in tasks]
+
+    for entry in entries:
+        if entry["status"] == "failed":
+            _log.warning("Failed to transcode %s: %s", entry["input"], entry["message"])
+
+    if manifest is not None:
+        with open(manifest, "w") as fd:
+            json.dump(entries, fd, indent=2)
+
+    return entries
@@ -1,15 +1,29 @@
+import logging
 import os
+import re
 
 import numpy as np
 import astropy.units as u
+from astropy.table import QTable
 from astropy.time import Time
 
-from astro_metadata_translator import cache_translation
+from astro_metadata_translator import cache_translation, MetadataTranslator, PropertyDefinition
+from astro_metadata_translator.file_helpers import read_basic_metadata_from_file
 from lsst.obs.lsst.translators.lsst import LsstBaseTranslator
 
-from lsst.utils import getPackageDir
+from .cameras import GENERIC_CAMERAS
+from .corrections import getCorrectionsIndex
+from .instrumentation import timed
 
-__all__ = ["StarTrackerNarrowTranslator", "StarTrackerWideTranslator", "StarTrackerFastTranslator",]
+__all__ = [f"{camera.name}Translator" for camera in GENERIC_CAMERAS] + [
+    "parseStarTrackerFilename", "findStarTrackerTranslator", "findStarTrackerTranslatorForHeader",]
+
+STARTRACKER_FILENAME_RE = re.compile(r"^(?P<camCode>[A-Z]{2})(?P<camId>\d{3})_(?P<controller>[A-Z])_"
+                                     r"(?P<dayObs>\d{8})_(?P<seqNum>\d{6})\.fits(\.gz|\.fz)?$")
+"""Filenames written by the generic cameras, e.g.
+``GC101_O_20221208_000211.fits.gz``"""
+
+_log = logging.getLogger(__name__)
 
 
 class RubinGenericCameraTranslator(LsstBaseTranslator):
@@ -21,14 +35,21 @@ class RubinGenericCameraTranslator(LsstBaseTranslator):
     supported_instrument = None         # you must specialise this class
     """Supports the LSST Generic Camera instrument."""
 
-    default_search_path = os.path.join(getPackageDir("obs_rubinGenericCamera"), "corrections")
-    """Default search path to use to locate header correction files."""
+    default_search_path = None
+    """Default search path to use to locate header correction files; `None`
+    because corrections are looked up in the package's in-memory index (see
+    `lsst.obs.rubinGenericCamera.corrections`) by `fix_header`, rather than
+    by probing the filesystem for every header."""
 
-    default_resource_root = os.path.join(getPackageDir("obs_rubinGenericCamera"), "corrections")
-    """Default resource path root to use to locate header correction files."""
+    default_resource_root = None
+    """Default resource path root to use to locate header correction files
+    (see ``default_search_path``)."""
 
     DETECTOR_MAX = 1
 
+    _MAX_SEQNUM = 99_999
+    """The largest sequence number that `compute_exposure_id` accepts"""
+
     _const_map = {"detector_num": 0,
                   "boresight_rotation_coord": "sky",
                   "physical_filter": "empty",
@@ -52,6 +73,7 @@ class RubinGenericCameraTranslator(LsstBaseTranslator):
     """One-to-one mappings"""
 
     extensions = dict(
+        n_frames=PropertyDefinition("Number of frames in the file (more than one for bursts)", "int", int),
     )
 
     @classmethod
@@ -75,16 +97,60 @@ class RubinGenericCameraTranslator(LsstBaseTranslator):
 
         return False                    # you must specialise this class
 
+    @classmethod
+    def fix_header(cls, header, instrument, obsid, filename=None):
+        """Apply any corrections for this observation from the package's
+        corrections index.
+
+        Parameters
+        ----------
+        header : `dict`
+            The header to correct; updated in place.
+        instrument : `str`
+            The instrument name.
+        obsid : `str`
+            The observation ID.
+        filename : `str`, optional
+            The file the header came from.
+
+        Returns
+        -------
+        modified : `bool`
+            `True` if the header was changed.
+        """
+        modified = super().fix_header(header, instrument, obsid, filename=filename)
+
+        corrections = getCorrectionsIndex().get(obsid)
+        if corrections:
+            _log.debug("Applying %d header corrections to %s", len(corrections), obsid)
+            header.update(corrections)
+            modified = True
+
+        return modified
+
     @cache_translation
+    @timed("translator.to_datetime_begin")
     def to_datetime_begin(self):
         self._used_these_cards("MJD-BEG")
         return Time(self._header["MJD-BEG"], scale="tai", format="mjd")
 
+    @cache_translation
+    def to_ext_n_frames(self):
+        # Bursts are either a cube, or a sequence of HDUs counted by NFRAMES
+        if self.is_key_ok("NFRAMES"):
+            self._used_these_cards("NFRAMES")
+            return int(self._header["NFRAMES"])
+        if self._header.get("NAXIS") == 3:
+            self._used_these_cards("NAXIS3")
+            return int(self._header["NAXIS3"])
+        return 1
+
     @cache_translation
     def to_instrument(self):
         return None                     # you must specialise this class
 
     @cache_translation
+    @timed("translator.to_exposure_time")
     def to_exposure_time(self):
         # Docstring will be inherited. Property defined in properties.py
         # Some data is missing a value for EXPTIME.
@@ -100,6 +166,7 @@ class RubinGenericCameraTranslator(LsstBaseTranslator):
         return -1.0 * u.s
 
     @cache_translation
+    @timed("translator.to_dark_time")
     def to_dark_time(self):             # N.b. defining this suppresses a warning re setting from exptime
         if "DARKTIME" in self._header:
             darkTime = self._header["DARKTIME"]
@@ -107,50 +174,148 @@ class RubinGenericCameraTranslator(LsstBaseTranslator):
             return (darkTime, dict(unit=u.s))
         return self.to_exposure_time()
 
-
-class StarTrackerTranslator(RubinGenericCameraTranslator):
-    name = None                         # must be specialised
-    """Name of this translation class"""
-
-    supported_instrument = None         # must be specialised
-    """Supports the Rubin Star Tracker instrument."""
-
     @classmethod
-    def _is_startracker(cls, header, filename=None):
-        """Indicate whether the supplied header comes from a starTracker
+    @timed("translator.translate_headers")
+    def translate_headers(cls, headers, filenames=None):
+        """Translate many headers at once into a table.
+
+        Only the most commonly-needed properties are provided, but they
+        are computed with array operations over all the headers rather
+        than by translating each header in turn.  Corrections from the
+        package's corrections index are applied first, as by `fix_header`.
 
         Parameters
         ----------
-        header : `dict`-like
-            Header to convert to standardized form.
-        filename : `str`, optional
-            Name of file being translated.
+        headers : `list` of `dict`-like
+            The headers to translate.  Headers without a valid DAYOBS or
+            SEQNUM are handed to their translators one at a time.
+        filenames : `list` of `str`, optional
+            The names of the files that the headers came from.
 
         Returns
         -------
-        (isStarTracker, camId) : (`True`, `int`) or (`False`, `None`)
-            isStarTracker is `True` iff header comes from a starTracker
-            camId is the cameraID, e.g. 101 for the wide-field startracker,
-            102 for the narrow-field startracker
+        table : `astropy.table.QTable`
+            A row per header with columns ``observation_id``,
+            ``instrument``, ``exposure_id``, ``day_obs``, ``seq_num``,
+            ``group_id``, ``observation_type``, ``datetime_begin`` (a
+            `~astropy.time.Time`), and ``exposure_time`` and ``dark_time``
+            (`~astropy.units.Quantity`), plus ``filename`` if
+            ``filenames`` is provided.  The instrument is `None` for
+            headers that no translator recognises, and the exposure ID,
+            day_obs and seq_num are -1 if they can't be derived.
         """
-        if "INSTRUME" not in header or header["INSTRUME"] != "StarTracker" or "OBSID" not in header:
-            return (False, None)
-
-        camId = int(header["OBSID"][2:5])
-
-        return (True, camId)
+        correctionsIndex = getCorrectionsIndex()
+        corrected = []
+        for h in headers:
+            corrections = correctionsIndex.get(h.get("OBSID"))
+            corrected.append({**h, **corrections} if corrections else h)
+        headers = corrected
+
+        def column(key, default, dtype):
+            return np.array([h.get(key, default) for h in headers], dtype=dtype)
+
+        def floatColumn(key):
+            values = []
+            for h in headers:
+                try:
+                    values.append(float(h[key]))
+                except (KeyError, TypeError, ValueError):  # missing or undefined
+                    values.append(np.nan)
+            return np.array(values, dtype=float)
+
+        def intColumn(key):
+            values = []
+            for h in headers:
+                try:
+                    values.append(int(h[key]))
+                except (KeyError, TypeError, ValueError):  # missing or undefined
+                    values.append(-1)
+            return np.array(values, dtype=np.int64)
+
+        obsId = column("OBSID", "", str)
+        controller = column("CONTRLLR", "O", str)
+        dayObs = intColumn("DAYOBS")
+        seqNum = intColumn("SEQNUM")
+        #
+        # Lookups that aren't vectorised are done once for each distinct
+        # value rather than once per header
+        #
+        translatorClasses = {}
+        translators = []
+        for h, oid in zip(headers, obsId):
+            key = (h.get("INSTRUME"), oid[:5])
+            if key not in translatorClasses:
+                translatorClass = findStarTrackerTranslatorForHeader(h)
+                try:
+                    if translatorClass is None:
+                        translatorClass = MetadataTranslator.determine_translator(h)
+                    translatorClasses[key] = translatorClass
+                except ValueError:
+                    translatorClasses[key] = None
+            translators.append(translatorClasses[key])
+        instrument = [None if t is None else t.supported_instrument for t in translators]
+
+        exposureIdBase = {}
+        for key in set(zip(dayObs.tolist(), controller.tolist())):
+            exposureIdBase[key] = -1
+            if key[0] > 0:              # i.e. DAYOBS is present
+                try:
+                    exposureIdBase[key] = cls.compute_exposure_id(key[0], 0, controller=key[1])
+                except ValueError:
+                    pass
+        exposureId = np.array([exposureIdBase[key] for key in zip(dayObs.tolist(), controller.tolist())],
+                              dtype=np.int64)
+        #
+        # Headers that the arithmetic can't handle are translated one by one
+        #
+        isScalar = (exposureId < 0) | (seqNum < 0) | (seqNum > cls._MAX_SEQNUM)
+        exposureId += seqNum
+        for i in np.flatnonzero(isScalar):
+            exposureId[i] = -1
+            if translators[i] is None:
+                continue
+            try:
+                translator = translators[i](headers[i], filename=None if filenames is None else filenames[i])
+                exposureId[i] = translator.to_exposure_id()
+                dayObs[i] = translator.to_observing_day()
+                seqNum[i] = translator.to_observation_counter()
+            except (KeyError, TypeError, ValueError) as e:
+                _log.warning("%s: Unable to derive exposure ID (%s). Setting to -1", obsId[i], e)
+
+        exposureTime = floatColumn("EXPTIME")
+        exposureTime[~np.isfinite(exposureTime)] = -1.0
+        if np.any(exposureTime < 0):
+            _log.warning("%d headers have insufficient information to derive exposure time. "
+                         "Setting to -1.0s", np.sum(exposureTime < 0))
+        darkTime = floatColumn("DARKTIME")
+        darkTime = np.where(np.isfinite(darkTime), darkTime, exposureTime)
+
+        table = QTable()
+        table["observation_id"] = obsId
+        table["instrument"] = np.array(instrument, dtype=object)
+        table["exposure_id"] = exposureId
+        table["day_obs"] = dayObs
+        table["seq_num"] = seqNum
+        table["group_id"] = column("GROUPID", "", str)
+        table["observation_type"] = column("IMGTYPE", "", str)
+        table["datetime_begin"] = Time(floatColumn("MJD-BEG"), scale="tai", format="mjd")
+        table["exposure_time"] = exposureTime * u.s
+        table["dark_time"] = darkTime * u.s
+        if filenames is not None:
+            table["filename"] = np.array([str(f) for f in filenames], dtype=str)
+
+        return table
 
 
-class StarTrackerNarrowTranslator(StarTrackerTranslator):
-    name = "StarTrackerNarrow"
+class StarTrackerTranslator(RubinGenericCameraTranslator):
+    name = None                         # must be specialised
     """Name of this translation class"""
 
-    supported_instrument = "StarTrackerNarrow"
-    """Supports the Rubin Star Tracker narrow-field instrument."""
+    supported_instrument = None         # must be specialised
+    """Supports the Rubin Star Tracker instrument."""
 
-    _const_map = {"instrument": "StarTrackerNarrow",
-                  "detector_serial": "00:0f:31:03:ae:60",  # MAC address
-                  }
+    cameraId = None                     # must be specialised
+    """The camera ID encoded in OBSID and the filename, e.g. 101"""
 
     @classmethod
     def can_translate(cls, header, filename=None):
@@ -170,27 +335,11 @@ class StarTrackerNarrowTranslator(StarTrackerTranslator):
             `True` if the header is recognized by this class. `False`
             otherwise.
         """
-
-        isStarTracker, camId = cls._is_startracker(header, filename=None)
-
-        return isStarTracker and camId == 102
-
-
-class StarTrackerWideTranslator(StarTrackerTranslator):
-    name = "StarTrackerWide"
-    """Name of this translation class"""
-
-    supported_instrument = "StarTrackerWide"
-    """Supports the Rubin Star Tracker wide-field instrument."""
-
-    _const_map = {"instrument": "StarTrackerWide",
-                  "detector_serial": "00:0f:31:03:60:c2",  # MAC address
-                  }
+        return findStarTrackerTranslatorForHeader(header) is cls
 
     @classmethod
-    def can_translate(cls, header, filename=None):
-        """Indicate whether this translation class can translate the
-        supplied header.
+    def _is_startracker(cls, header, filename=None):
+        """Indicate whether the supplied header comes from a starTracker
 
         Parameters
         ----------
@@ -201,44 +350,138 @@ class StarTrackerWideTranslator(StarTrackerTranslator):
 
         Returns
         -------
-        can : `bool`
-            `True` if the header is recognized by this class. `False`
-            otherwise.
+        (isStarTracker, camId) : (`True`, `int`) or (`False`, `None`)
+            isStarTracker is `True` iff header comes from a starTracker
+            camId is the cameraID, e.g. 101 for the wide-field startracker,
+            102 for the narrow-field startracker
         """
-        isStarTracker, camId = cls._is_startracker(header, filename=None)
-
-        return isStarTracker and camId == 101
-
-
-class StarTrackerFastTranslator(StarTrackerTranslator):
-    name = "StarTrackerFast"
-    """Name of this translation class"""
-
-    supported_instrument = "starTrackerFast"
-    """Supports the STARTRACKERFAST dome-seeing instrument."""
-
-    _const_map = {"instrument": "StarTrackerFast",
-                  "detector_serial": "00:0F:31:03:3F:BA",  # MAC address
-                  }
+        if "INSTRUME" not in header or header["INSTRUME"] != "StarTracker" or "OBSID" not in header:
+            return (False, None)
 
-    @classmethod
-    def can_translate(cls, header, filename=None):
-        """Indicate whether this translation class can translate the
-        supplied header.
+        try:
+            camId = int(header["OBSID"][2:5])
+        except ValueError:
+            return (False, None)
 
-        Parameters
-        ----------
-        header : `dict`-like
-            Header to convert to standardized form.
-        filename : `str`, optional
-            Name of file being translated.
+        return (True, camId)
 
-        Returns
-        -------
-        can : `bool`
-            `True` if the header is recognized by this class. `False`
-            otherwise.
-        """
-        isStarTracker, camId = cls._is_startracker(header, filename=None)
 
-        return isStarTracker and camId == 103
+def _makeTranslatorClass(camera):
+    """Return the translator class for a generic camera.
+
+    Parameters
+    ----------
+    camera : `~lsst.obs.rubinGenericCamera.cameras.GenericCameraDefinition`
+        The camera.
+
+    Returns
+    -------
+    translatorClass : `type`
+        A subclass of `StarTrackerTranslator`, registered with
+        `~astro_metadata_translator.MetadataTranslator`.
+    """
+    name = f"{camera.name}Translator"
+    return type(name, (StarTrackerTranslator,), dict(
+        __module__=__name__,
+        __qualname__=name,
+        __doc__=f"Metadata translator for the {camera.description}",
+        name=camera.name,
+        cameraId=camera.cameraId,
+        supported_instrument=camera.name,
+        _const_map={"instrument": camera.name,
+                    "detector_serial": camera.serial,
+                    },
+    ))
+
+
+_STARTRACKER_TRANSLATORS = {}
+"""The translator for each generic camera, indexed by camera ID"""
+
+for _camera in GENERIC_CAMERAS:
+    _STARTRACKER_TRANSLATORS[_camera.cameraId] = globals()[f"{_camera.name}Translator"] = \
+        _makeTranslatorClass(_camera)
+del _camera
+
+
+def parseStarTrackerFilename(filename):
+    """Parse the name of a file written by a generic camera
+
+    Parameters
+    ----------
+    filename : `str`
+        Name of the file; any directory components are ignored.
+
+    Returns
+    -------
+    parts : `dict` or `None`
+        The camera code (e.g. ``"GC"``), camera ID (e.g. 101), controller,
+        day_obs and seqnum encoded in the filename, or `None` if the name
+        isn't in the standard form.
+    """
+    mat = STARTRACKER_FILENAME_RE.match(os.path.basename(str(filename)))
+    if mat is None:
+        return None
+
+    return dict(camCode=mat.group("camCode"),
+                camId=int(mat.group("camId")),
+                controller=mat.group("controller"),
+                dayObs=int(mat.group("dayObs")),
+                seqNum=int(mat.group("seqNum")),
+                )
+
+
+def findStarTrackerTranslator(filename, readHeader=True):
+    """Return the translator for a file, without opening it if possible
+
+    The translator is chosen using the filename alone if it is of the
+    standard form (e.g. ``GC101_O_20221208_000211.fits.gz``); only if the
+    name is not recognised is the header read and the usual header-based
+    test applied.
+
+    Parameters
+    ----------
+    filename : `str`
+        Name of the file.
+    readHeader : `bool`, optional
+        Read the header if the filename is not of the standard form?
+
+    Returns
+    -------
+    translatorClass : `type` or `None`
+        The translator class, or `None` if the file doesn't come from one
+        of the star trackers.
+    """
+    parts = parseStarTrackerFilename(filename)
+    if parts is not None:
+        if parts["camCode"] != "GC":
+            return None
+        return _STARTRACKER_TRANSLATORS.get(parts["camId"])
+
+    if not readHeader:
+        return None
+
+    header = read_basic_metadata_from_file(str(filename), -1, can_raise=False)
+    if header is None:
+        return None
+
+    return findStarTrackerTranslatorForHeader(header)
+
+
+def findStarTrackerTranslatorForHeader(header):
+    """Return the translator for a header using a single lookup on the
+    camera ID in its ``OBSID``, rather than asking every registered
+    translator whether it can translate it.
+
+    Parameters
+    ----------
+    header : `dict`-like
+        The header.
+
+    Returns
+    -------
+    translatorClass : `type` or `None`
+        The translator class, or `None` if the header doesn't come from
+        one of the star trackers.
+    """
+    isStarTracker, camId = StarTrackerTranslator._is_startracker(header)
+    return _STARTRACKER_TRANSLATORS.get(camId) if isStarTracker else None
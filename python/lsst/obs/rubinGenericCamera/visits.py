@@ -0,0 +1,270 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Define visits for large numbers of star tracker exposures.
+
+The generic visit-definition machinery groups exposures one group at a
+time and writes each visit's records in its own transaction, which is too
+slow for a night of StarTrackerFast frames.  Here the exposures are sorted
+once by the fields that the translator derives from ``GROUPID`` and
+``SEQNUM`` (``day_obs``, ``seq_start``, ``seq_end`` and the group name), split
+into sequences in a single pass, and all the resulting records are written
+in one transaction.
+"""
+
+__all__ = ("StarTrackerGroupExposuresConfig", "StarTrackerGroupExposuresTask",
+           "StarTrackerDefineVisitsConfig", "StarTrackerDefineVisitsTask", "groupExposureSequences")
+
+import itertools
+from collections import defaultdict
+
+from lsst.obs.base import DefineVisitsConfig, DefineVisitsTask, GroupExposuresConfig, GroupExposuresTask
+from lsst.obs.base import VisitDefinitionData, VisitSystem
+from lsst.pex.config import registerConfigurable
+from .instrumentation import incrementCounter, timed
+
+
+def _groupName(exposure):
+    """Return the name of an exposure's group (the field is called
+    ``group`` in recent dimension universes and ``group_name`` before)"""
+    return getattr(exposure, "group", None) or getattr(exposure, "group_name", None) or ""
+
+
+def _sequenceKey(exposure):
+    return (exposure.day_obs, exposure.seq_start, exposure.seq_end, _groupName(exposure))
+
+
+def groupExposureSequences(exposures):
+    """Split exposures into sequences in one sorted pass.
+
+    Exposures are in the same sequence if they were taken on the same day
+    with the same ``seq_start``, ``seq_end`` and group name.
+
+    Parameters
+    ----------
+    exposures : iterable of `lsst.daf.butler.DimensionRecord`
+        The exposure records.
+
+    Returns
+    -------
+    sequences : `dict` [`tuple`, `list` [`lsst.daf.butler.DimensionRecord`]]
+        The exposures in each sequence, sorted by ``seq_num``, indexed by
+        ``(day_obs, seq_start, seq_end, group)``; the sequences are in
+        time order.
+    """
+    exposures = sorted(exposures, key=lambda exposure: _sequenceKey(exposure) + (exposure.seq_num,))
+
+    return {key: list(sequence) for key, sequence in itertools.groupby(exposures, key=_sequenceKey)}
+
+
+class StarTrackerGroupExposuresConfig(GroupExposuresConfig):
+    pass
+
+
+@registerConfigurable("star-tracker", GroupExposuresTask.registry)
+class StarTrackerGroupExposuresTask(GroupExposuresTask):
+    """Group star tracker exposures into visits.
+
+    Each exposure is a visit in the ``ONE_TO_ONE`` visit system, and each
+    sequence (see `groupExposureSequences`) is a visit in the
+    ``BY_SEQ_START_END`` system whose ID is that of its first exposure, as
+    for `lsst.obs.base.DefineVisitsTask`'s ``by-counter-and-exposures``
+    grouping: a single-exposure sequence (``seq_start == seq_end``) is one
+    visit in both systems, the one-to-one visit of the first exposure of a
+    longer sequence has ID ``9<exposure ID>`` and name ``<obs_id>_first``,
+    and no sequence visit is defined until a sequence's first exposure has
+    been ingested.  The difference is that all the exposures are grouped
+    in one sorted pass.
+    """
+    ConfigClass = StarTrackerGroupExposuresConfig
+
+    def find_missing(self, exposures, registry):
+        # Docstring inherited from GroupExposuresTask.find_missing
+        missing = []
+        for (dayObs, seqStart, seqEnd, group), sequence in groupExposureSequences(exposures).items():
+            if len(sequence) == seqEnd - seqStart + 1:
+                continue
+            known = {exposure.id for exposure in sequence}
+            records = registry.queryDimensionRecords(
+                "exposure", instrument=sequence[0].instrument,
+                where="exposure.day_obs = dayObs AND exposure.seq_num >= seqStart "
+                "AND exposure.seq_num <= seqEnd",
+                bind=dict(dayObs=dayObs, seqStart=seqStart, seqEnd=seqEnd))
+            missing += [record for record in records
+                        if record.id not in known and _sequenceKey(record) == _sequenceKey(sequence[0])]
+
+        return missing
+
+    def group_exposures(self, exposures):
+        # Docstring inherited from GroupExposuresTask.group_exposures
+        return groupExposureSequences(exposures)
+
+    @timed("visits.group")
+    def group(self, exposures, instrument=None):
+        # Docstring inherited from GroupExposuresTask.group
+        for sequence in groupExposureSequences(exposures).values():
+            first = sequence[0]
+            # A sequence is multi-exposure however many of its exposures
+            # have been ingested, but its visit can only be defined once
+            # its first exposure has been
+            multiExposure = first.seq_start != first.seq_end
+            skipMulti = first.seq_num != first.seq_start
+            if multiExposure and skipMulti:
+                self.log.warning("First exposure of sequence %s (seq_num %d) has not been ingested; "
+                                 "not defining its %s visit", first.obs_id, first.seq_start,
+                                 VisitSystem.BY_SEQ_START_END.name)
+
+            for exposure in sequence:
+                visitId, visitName = exposure.id, exposure.obs_id
+                visitSystems = {VisitSystem.ONE_TO_ONE}
+                if not multiExposure:
+                    visitSystems.add(VisitSystem.BY_SEQ_START_END)
+                elif not skipMulti and exposure is first:
+                    # Don't clash with the multi-exposure visit
+                    visitId, visitName = int(f"9{visitId}"), f"{visitName}_first"
+                yield VisitDefinitionData(instrument=exposure.instrument, id=visitId, name=visitName,
+                                          visit_systems=visitSystems, exposures=[exposure])
+
+            if multiExposure and not skipMulti:
+                yield VisitDefinitionData(instrument=first.instrument, id=first.id, name=first.obs_id,
+                                          visit_systems={VisitSystem.BY_SEQ_START_END}, exposures=sequence)
+            incrementCounter("visits.sequences")
+
+    def getVisitSystems(self):
+        # Docstring inherited from GroupExposuresTask.getVisitSystems
+        return {VisitSystem.ONE_TO_ONE, VisitSystem.BY_SEQ_START_END}
+
+
+class StarTrackerDefineVisitsConfig(DefineVisitsConfig):
+    def setDefaults(self):
+        super().setDefaults()
+        self.groupExposures.name = "star-tracker"
+
+
+class StarTrackerDefineVisitsTask(DefineVisitsTask):
+    """Define visits for many star tracker exposures at once.
+
+    The exposure records are fetched with one query per instrument rather
+    than by expanding each data ID, grouped by
+    `StarTrackerGroupExposuresTask`, and the records for all the visits are
+    inserted in a single transaction.
+    """
+    ConfigClass = StarTrackerDefineVisitsConfig
+    _DefaultName = "starTrackerDefineVisits"
+
+    def queryExposures(self, dataIds):
+        """Return the exposure records for some data IDs.
+
+        Parameters
+        ----------
+        dataIds : iterable of `dict` or `lsst.daf.butler.DataCoordinate`
+            Data IDs with (at least) ``instrument`` and ``exposure`` keys;
+            data IDs without an ``exposure`` select all matching exposures.
+
+        Returns
+        -------
+        exposures : `list` [`lsst.daf.butler.DimensionRecord`]
+            The exposure records, without duplicates.
+        """
+        registry = self.butler.registry
+        exposureIds = defaultdict(set)
+        records = {}
+        for dataId in dataIds:
+            if "exposure" in dataId:
+                exposureIds[dataId["instrument"]].add(dataId["exposure"])
+            else:
+                for record in registry.queryDimensionRecords("exposure", dataId=dataId):
+                    records[(record.instrument, record.id)] = record
+
+        for instrument, ids in exposureIds.items():
+            for record in registry.queryDimensionRecords("exposure", instrument=instrument,
+                                                         where="exposure IN (ids)",
+                                                         bind=dict(ids=tuple(sorted(ids)))):
+                records[(record.instrument, record.id)] = record
+
+        return list(records.values())
+
+    @timed("visits.run")
+    def run(self, dataIds, *, collections=None, update_records=False, incremental=False):
+        """Add visit definitions to the registry for the given exposures.
+
+        Parameters
+        ----------
+        dataIds : iterable of `dict` or `lsst.daf.butler.DataCoordinate`
+            Exposure-level data IDs (see `queryExposures`).
+        collections : `str` or `list` [`str`], optional
+            Collections to search for the raws used to compute the visits'
+            regions.
+        update_records : `bool`, optional
+            Update existing visit records that differ from the new ones,
+            rather than leaving them unchanged.
+        incremental : `bool`, optional
+            Visits may already have been defined from some of their
+            exposures; existing records are updated as in
+            ``update_records``, and the other exposures in each
+            incomplete sequence are looked up in the registry.
+
+        Returns
+        -------
+        nVisits : `int`
+            The number of visits defined.
+        """
+        registry = self.butler.registry
+        exposures = self.queryExposures(dataIds)
+        if not exposures:
+            raise RuntimeError("No exposures given.")
+        if incremental:
+            exposures += self.groupExposures.find_missing(exposures, registry)
+
+        self.log.info("Grouping %d exposure(s) into visits.", len(exposures))
+        definitions = list(self.groupExposures.group(exposures))
+
+        self.log.info("Computing regions and other metadata for %d visit(s).", len(definitions))
+        visitRecords = [self._buildVisitRecords(definition, collections=collections)
+                        for definition in definitions]
+
+        update = update_records or incremental
+        with registry.transaction():
+            for instrument in {exposure.instrument for exposure in exposures}:
+                for visitSystem in self.groupExposures.getVisitSystems():
+                    registry.syncDimensionData("visit_system", dict(instrument=instrument,
+                                                                    id=visitSystem.value,
+                                                                    name=str(visitSystem)))
+
+            byElement = dict(
+                visit=[records.visit for records in visitRecords],
+                visit_system_membership=[record for records in visitRecords
+                                         for record in getattr(records, "visit_system_membership", [])],
+                visit_definition=[record for records in visitRecords for record in records.visit_definition],
+                visit_detector_region=[record for records in visitRecords
+                                       for record in records.visit_detector_region],
+            )
+            for element, elementRecords in byElement.items():
+                if not elementRecords:
+                    continue
+                if update and element in ("visit", "visit_detector_region"):
+                    for record in elementRecords:
+                        registry.syncDimensionData(element, record, update=True)
+                else:
+                    registry.insertDimensionData(element, *elementRecords, skip_existing=True)
+
+        return len(definitions)
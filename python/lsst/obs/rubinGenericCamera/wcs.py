@@ -0,0 +1,108 @@
+# This file is part of obs_rubinGenericCamera
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Fast construction of the initial WCS of star tracker raws.
+
+A raw's initial WCS is the camera's pixels → field angle transform for
+the detector, which depends only on the camera geometry, followed by the
+pointing (boresight and rotation), which changes from frame to frame.
+The first part is computed once per detector and version of the camera
+geometry and cached, so making the WCS of each frame only needs the
+cheap pointing-dependent step.
+"""
+
+__all__ = ("getPixelsToFieldAngle", "makeRawWcs")
+
+import threading
+
+import lsst.afw.cameraGeom as cameraGeom
+import lsst.afw.geom as afwGeom
+from .instrumentation import incrementCounter, timed
+
+_transformCache = {}                    # (policyName, detector ID) -> (camera, transform)
+_transformCacheLock = threading.Lock()
+
+
+def getPixelsToFieldAngle(instrumentClass, detectorId):
+    """Return the pixels → field angle transform of a detector.
+
+    Parameters
+    ----------
+    instrumentClass : `type`
+        The instrument, a subclass of
+        `~lsst.obs.rubinGenericCamera.RubinGenericCamera`.
+    detectorId : `int`
+        The detector.
+
+    Returns
+    -------
+    transform : `lsst.afw.geom.TransformPoint2ToPoint2`
+        The transform, shared with other callers, so not to be modified.
+        It is recomputed if the instrument's camera geometry changes.
+    """
+    camera = instrumentClass.getCamera()
+    key = (instrumentClass.policyName, detectorId)
+    with _transformCacheLock:
+        cached = _transformCache.get(key)
+        if cached is not None and cached[0] is camera:
+            incrementCounter("wcs.transformCacheHit")
+            return cached[1]
+
+        incrementCounter("wcs.transformCacheMiss")
+        detector = camera[detectorId]
+        transform = detector.getTransform(detector.makeCameraSys(cameraGeom.PIXELS),
+                                          detector.makeCameraSys(cameraGeom.FIELD_ANGLE))
+        # Keep the camera, so that a rebuilt camera is noticed
+        _transformCache[key] = (camera, transform)
+
+    return transform
+
+
+@timed("wcs.makeRawWcs")
+def makeRawWcs(instrumentClass, detectorId, boresight, orientation, flipX=False):
+    """Return the initial WCS of a raw given its pointing.
+
+    This is the same WCS as `lsst.obs.base.createInitialSkyWcsFromBoresight`
+    returns, but the detector's pixels → field angle transform is only
+    computed once.
+
+    Parameters
+    ----------
+    instrumentClass : `type`
+        The instrument, a subclass of
+        `~lsst.obs.rubinGenericCamera.RubinGenericCamera`.
+    detectorId : `int`
+        The detector.
+    boresight : `lsst.geom.SpherePoint`
+        The ICRS boresight.
+    orientation : `lsst.geom.Angle`
+        The rotation angle of the focal plane on the sky.
+    flipX : `bool`, optional
+        Flip the x axis?
+
+    Returns
+    -------
+    wcs : `lsst.afw.geom.SkyWcs`
+        The WCS.
+    """
+    return afwGeom.makeSkyWcs(getPixelsToFieldAngle(instrumentClass, detectorId), orientation, flipX,
+                              boresight)
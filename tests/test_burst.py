@@ -0,0 +1,143 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import numpy as np
+import astropy.io.fits as pyfits
+
+import lsst.geom as geom
+import lsst.utils.tests
+from astro_metadata_translator import ObservationInfo
+from astro_metadata_translator.tests import read_test_file
+from lsst.resources import ResourcePath
+from lsst.obs.rubinGenericCamera.burst import BurstFrames, readRawFrames
+from lsst.obs.rubinGenericCamera.fitsUtils import decompressFile
+
+TESTDIR = os.path.abspath(os.path.dirname(__file__))
+RAWFILE = os.path.join(TESTDIR, os.path.pardir, "data", "input", "raw", "GC103_O_20221208_000211.fits.gz")
+NFRAME = 4
+
+
+class BurstTestCase(lsst.utils.tests.TestCase):
+    """Test reading bursts of StarTrackerFast frames"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        with pyfits.open(RAWFILE) as hdul:
+            self.primary = hdul[0].header.copy()
+            self.frame = hdul[1].data.copy()
+        self.frames = [self.frame + i for i in range(NFRAME)]
+        self.mjd0 = self.primary["MJD-BEG"]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def checkFrames(self, path, expectedMjd):
+        with BurstFrames(path) as frames:
+            self.assertEqual(len(frames), NFRAME)
+            for i in (0, NFRAME - 1, -1):
+                self.assertTrue(np.array_equal(frames[i].array, self.frames[i]))
+            np.testing.assert_allclose(frames.times.mjd, expectedMjd)
+
+        bbox = geom.Box2I(geom.Point2I(10, 20), geom.Extent2I(5, 7))
+        with BurstFrames(path, bbox=bbox) as frames:
+            self.assertEqual(frames[1].getBBox(), bbox)
+            self.assertTrue(np.array_equal(frames[1].array, self.frames[1][20:27, 10:15]))
+
+    def testCube(self):
+        path = os.path.join(self.tmpdir, "cube.fits")
+        mjd = self.mjd0 + np.arange(NFRAME) * 1e-6
+        pyfits.HDUList([pyfits.PrimaryHDU(header=self.primary),
+                        pyfits.ImageHDU(np.stack(self.frames)),
+                        pyfits.BinTableHDU.from_columns([pyfits.Column("MJD-BEG", "D", array=mjd)],
+                                                        name="FRAMETIMES"),
+                        ]).writeto(path)
+        self.checkFrames(path, mjd)
+
+    def testMultipleHdus(self):
+        path = os.path.join(self.tmpdir, "hdus.fits")
+        hdus = [pyfits.PrimaryHDU(header=self.primary)]
+        for frame in self.frames:
+            hdus.append(pyfits.ImageHDU(frame))
+        pyfits.HDUList(hdus).writeto(path)
+        self.checkFrames(path, self.mjd0 + np.arange(NFRAME) * self.primary["EXPTIME"] / 86400)
+
+    def testCubeTimesInExtension(self):
+        path = os.path.join(self.tmpdir, "cube.fits")
+        primary = self.primary.copy()
+        del primary["MJD-BEG"]
+        image = pyfits.ImageHDU(np.stack(self.frames))
+        image.header["MJD-BEG"] = self.mjd0
+        image.header["FRAMEINT"] = 0.5
+        pyfits.HDUList([pyfits.PrimaryHDU(header=primary), image]).writeto(path)
+        self.checkFrames(path, self.mjd0 + np.arange(NFRAME) * 0.5 / 86400)
+
+    def testHduTimesInFirstExtension(self):
+        path = os.path.join(self.tmpdir, "hdus.fits")
+        primary = self.primary.copy()
+        del primary["MJD-BEG"]
+        hdus = [pyfits.PrimaryHDU(header=primary)]
+        for frame in self.frames:
+            hdus.append(pyfits.ImageHDU(frame))
+        hdus[1].header["MJD-BEG"] = self.mjd0
+        pyfits.HDUList(hdus).writeto(path)
+        self.checkFrames(path, self.mjd0 + np.arange(NFRAME) * self.primary["EXPTIME"] / 86400)
+
+    def testNoTimes(self):
+        path = os.path.join(self.tmpdir, "cube.fits")
+        primary = self.primary.copy()
+        del primary["MJD-BEG"]
+        pyfits.HDUList([pyfits.PrimaryHDU(header=primary),
+                        pyfits.ImageHDU(np.stack(self.frames))]).writeto(path)
+        with self.assertRaises(RuntimeError):
+            BurstFrames(path)
+
+    def testReadRawFrames(self):
+        butler = unittest.mock.Mock()
+        butler.getURI.return_value = ResourcePath(RAWFILE)
+        dataId = dict(instrument="StarTrackerFast", exposure=2022120800211, detector=0)
+        with readRawFrames(butler, dataId, collections="StarTrackerFast/raw/all") as frames:
+            self.assertEqual(len(frames), 1)
+            self.assertTrue(np.array_equal(frames[0].array, self.frame))
+        butler.getURI.assert_called_once_with("raw", dataId, collections="StarTrackerFast/raw/all")
+
+    def testSingleFrame(self):
+        with BurstFrames(RAWFILE) as frames:
+            self.assertEqual(len(frames), 1)
+            self.assertTrue(np.array_equal(frames[0].array, self.frame))
+        with BurstFrames(decompressFile(RAWFILE)) as frames:
+            self.assertTrue(np.array_equal(frames[0].array, self.frame))
+
+    def testTranslator(self):
+        header = read_test_file("GC103_O_20221208_000211.yaml", dir=os.path.join(TESTDIR, "headers"))
+        self.assertEqual(ObservationInfo(header).ext_n_frames, 1)
+        header["NFRAMES"] = NFRAME
+        self.assertEqual(ObservationInfo(header).ext_n_frames, NFRAME)
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,101 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import unittest.mock
+
+import numpy as np
+
+from lsst.obs.rubinGenericCamera import centroids
+from lsst.obs.rubinGenericCamera.centroids import findBrightStars, measureCentroids, StarTrackerCentroidTask
+
+SHAPE = (120, 160)
+SIGMA = 1.5
+
+
+def makeFrame(stars, rng):
+    """Make a frame containing Gaussian stars on a noisy background"""
+    yy, xx = np.indices(SHAPE)
+    frame = 1000.0 + rng.normal(0, 5, SHAPE)
+    for x, y, flux in stars:
+        frame += flux / (2 * np.pi * SIGMA**2) * np.exp(-((xx - x)**2 + (yy - y)**2) / (2 * SIGMA**2))
+    return frame
+
+
+class CentroidTestCase(unittest.TestCase):
+    """Test tracking stars through a sequence of frames"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(12345)
+        self.stars = [(40.3, 30.6, 2e5), (100.7, 80.2, 1e5), (130.1, 20.9, 5e4)]
+
+    def testFindBrightStars(self):
+        x, y = findBrightStars(makeFrame(self.stars, self.rng), nStar=5, boxSize=11)
+        self.assertEqual(len(x), 3)
+        for (xStar, yStar, flux), xPeak, yPeak in zip(self.stars, x, y):  # brightest first
+            self.assertLessEqual(abs(xPeak - xStar), 1)
+            self.assertLessEqual(abs(yPeak - yStar), 1)
+
+    def testTrack(self):
+        nFrame = 25
+        drift = np.linspace(0, 4, nFrame)    # the stars drift further than a box
+        frames = (makeFrame([(x + d, y - d, f) for x, y, f in self.stars], self.rng) for d in drift)
+
+        config = StarTrackerCentroidTask.ConfigClass()
+        config.boxSize = 11
+        config.chunkSize = 4
+        task = StarTrackerCentroidTask(config=config)
+        table = task.run(frames, exposureIds=np.arange(nFrame) + 100).centroids
+
+        self.assertEqual(len(table), nFrame * len(self.stars))
+        self.assertEqual(table.meta["nStar"], len(self.stars))
+        for iStar, (x, y, flux) in enumerate(self.stars):
+            star = table[table["star"] == iStar]
+            np.testing.assert_array_equal(star["exposure"], np.arange(nFrame) + 100)
+            np.testing.assert_allclose(star["x"], x + drift, atol=0.05)
+            np.testing.assert_allclose(star["y"], y - drift, atol=0.05)
+            np.testing.assert_allclose(star["xx"], SIGMA**2, rtol=0.1)
+
+    def testChunksOfStamps(self):
+        frames = [makeFrame(self.stars, self.rng).astype(np.uint16) for _ in range(6)]
+        config = StarTrackerCentroidTask.ConfigClass()
+        config.boxSize = 11
+        config.chunkSize = 4
+        task = StarTrackerCentroidTask(config=config)
+        with unittest.mock.patch.object(centroids, "_measureStamps", wraps=centroids._measureStamps) as mock:
+            table = task.run(frames).centroids
+
+        # Only the stars' boxes, in the raws' pixel type, are stacked
+        self.assertEqual([call.args[0].shape for call in mock.call_args_list],
+                         [(4, 3, 11, 11), (2, 3, 11, 11)])
+        self.assertEqual(mock.call_args_list[0].args[0].dtype, np.uint16)
+
+        x, y = findBrightStars(frames[0], nStar=5, boxSize=11, threshold=config.threshold)
+        expected = measureCentroids(np.stack(frames[:4]), x, y, 11)
+        np.testing.assert_allclose(table["x"][:12], expected["x"].ravel())
+
+    def testNoStars(self):
+        table = StarTrackerCentroidTask().run([makeFrame([], self.rng)]).centroids
+        self.assertEqual(len(table), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import tempfile
+import time
+import unittest
+import unittest.mock
+
+from lsst.obs.rubinGenericCamera import corrections
+from lsst.obs.rubinGenericCamera.corrections import CorrectionsIndex
+from lsst.obs.rubinGenericCamera.translator import (RubinGenericCameraTranslator,
+                                                    StarTrackerFastTranslator)
+
+
+class CorrectionsTestCase(unittest.TestCase):
+    """Test the in-memory index of header corrections"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.correctionsDir = self.tmpdir.name
+        os.mkdir(os.path.join(self.correctionsDir, "StarTrackerFast"))
+        self.write("StarTrackerFast/GC103_O_20221208_000211.yaml", "EXPTIME: 0.5\n")
+        self.index = CorrectionsIndex([self.correctionsDir, os.path.join(self.correctionsDir, "noSuchDir")],
+                                      checkInterval=0)
+
+    def write(self, name, contents):
+        path = os.path.join(self.correctionsDir, name)
+        with open(path, "w") as fd:
+            fd.write(contents)
+        # Make sure the modification time changes
+        mtime = time.time() + len(contents)
+        os.utime(path, (mtime, mtime))
+        os.utime(os.path.dirname(path), (mtime, mtime))
+
+    def testGet(self):
+        self.assertEqual(self.index.get("GC103_O_20221208_000211"), dict(EXPTIME=0.5))
+        self.assertIsNone(self.index.get("GC101_O_20221208_000211"))
+        self.assertEqual(len(self.index), 1)
+
+    def testInvalidation(self):
+        self.assertEqual(len(self.index), 1)
+        self.write("StarTrackerWide-GC101_O_20221208_000211.yaml", "DARKTIME: 2.0\n")
+        self.assertEqual(self.index.get("GC101_O_20221208_000211"), dict(DARKTIME=2.0))
+
+        self.write("StarTrackerFast/GC103_O_20221208_000211.yaml", "EXPTIME: 0.25\nIMGTYPE: BIAS\n")
+        self.assertEqual(self.index.get("GC103_O_20221208_000211"), dict(EXPTIME=0.25, IMGTYPE="BIAS"))
+
+        os.remove(os.path.join(self.correctionsDir, "StarTrackerWide-GC101_O_20221208_000211.yaml"))
+        self.assertIsNone(self.index.get("GC101_O_20221208_000211"))
+
+    def testDigest(self):
+        self.assertEqual(self.index.getDigest("GC101_O_20221208_000211"), "")
+        digest = self.index.getDigest("GC103_O_20221208_000211")
+        self.assertNotEqual(digest, "")
+
+        self.write("StarTrackerFast/GC103_O_20221208_000211.yaml", "EXPTIME: 0.25\n")
+        self.assertNotIn(self.index.getDigest("GC103_O_20221208_000211"), ("", digest))
+
+    def testCheckInterval(self):
+        index = CorrectionsIndex([self.correctionsDir], checkInterval=3600)
+        self.assertEqual(len(index), 1)
+        self.write("GC101_O_20221208_000211.yaml", "EXPTIME: 1.0\n")
+        self.assertIsNone(index.get("GC101_O_20221208_000211"))   # not checked yet
+        index.refresh(force=True)
+        self.assertEqual(index.get("GC101_O_20221208_000211"), dict(EXPTIME=1.0))
+
+    def testTranslator(self):
+        header = dict(OBSID="GC103_O_20221208_000211", EXPTIME=1.0, DAYOBS="20221208", SEQNUM=211)
+        with unittest.mock.patch.object(corrections, "_index", self.index):
+            self.assertTrue(StarTrackerFastTranslator.fix_header(header, "StarTrackerFast",
+                                                                 "GC103_O_20221208_000211"))
+            self.assertEqual(header["EXPTIME"], 0.5)
+
+            header["EXPTIME"] = 1.0
+            table = RubinGenericCameraTranslator.translate_headers([header])
+            self.assertEqual(table["exposure_time"][0].value, 0.5)
+            self.assertEqual(header["EXPTIME"], 1.0)   # the input isn't modified
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+import astropy.io.fits as pyfits
+
+from lsst.obs.rubinGenericCamera.fitsUtils import (GZIP, TILE, decompressFile, getFitsCompression,
+                                                   readRawHeader, verifyChecksums)
+
+TESTDIR = os.path.abspath(os.path.dirname(__file__))
+RAWDIR = os.path.join(TESTDIR, os.path.pardir, "data", "input", "raw")
+
+
+class FitsUtilsTestCase(unittest.TestCase):
+    """Test reading raws with different kinds of compression"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.gzFile = os.path.join(RAWDIR, "GC103_O_20221208_000211.fits.gz")
+
+        self.plainFile = os.path.join(self.tmpdir, "GC103_O_20221208_000211.fits")
+        with gzip.open(self.gzFile, "rb") as fin, open(self.plainFile, "wb") as fout:
+            shutil.copyfileobj(fin, fout)
+
+        self.tileFile = os.path.join(self.tmpdir, "GC103_O_20221208_000211.fits.fz")
+        with pyfits.open(self.plainFile) as hdul:
+            pyfits.HDUList([hdul[0], pyfits.CompImageHDU(hdul[1].data, hdul[1].header,
+                                                         compression_type="RICE_1")]
+                           ).writeto(self.tileFile)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testCompression(self):
+        self.assertEqual(getFitsCompression(self.gzFile), GZIP)
+        self.assertEqual(getFitsCompression(self.tileFile), TILE)
+        self.assertIsNone(getFitsCompression(self.plainFile))
+
+    def testReadRawHeader(self):
+        for path in (self.gzFile, self.plainFile, self.tileFile):
+            with self.subTest(path=os.path.basename(path)):
+                header = readRawHeader(path)
+                self.assertEqual(header["OBSID"], "GC103_O_20221208_000211")  # from the primary
+                self.assertEqual(header["NAXIS1"], 659)                         # from the extension
+                self.assertEqual(header["NAXIS2"], 493)
+
+    def testVerifyChecksums(self):
+        # The test data have blank CHECKSUM cards, which are ignored
+        for path in (self.gzFile, self.plainFile, self.tileFile):
+            with self.subTest(path=os.path.basename(path)):
+                self.assertEqual(verifyChecksums(path), [])
+
+        checksummed = os.path.join(self.tmpdir, "checksummed.fits")
+        with pyfits.open(self.plainFile) as hdul:
+            hdul.writeto(checksummed, checksum=True)
+        self.assertEqual(verifyChecksums(checksummed), [])
+
+        with pyfits.open(checksummed) as hdul:
+            dataOffset = hdul.fileinfo(1)["datLoc"]
+        with open(checksummed, "r+b") as fd:   # flip a bit in the first pixel
+            fd.seek(dataOffset)
+            byte = fd.read(1)[0]
+            fd.seek(dataOffset)
+            fd.write(bytes([byte ^ 0x1]))
+        self.assertIn("DATASUM mismatch in HDU 1", verifyChecksums(checksummed))
+
+        truncated = os.path.join(self.tmpdir, "truncated.fits")
+        with open(self.plainFile, "rb") as fin, open(truncated, "wb") as fout:
+            fout.write(fin.read(os.path.getsize(self.plainFile) // 2))
+        self.assertNotEqual(verifyChecksums(truncated), [])
+
+    def testDecompressFile(self):
+        fileObj = decompressFile(self.gzFile)
+        with open(self.plainFile, "rb") as fd:
+            self.assertEqual(fileObj.getvalue(), fd.read())
+        # It may be read more than once
+        self.assertEqual(verifyChecksums(fileObj), [])
+        self.assertEqual(verifyChecksums(fileObj), [])
+
+        truncated = os.path.join(self.tmpdir, "truncated.fits.gz")
+        with open(self.gzFile, "rb") as fin, open(truncated, "wb") as fout:
+            fout.write(fin.read(os.path.getsize(self.gzFile) // 2))
+        with self.assertRaises(EOFError):
+            decompressFile(truncated)
+
+
+if __name__ == "__main__":
+    unittest.main()
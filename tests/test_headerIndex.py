@@ -0,0 +1,107 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import unittest.mock
+
+import lsst.obs.rubinGenericCamera.translator  # noqa: F401 -- register the translators
+from lsst.obs.rubinGenericCamera import corrections
+from lsst.obs.rubinGenericCamera.headerIndex import HeaderIndex, _getPackageVersion
+
+TESTDIR = os.path.abspath(os.path.dirname(__file__))
+RAWFILE = os.path.join(TESTDIR, os.path.pardir, "data", "input", "raw", "GC103_O_20221208_000211.fits.gz")
+
+
+class HeaderIndexTestCase(unittest.TestCase):
+    """Test the persistent index of headers and translations"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.rawFile = os.path.join(self.tmpdir, os.path.basename(RAWFILE))
+        shutil.copy(RAWFILE, self.rawFile)
+        self.index = HeaderIndex(os.path.join(self.tmpdir, "index.sqlite3"), version="1")
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_roundtrip(self):
+        self.assertEqual(self.index.get(self.rawFile), (None, None))
+
+        obsInfo = self.index.getObservationInfo(self.rawFile)
+        self.assertEqual(obsInfo.instrument, "StarTrackerFast")
+
+        header, cached = self.index.get(self.rawFile)
+        self.assertEqual(header["OBSID"], "GC103_O_20221208_000211")
+        self.assertEqual(cached, obsInfo)
+
+    def test_invalidation(self):
+        self.index.getObservationInfo(self.rawFile)
+
+        # A new version of the translators keeps the header
+        index = HeaderIndex(self.index.filename, version="2")
+        header, obsInfo = index.get(self.rawFile)
+        self.assertIsNotNone(header)
+        self.assertIsNone(obsInfo)
+        index.close()
+
+        # Changing the file discards everything
+        with open(self.rawFile, "ab") as fd:
+            fd.write(b"\0")
+        self.assertEqual(self.index.get(self.rawFile), (None, None))
+
+    def test_corrections(self):
+        correctionsDir = os.path.join(self.tmpdir, "corrections")
+        os.mkdir(correctionsDir)
+        index = corrections.CorrectionsIndex([correctionsDir], checkInterval=0)
+        with unittest.mock.patch.object(corrections, "_index", index):
+            self.assertEqual(self.index.getObservationInfo(self.rawFile).exposure_time.value, 0.1)
+
+            # A new correction invalidates the translation, but not the header
+            with open(os.path.join(correctionsDir, "GC103_O_20221208_000211.yaml"), "w") as fd:
+                fd.write("EXPTIME: 0.5\n")
+            index.refresh(force=True)
+            header, obsInfo = self.index.get(self.rawFile)
+            self.assertIsNotNone(header)
+            self.assertIsNone(obsInfo)
+
+            self.assertEqual(self.index.getObservationInfo(self.rawFile).exposure_time.value, 0.5)
+            self.assertIsNotNone(self.index.get(self.rawFile)[1])
+
+    def test_unknownVersion(self):
+        # Without a version.py the translators' source stands in for it
+        with unittest.mock.patch.dict(sys.modules, {"lsst.obs.rubinGenericCamera.version": None}):
+            version = _getPackageVersion()
+        self.assertRegex(version, "^unknown-[0-9a-f]{40}$")
+
+    def test_journalMode(self):
+        index = HeaderIndex(os.path.join(self.tmpdir, "delete.sqlite3"), version="1", journalMode="DELETE")
+        self.assertEqual(index.connection.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+        self.assertEqual(index.getObservationInfo(self.rawFile).instrument, "StarTrackerFast")
+        index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,28 @@
 """Unit tests for Gen3 RubinGC raw data ingest.
 """
 
+import concurrent.futures
+import gzip
+import threading
 import unittest
+import unittest.mock
 import os
+import shutil
+import tempfile
+import numpy as np
+import astropy.io.fits as pyfits
 import lsst.utils.tests
+import lsst.resources
+import lsst.geom
+import lsst.afw.image
 
+from lsst.daf.butler import Butler
+from lsst.obs.base import RawIngestTask
 from lsst.obs.base.ingest_tests import IngestTestBase
 from lsst.obs.rubinGenericCamera import StarTrackerWide, StarTrackerNarrow, StarTrackerFast
+from lsst.obs.rubinGenericCamera.ingest import StarTrackerRawIngestTask
+from lsst.obs.rubinGenericCamera.prefetch import prefetchRaws
+from lsst.obs.rubinGenericCamera.sharedFrame import SHARED_FRAMES_ENV, SharedFrame
 from lsst.obs.rubinGenericCamera.filters import RUBIN_GENERIC_CAMERA_FILTER_DEFINITIONS
 
 testDataPackage = "obs_rubinGenericCamera"
@@ -64,6 +80,301 @@ class StarTrackerFastIngestTestCase(IngestTestBase, lsst.utils.tests.TestCase):
         super().setUp()
 
 
+@unittest.skipIf(testDataDirectory is None, "obs_rubinGenericCamera must be set up")
+class StarTrackerBulkIngestTestCase(lsst.utils.tests.TestCase):
+    """Test ingesting all the star trackers' data in one go"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        Butler.makeRepo(self.root)
+        self.butler = Butler(self.root, writeable=True)
+        for instrument in (StarTrackerWide(), StarTrackerNarrow(), StarTrackerFast()):
+            instrument.register(self.butler.registry)
+        self.rawDir = os.path.join(testDataDirectory, "data", "input", "raw")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def testClassifyFiles(self):
+        task = StarTrackerRawIngestTask(config=StarTrackerRawIngestTask.ConfigClass(), butler=self.butler)
+        files = [lsst.resources.ResourcePath(os.path.join(self.rawDir, f))
+                 for f in sorted(os.listdir(self.rawDir))]
+        byInstrument, rejected = task.classifyFiles(files)
+
+        self.assertEqual(rejected, [])
+        self.assertEqual({k: [f.basename() for f in v] for k, v in byInstrument.items()},
+                         {"StarTrackerWide": ["GC101_O_20221208_000211.fits.gz"],
+                          "StarTrackerNarrow": ["GC102_O_20221208_000211.fits.gz"],
+                          "StarTrackerFast": ["GC103_O_20221208_000211.fits.gz"]})
+
+    def testIngest(self):
+        config = StarTrackerRawIngestTask.ConfigClass()
+        config.transfer = "direct"
+        config.processes = 2
+        task = StarTrackerRawIngestTask(config=config, butler=self.butler)
+        refs = task.run([self.rawDir])
+
+        self.assertEqual(len(refs), 3)
+        self.assertEqual({ref.dataId["instrument"] for ref in refs},
+                         {"StarTrackerWide", "StarTrackerNarrow", "StarTrackerFast"})
+        self.assertEqual(len(list(self.butler.registry.queryDimensionRecords("exposure"))), 3)
+
+    def testSkipExistingExposures(self):
+        config = StarTrackerRawIngestTask.ConfigClass()
+        config.transfer = "copy"            # so that the datasets may be purged
+        task = StarTrackerRawIngestTask(config=config, butler=self.butler)
+
+        refs = task.run([self.rawDir], skip_existing_exposures=True)
+        self.assertEqual(len(refs), 3)
+        self.assertEqual(len(list(self.butler.registry.queryDimensionRecords("exposure"))), 3)
+
+        # Nothing new to ingest the second time
+        self.assertEqual(task.run([self.rawDir], skip_existing_exposures=True), [])
+
+        # Exposures whose records exist but whose datasets don't are ingested
+        self.butler.pruneDatasets(refs, disassociate=True, unstore=True, purge=True)
+        self.assertEqual(len(list(self.butler.registry.queryDimensionRecords("exposure"))), 3)
+        self.assertEqual(len(task.run([self.rawDir], skip_existing_exposures=True)), 3)
+
+    def testCutout(self):
+        config = StarTrackerRawIngestTask.ConfigClass()
+        config.transfer = "direct"
+        task = StarTrackerRawIngestTask(config=config, butler=self.butler)
+        task.run([os.path.join(self.rawDir, "GC103_O_20221208_000211.fits.gz")])
+
+        dataId = dict(instrument="StarTrackerFast", exposure=2022120800211, detector=0)
+        collections = StarTrackerFast.makeDefaultRawIngestRunName()
+        bbox = lsst.geom.Box2I(lsst.geom.Point2I(100, 200), lsst.geom.Extent2I(30, 20))
+        full = self.butler.get("raw", dataId, collections=collections)
+        cutout = self.butler.get("raw", dataId, collections=collections, parameters=dict(bbox=bbox))
+
+        self.assertEqual(cutout.getBBox(), bbox)
+        self.assertEqual(cutout.image.array.dtype, np.float32)
+        self.assertImagesEqual(cutout.image, full.image[bbox])
+        self.assertEqual(cutout.getDetector().getName(), full.getDetector().getName())
+
+    def testFollow(self):
+        config = StarTrackerRawIngestTask.ConfigClass()
+        config.transfer = "copy"
+        config.followPollInterval = 0.01
+        config.followMaxLatency = 0.0
+        task = StarTrackerRawIngestTask(config=config, butler=self.butler)
+
+        with tempfile.TemporaryDirectory() as followDir:
+            for f in os.listdir(self.rawDir):
+                shutil.copy(os.path.join(self.rawDir, f), followDir)
+            # Only the StarTrackerFast file should be ingested
+            self.assertEqual(task.follow(followDir, timeout=0.5), 1)
+
+        self.assertEqual({rec.instrument for rec in self.butler.registry.queryDimensionRecords("exposure")},
+                         {"StarTrackerFast"})
+
+    def testFollowRetry(self):
+        config = StarTrackerRawIngestTask.ConfigClass()
+        config.transfer = "copy"
+        config.followPollInterval = 0.01
+        config.followMaxLatency = 0.0
+        task = StarTrackerRawIngestTask(config=config, butler=self.butler)
+
+        ingestDatasets = RawIngestTask.ingestExposureDatasets
+        calls = []
+
+        def flakyIngestDatasets(self, *args, **kwargs):
+            # Fail after the exposure record has been inserted
+            calls.append(kwargs.get("skip_existing_exposures", False))
+            if len(calls) == 1:
+                raise RuntimeError("Datastore unavailable")
+            return ingestDatasets(self, *args, **kwargs)
+
+        with tempfile.TemporaryDirectory() as followDir:
+            shutil.copy(os.path.join(self.rawDir, "GC103_O_20221208_000211.fits.gz"), followDir)
+            with unittest.mock.patch.object(RawIngestTask, "ingestExposureDatasets", flakyIngestDatasets):
+                self.assertEqual(task.follow(followDir, timeout=0.5), 1)
+
+        self.assertEqual(calls, [False, False])
+        self.assertIsNotNone(self.findFastRaw())
+
+    def testFollowRetryIngested(self):
+        config = StarTrackerRawIngestTask.ConfigClass()
+        config.transfer = "copy"
+        config.followPollInterval = 0.01
+        config.followMaxLatency = 0.0
+        task = StarTrackerRawIngestTask(config=config, butler=self.butler)
+
+        runIngest = RawIngestTask.run
+        calls = []
+
+        def flakyRun(self, *args, **kwargs):
+            # Fail after the datasets have been ingested
+            calls.append(args)
+            refs = runIngest(self, *args, **kwargs)
+            if len(calls) == 1:
+                raise RuntimeError("Lost connection")
+            return refs
+
+        with tempfile.TemporaryDirectory() as followDir:
+            shutil.copy(os.path.join(self.rawDir, "GC103_O_20221208_000211.fits.gz"), followDir)
+            with unittest.mock.patch.object(RawIngestTask, "run", flakyRun):
+                self.assertEqual(task.follow(followDir, timeout=0.5), 0)
+
+        # The file wasn't ingested again
+        self.assertEqual(len(calls), 1)
+        self.assertIsNotNone(self.findFastRaw())
+
+    def findFastRaw(self):
+        """Return the ref of the StarTrackerFast raw, or `None`"""
+        return self.butler.registry.findDataset(
+            "raw", instrument="StarTrackerFast", exposure=2022120800211, detector=0,
+            collections=StarTrackerFast.makeDefaultRawIngestRunName())
+
+    def testQuarantine(self):
+        with tempfile.TemporaryDirectory() as rawDir:
+            for f in os.listdir(self.rawDir):
+                if f.startswith("GC103"):   # truncate the StarTrackerFast file
+                    with gzip.open(os.path.join(self.rawDir, f), "rb") as fd:
+                        data = fd.read()
+                    with open(os.path.join(rawDir, "GC103_O_20221208_000211.fits"), "wb") as fd:
+                        fd.write(data[:len(data) // 2])
+                else:
+                    shutil.copy(os.path.join(self.rawDir, f), rawDir)
+
+            config = StarTrackerRawIngestTask.ConfigClass()
+            config.transfer = "copy"
+            config.doVerifyChecksums = True
+            config.quarantineDir = os.path.join(rawDir, "quarantine")
+            task = StarTrackerRawIngestTask(config=config, butler=self.butler)
+            refs = task.run([rawDir])
+
+            self.assertEqual({ref.dataId["instrument"] for ref in refs},
+                             {"StarTrackerWide", "StarTrackerNarrow"})
+            self.assertEqual([os.path.basename(f) for f in task.corruptFiles],
+                             ["GC103_O_20221208_000211.fits"])
+            self.assertEqual(os.listdir(config.quarantineDir), ["GC103_O_20221208_000211.fits"])
+
+    def testPreviews(self):
+        with tempfile.TemporaryDirectory() as previewDir:
+            config = StarTrackerRawIngestTask.ConfigClass()
+            config.transfer = "direct"
+            config.doWritePreviews = True
+            config.previewDir = previewDir
+            task = StarTrackerRawIngestTask(config=config, butler=self.butler)
+            task.run([self.rawDir])
+
+            self.assertEqual(sorted(os.listdir(previewDir)),
+                             [f"GC10{i}_O_20221208_000211.png" for i in (1, 2, 3)])
+
+    def testPreviewsInBackground(self):
+        config = StarTrackerRawIngestTask.ConfigClass()
+        config.doVerifyChecksums = True
+        config.doWritePreviews = True
+        task = StarTrackerRawIngestTask(config=config, butler=self.butler)
+        path = os.path.join(self.rawDir, "GC101_O_20221208_000211.fits.gz")
+
+        release = threading.Event()
+        written = []
+
+        def writePreview(source, previewPath, binFactor):
+            release.wait()
+            written.append(previewPath)
+
+        with unittest.mock.patch("lsst.obs.rubinGenericCamera.ingest.writePreview", writePreview), \
+                concurrent.futures.ThreadPoolExecutor(1) as executor:
+            # The checksums are reported while the preview is still pending
+            self.assertEqual(task.checkFile(path, executor), [])
+            self.assertEqual(written, [])
+            release.set()
+
+        self.assertEqual([os.path.basename(f) for f in written], ["GC101_O_20221208_000211.png"])
+
+    def testPrefetchRaws(self):
+        config = StarTrackerRawIngestTask.ConfigClass()
+        config.transfer = "direct"
+        task = StarTrackerRawIngestTask(config=config, butler=self.butler)
+        refs = task.run([self.rawDir])
+        collections = [inst.makeDefaultRawIngestRunName()
+                       for inst in (StarTrackerWide, StarTrackerNarrow, StarTrackerFast)]
+
+        dataIds = [ref.dataId for ref in refs]
+        exposures = list(prefetchRaws(self.butler, dataIds, collections=collections, nThreads=2))
+        expected = sorted(dataIds, key=lambda dataId: (dataId["exposure"], dataId["instrument"]))
+
+        self.assertEqual(len(exposures), len(dataIds))
+        for dataId, exposure in zip(expected, exposures):
+            self.assertEqual(exposure.getInfo().getVisitInfo().instrumentLabel, dataId["instrument"])
+
+
+@unittest.skipIf(testDataDirectory is None, "obs_rubinGenericCamera must be set up")
+class RawReadTestCase(lsst.utils.tests.TestCase):
+    """Test the pixel type and cutouts of raws read from single-frame
+    files, bursts, and shared memory"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+        rawFile = os.path.join(testDataDirectory, "data", "input", "raw", "GC103_O_20221208_000211.fits.gz")
+        with pyfits.open(rawFile) as hdul:
+            primary = hdul[0].header.copy()
+            self.frame = hdul[1].data.copy()
+        self.singlePath = os.path.join(self.root, "GC103_O_20221208_000211.fits")
+        pyfits.HDUList([pyfits.PrimaryHDU(header=primary),
+                        pyfits.ImageHDU(self.frame)]).writeto(self.singlePath)
+
+        primary["OBSID"] = "GC103_O_20221208_000212"
+        primary["SEQNUM"] = 212
+        primary["NFRAMES"] = 3
+        self.burstPath = os.path.join(self.root, "GC103_O_20221208_000212.fits")
+        cube = np.stack([self.frame + i for i in range(3)])
+        pyfits.HDUList([pyfits.PrimaryHDU(header=primary), pyfits.ImageHDU(cube)]).writeto(self.burstPath)
+
+        self.dataIds = dict(single=dict(instrument="StarTrackerFast", exposure=2022120800211, detector=0),
+                            burst=dict(instrument="StarTrackerFast", exposure=2022120800212, detector=0))
+        self.bbox = lsst.geom.Box2I(lsst.geom.Point2I(100, 200), lsst.geom.Extent2I(30, 20))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def ingest(self, compact):
+        """Ingest both files into a new repository, returning its butler"""
+        repo = os.path.join(self.root, "compact" if compact else "float")
+        Butler.makeRepo(repo)
+        butler = Butler(repo, writeable=True, run="raw")
+        StarTrackerFast().register(butler.registry)
+
+        config = StarTrackerRawIngestTask.ConfigClass()
+        config.transfer = "direct"
+        config.compactRaws = compact
+        StarTrackerRawIngestTask(config=config, butler=butler).run([self.singlePath, self.burstPath])
+
+        return butler
+
+    def checkReads(self, butler, dataId, dtype):
+        full = butler.get("raw", dataId)
+        self.assertEqual(full.image.array.dtype, dtype)
+        np.testing.assert_array_equal(full.image.array, self.frame)
+
+        for origin in (lsst.afw.image.PARENT, lsst.afw.image.LOCAL):
+            with self.subTest(origin=origin):
+                cutout = butler.get("raw", dataId, parameters=dict(bbox=self.bbox, origin=origin))
+                self.assertEqual(cutout.image.array.dtype, dtype)
+                self.assertEqual(cutout.getBBox(), self.bbox)
+                self.assertImagesEqual(cutout.image, full.image[self.bbox])
+
+    def testReads(self):
+        for compact, dtype in ((False, np.float32), (True, np.uint16)):
+            butler = self.ingest(compact)
+            for kind in ("single", "burst"):
+                with self.subTest(compact=compact, kind=kind):
+                    self.checkReads(butler, self.dataIds[kind], dtype)
+
+            with self.subTest(compact=compact, kind="shared"):
+                with SharedFrame.publish(self.singlePath) as published:
+                    try:
+                        with unittest.mock.patch.dict(os.environ, {SHARED_FRAMES_ENV: "1"}):
+                            self.checkReads(butler, self.dataIds["single"], dtype)
+                    finally:
+                        published.unlink()
+
+
 def setup_module(module):
     lsst.utils.tests.init()
 
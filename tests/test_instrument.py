@@ -1,6 +1,8 @@
 """Tests of the RubinGenericCamera instrument class.
 """
 
+import os
+import tempfile
 import unittest
 
 import lsst.utils.tests
@@ -41,6 +43,25 @@ class TestStarTrackerFast(InstrumentTests, lsst.utils.tests.TestCase):
         self.instrument = lsst.obs.rubinGenericCamera.StarTrackerFast()
 
 
+class CameraCacheTestCase(lsst.utils.tests.TestCase):
+    def tearDown(self):
+        lsst.obs.rubinGenericCamera.StarTrackerFast.cameraCacheDir = None
+
+    def testCameraIsCached(self):
+        cls = lsst.obs.rubinGenericCamera.StarTrackerFast
+        self.assertIs(cls.getCamera(), cls.getCamera())
+
+    def testPersistedCamera(self):
+        cls = lsst.obs.rubinGenericCamera.StarTrackerFast
+        with tempfile.TemporaryDirectory() as cacheDir:
+            camera = lsst.obs.rubinGenericCamera._instrument._readPersistedCamera(
+                os.path.join(lsst.obs.rubinGenericCamera._instrument.PACKAGE_DIR, "policy",
+                             f"{cls.policyName}.yaml"), cacheDir)
+            self.assertEqual(len(os.listdir(cacheDir)), 1)
+            self.assertEqual(camera.getName(), "StarTrackerFast")
+            self.assertEqual([det.getName() for det in camera], ["CCD0"])
+
+
 if __name__ == '__main__':
     lsst.utils.tests.init()
     unittest.main()
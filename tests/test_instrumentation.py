@@ -0,0 +1,123 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import glob
+import multiprocessing
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import lsst.obs.rubinGenericCamera
+from lsst.obs.rubinGenericCamera import instrumentation
+
+
+def _countInWorker(n):
+    instrumentation.incrementCounter("worker", n)
+    return os.getpid()
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    """Test the opt-in timers and counters"""
+
+    def setUp(self):
+        self.wasEnabled = instrumentation.isEnabled()
+        instrumentation.reset()
+
+    def tearDown(self):
+        if not self.wasEnabled:
+            instrumentation.disable()
+        instrumentation.reset()
+
+    def testDisabled(self):
+        instrumentation.disable()
+
+        @instrumentation.timed("func")
+        def func(x):
+            return 2 * x
+
+        self.assertEqual(func(1), 2)
+        instrumentation.incrementCounter("counter")
+        self.assertEqual(instrumentation.getReport()["timers"], {})
+        self.assertEqual(instrumentation.getReport()["counters"], {})
+
+    def testReport(self):
+        instrumentation.enable()
+
+        @instrumentation.timed("func")
+        def func(x):
+            return 2 * x
+
+        for i in range(3):
+            func(i)
+        with instrumentation.timer("block"):
+            pass
+        instrumentation.incrementCounter("bytes", 100)
+        instrumentation.incrementCounter("bytes", 20)
+
+        report = instrumentation.getReport()
+        self.assertEqual(report["timers"]["func"]["nCall"], 3)
+        self.assertEqual(report["timers"]["block"]["nCall"], 1)
+        self.assertEqual(report["counters"], dict(bytes=120))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "metrics-{pid}.prom")
+            instrumentation.writePrometheus(filename)
+            with open(filename.replace("{pid}", str(os.getpid()))) as fd:
+                text = fd.read()
+        self.assertIn('rubin_generic_camera_call_seconds_count{name="func",pid="%d"} 3' % os.getpid(), text)
+        self.assertIn('rubin_generic_camera_events_total{name="bytes",pid="%d"} 120' % os.getpid(), text)
+
+    def testCameraCache(self):
+        instrumentation.enable()
+        for i in range(2):
+            lsst.obs.rubinGenericCamera.StarTrackerWide.getCamera()
+
+        self.assertGreaterEqual(instrumentation.getReport()["counters"].get("camera.cacheHit", 0), 1)
+
+    def testPoolWorkers(self):
+        instrumentation.enable()
+        instrumentation.incrementCounter("parent")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "metrics-{pid}.prom")
+            with unittest.mock.patch.dict(os.environ, {"RUBIN_GENERIC_CAMERA_METRICS_FILE": filename}):
+                context = multiprocessing.get_context("fork")
+                pool = context.Pool(2, initializer=instrumentation.initializeWorker)
+                try:
+                    pids = set(pool.map(_countInWorker, [1] * 10, chunksize=1))
+                finally:
+                    pool.close()
+                    pool.join()
+
+            text = ""
+            for pid in pids:
+                with open(filename.replace("{pid}", str(pid))) as fd:
+                    text += fd.read()
+            self.assertEqual(len(glob.glob(os.path.join(tmpdir, "*.prom"))), len(pids))
+
+        total = sum(int(line.split()[-1]) for line in text.splitlines() if 'name="worker"' in line)
+        self.assertEqual(total, 10)
+        self.assertNotIn('name="parent"', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
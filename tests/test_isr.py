@@ -0,0 +1,77 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+import numpy as np
+
+import lsst.afw.image as afwImage
+import lsst.geom as geom
+import lsst.utils.tests
+from lsst.obs.rubinGenericCamera import StarTrackerFast
+from lsst.obs.rubinGenericCamera.isr import StarTrackerIsrTask
+
+
+class StarTrackerIsrTestCase(lsst.utils.tests.TestCase):
+    """Test the minimal star tracker ISR"""
+
+    def setUp(self):
+        self.detector = StarTrackerFast.getCamera()[0]
+        self.raw = afwImage.ExposureU(self.detector.getBBox())
+        self.raw.setDetector(self.detector)
+        self.raw.image.array[:] = 1000
+        self.raw.image.array[10, 20] = 65535
+
+    def testRun(self):
+        config = StarTrackerIsrTask.ConfigClass()
+        config.doBias = True
+        bias = afwImage.ExposureF(self.detector.getBBox())
+        bias.image.array[:] = 100.0
+
+        exposure = StarTrackerIsrTask(config=config).run(self.raw, bias=bias).exposure
+
+        self.assertIsInstance(exposure, afwImage.ExposureF)
+        satBit = exposure.mask.getPlaneBitMask("SAT")
+        self.assertEqual(np.sum((exposure.mask.array & satBit) != 0), 1)
+        self.assertTrue(exposure.mask.array[10, 20] & satBit)
+        self.assertEqual(exposure.image.array[0, 0], 900.0)
+
+        amp = self.detector[0]
+        self.assertAlmostEqual(exposure.variance.array[0, 0],
+                               900.0 / amp.getGain() + (amp.getReadNoise() / amp.getGain())**2, places=3)
+
+    def testCutout(self):
+        bbox = geom.Box2I(geom.Point2I(15, 5), geom.Extent2I(10, 10))
+        exposure = StarTrackerIsrTask().run(self.raw[bbox]).exposure
+
+        self.assertEqual(exposure.getBBox(), bbox)
+        self.assertTrue(exposure.mask[geom.Point2I(20, 10)] & exposure.mask.getPlaneBitMask("SAT"))
+
+    def testMissingBias(self):
+        config = StarTrackerIsrTask.ConfigClass()
+        config.doBias = True
+        with self.assertRaises(RuntimeError):
+            StarTrackerIsrTask(config=config).run(self.raw)
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
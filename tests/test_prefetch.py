@@ -0,0 +1,87 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from lsst.obs.rubinGenericCamera.prefetch import prefetch
+
+
+class PrefetchTestCase(unittest.TestCase):
+    """Test reading items ahead in a pool of threads"""
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.started = []
+        self.active = 0
+        self.maxActive = 0
+
+    def read(self, i):
+        """Return a 1 kB array, taking longer for earlier items so that
+        they finish out of order"""
+        with self.lock:
+            self.started.append(i)
+            self.active += 1
+            self.maxActive = max(self.maxActive, self.active)
+        time.sleep(0.01 * (i % 3))
+        with self.lock:
+            self.active -= 1
+        if i == 13:
+            raise ValueError("unlucky")
+        return np.full(1000, i, dtype=np.uint8)
+
+    def testOrder(self):
+        results = [int(a[0]) for a in prefetch(range(12), self.read, nThreads=4, maxAhead=6)]
+        self.assertEqual(results, list(range(12)))
+        self.assertLessEqual(self.maxActive, 4)
+        self.assertGreater(self.maxActive, 1)
+
+    def testMaxAhead(self):
+        for i, a in enumerate(prefetch(range(12), self.read, nThreads=4, maxAhead=3)):
+            time.sleep(0.02)            # let the threads catch up
+            self.assertLessEqual(len(self.started), i + 1 + 3)
+
+    def testMaxBytes(self):
+        # Once the size of an item is known only two fit in the budget
+        for i, a in enumerate(prefetch(range(8), self.read, nThreads=4, maxAhead=6, maxBytes=2000)):
+            time.sleep(0.02)
+            self.assertLessEqual(len(self.started), i + 1 + 2)
+
+    def testError(self):
+        results = []
+        with self.assertRaises(ValueError):
+            for a in prefetch(range(10, 20), self.read, nThreads=2):
+                results.append(int(a[0]))
+        self.assertEqual(results, [10, 11, 12])
+
+    def testEarlyExit(self):
+        for i, a in enumerate(prefetch(range(100), self.read, nThreads=2, maxAhead=4)):
+            if i == 1:
+                break
+        self.assertLess(len(self.started), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
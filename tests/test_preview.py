@@ -0,0 +1,94 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+import numpy as np
+
+from lsst.obs.rubinGenericCamera.preview import (binImage, getPreviewPath, makePreview, stretchImage,
+                                                 writePreview)
+
+TESTDIR = os.path.abspath(os.path.dirname(__file__))
+RAWDIR = os.path.join(TESTDIR, os.path.pardir, "data", "input", "raw")
+
+
+def readPng(path):
+    """Read an 8-bit greyscale PNG written by writePng"""
+    with open(path, "rb") as fd:
+        data = fd.read()
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+
+    chunks = {}
+    i = 8
+    while i < len(data):
+        length, = struct.unpack(">I", data[i:i + 4])
+        chunks[data[i + 4:i + 8]] = data[i + 8:i + 8 + length]
+        i += 12 + length
+    width, height = struct.unpack(">II", chunks[b"IHDR"][:8])
+    rows = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8).reshape(height, width + 1)
+
+    return rows[::-1, 1:]
+
+
+class PreviewTestCase(unittest.TestCase):
+    """Test making previews of raws"""
+
+    def testBinImage(self):
+        array = np.arange(7 * 10, dtype=np.uint16).reshape(7, 10)
+        binned = binImage(array, 3)
+
+        self.assertEqual(binned.shape, (2, 3))
+        self.assertEqual(binned.dtype, np.float32)
+        self.assertEqual(binned[1, 2], array[3:6, 6:9].mean())
+
+    def testStretch(self):
+        rng = np.random.default_rng(42)
+        array = rng.normal(1000, 10, (50, 60)).astype(np.float32)
+        array[25, 30] = 60000             # a bright star
+        stretched = stretchImage(array)
+
+        self.assertEqual(stretched.dtype, np.uint8)
+        self.assertEqual(stretched[25, 30], 255)
+        self.assertGreater(np.ptp(stretched), 100)
+        self.assertEqual(makePreview(array, binFactor=2).shape, (25, 30))
+
+    def testGetPreviewPath(self):
+        self.assertEqual(getPreviewPath("/raw/GC101_O_20221208_000211.fits.gz"),
+                         "/raw/GC101_O_20221208_000211.png")
+        self.assertEqual(getPreviewPath("/raw/GC101_O_20221208_000211.fits", "/previews"),
+                         "/previews/GC101_O_20221208_000211.png")
+
+    def testWritePreview(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            previewPath = os.path.join(tmpdir, "preview.png")
+            writePreview(os.path.join(RAWDIR, "GC103_O_20221208_000211.fits.gz"), previewPath, binFactor=4)
+            preview = readPng(previewPath)
+
+        self.assertEqual(preview.shape, (493 // 4, 659 // 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+import numpy as np
+
+import lsst.afw.image as afwImage
+import lsst.utils.tests
+from lsst.obs.rubinGenericCamera.runningStats import RunningStatistics, StarTrackerRunningStatsTask
+
+SHAPE = (20, 30)
+
+
+class RunningStatisticsTestCase(lsst.utils.tests.TestCase):
+    """Test accumulating per-pixel statistics of many frames"""
+
+    def setUp(self):
+        rng = np.random.default_rng(54321)
+        self.frames = rng.normal(1000.0, 10.0, (50,) + SHAPE).astype(np.uint16)
+        self.frames[:, 3, 4] += 500             # a hot pixel
+
+    def testStatistics(self):
+        for chunkSize in (1, 7, len(self.frames)):
+            with self.subTest(chunkSize=chunkSize):
+                stats = RunningStatistics(SHAPE)
+                for i in range(0, len(self.frames), chunkSize):
+                    stats.add(self.frames[i:i + chunkSize])
+
+                self.assertEqual(stats.nFrame, len(self.frames))
+                np.testing.assert_allclose(stats.mean, self.frames.mean(axis=0))
+                np.testing.assert_allclose(stats.variance, self.frames.var(axis=0, ddof=1))
+                np.testing.assert_array_equal(stats.min, self.frames.min(axis=0))
+                np.testing.assert_array_equal(stats.max, self.frames.max(axis=0))
+
+    def testClipping(self):
+        frames = self.frames.astype(float)
+        frames[-1, 10, 10] = 1e5               # e.g. a cosmic ray
+        stats = RunningStatistics(SHAPE, nSigma=5.0, minClipFrames=10)
+        for frame in frames:
+            stats.add(frame)
+
+        self.assertEqual(stats.count[10, 10], len(frames) - 1)
+        self.assertAlmostEqual(stats.mean[10, 10], frames[:-1, 10, 10].mean())
+        self.assertLess(stats.max[10, 10], 1e5)
+
+    def testConstantPixel(self):
+        frames = self.frames.astype(float)
+        frames[:20, 5, 6] = 1000.0              # no scatter yet, so sigma == 0
+        stats = RunningStatistics(SHAPE, nSigma=5.0, minClipFrames=10)
+        stats.add(frames)
+
+        self.assertEqual(stats.count[5, 6], len(frames))
+        self.assertAlmostEqual(stats.mean[5, 6], frames[:, 5, 6].mean())
+
+    def testSequenceOfFrames(self):
+        stats = RunningStatistics(SHAPE)
+        stats.add(list(self.frames))
+        np.testing.assert_allclose(stats.mean, self.frames.mean(axis=0))
+        with self.assertRaises(ValueError):
+            stats.add(np.zeros((2, 3)))
+
+    def testHotPixels(self):
+        stats = RunningStatistics(SHAPE)
+        stats.add(self.frames)
+        hot = stats.hotPixels()
+        self.assertEqual(list(zip(*np.where(hot))), [(3, 4)])
+
+    def testTask(self):
+        exposures = []
+        for frame in self.frames:
+            exposure = afwImage.ExposureF(SHAPE[1], SHAPE[0])
+            exposure.image.array[:] = frame
+            exposures.append(exposure)
+
+        result = StarTrackerRunningStatsTask().run(iter(exposures))
+        np.testing.assert_allclose(result.meanImage.image.array, self.frames.mean(axis=0), rtol=1e-6)
+        badBit = result.meanImage.mask.getPlaneBitMask("BAD")
+        self.assertEqual(np.sum((result.meanImage.mask.array & badBit) != 0), 1)
+        np.testing.assert_array_equal(result.maxImage.array, self.frames.max(axis=0))
+
+        with self.assertRaises(RuntimeError):
+            StarTrackerRunningStatsTask().run([])
+
+    def testTaskNoData(self):
+        exposures = []
+        for frame in self.frames[:3]:
+            exposure = afwImage.ExposureF(SHAPE[1], SHAPE[0])
+            exposure.image.array[:] = frame
+            exposure.image.array[7, 8] = np.nan
+            exposures.append(exposure)
+
+        result = StarTrackerRunningStatsTask().run(exposures)
+        noData = (result.meanImage.mask.array & result.meanImage.mask.getPlaneBitMask("NO_DATA")) != 0
+        self.assertEqual(list(zip(*np.where(noData))), [(7, 8)])
+        self.assertTrue(np.isnan(result.meanImage.image.array[7, 8]))
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,194 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import gc
+import gzip
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import numpy as np
+
+import lsst.geom as geom
+import lsst.utils.tests
+from lsst.daf.butler import Butler
+from lsst.obs.rubinGenericCamera import StarTrackerFast
+from lsst.obs.rubinGenericCamera import instrumentation
+from lsst.obs.rubinGenericCamera.burst import BurstFrames
+from lsst.obs.rubinGenericCamera.ingest import StarTrackerRawIngestTask
+from lsst.obs.rubinGenericCamera.sharedFrame import SHARED_FRAMES_ENV, SharedFrame, getSharedFrameName
+
+TESTDIR = os.path.abspath(os.path.dirname(__file__))
+RAWDIR = os.path.join(TESTDIR, os.path.pardir, "data", "input", "raw")
+
+
+def _sumFrame(name):
+    """Return the sum of a published frame's pixels, from another process"""
+    with SharedFrame.attach(name) as frame:
+        return int(frame.array.sum(dtype=np.int64))
+
+
+class SharedFrameTestCase(lsst.utils.tests.TestCase):
+    """Test handing frames to other processes in shared memory"""
+
+    def setUp(self):
+        self.path = os.path.join(RAWDIR, "GC103_O_20221208_000211.fits.gz")
+        self.name = f"{getSharedFrameName(self.path)}_{os.getpid()}"
+        self.published = SharedFrame.publish(self.path, name=self.name)
+        with BurstFrames(self.path) as frames:
+            self.expected = frames[0].array
+
+    def tearDown(self):
+        self.published.close()
+        self.published.unlink()
+
+    def testName(self):
+        self.assertEqual(getSharedFrameName("/raw/GC103_O_20221208_000211.fits.gz"),
+                         "rgc_GC103_O_20221208_000211")
+
+    def testAttach(self):
+        with SharedFrame.attach(self.name) as frame:
+            self.assertFalse(frame.owner)
+            np.testing.assert_array_equal(frame.array, self.expected)
+            self.assertEqual(frame.metadata["OBSID"], "GC103_O_20221208_000211")
+            self.assertEqual(frame.observationInfo.instrument, "StarTrackerFast")
+            self.assertEqual(frame.detector.getId(), 0)
+
+            bbox = geom.Box2I(geom.Point2I(100, 200), geom.Extent2I(30, 20))
+            cutout = frame.makeImage(bbox)
+            self.assertEqual(cutout.getBBox(), bbox)
+            np.testing.assert_array_equal(cutout.array, self.expected[200:220, 100:130])
+            del cutout
+
+    def testCopyOnWrite(self):
+        with SharedFrame.attach(self.name) as frame:
+            image = frame.makeImage()
+            image.array[...] = 0
+        # The image outlives the frame, and the changes stay in this process
+        gc.collect()
+        self.assertEqual(image.array.sum(), 0)
+        with SharedFrame.attach(self.name) as frame:
+            np.testing.assert_array_equal(frame.array, self.expected)
+        np.testing.assert_array_equal(self.published.array, self.expected)
+
+    def testCopyWithoutDevShm(self):
+        # Where blocks aren't files in /dev/shm the pixels are copied
+        with unittest.mock.patch("lsst.obs.rubinGenericCamera.sharedFrame._SHM_DIR",
+                                 os.path.join(TESTDIR, "noSuchDir")):
+            with SharedFrame.attach(self.name) as frame:
+                np.testing.assert_array_equal(frame.array, self.expected)
+                frame.array[...] = 0
+        np.testing.assert_array_equal(self.published.array, self.expected)
+
+    def testPath(self):
+        with SharedFrame.attach(self.name, path=self.path) as frame:
+            self.assertEqual(frame.path, os.path.abspath(self.path))
+        with self.assertRaises(FileNotFoundError):
+            SharedFrame.attach(self.name, path="/elsewhere/GC103_O_20221208_000211.fits.gz")
+
+    def testOtherProcess(self):
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            total = pool.apply(_sumFrame, (self.name,))
+        self.assertEqual(total, int(self.expected.sum(dtype=np.int64)))
+
+        # The block must survive the other process exiting
+        with SharedFrame.attach(self.name) as frame:
+            np.testing.assert_array_equal(frame.array, self.expected)
+
+    def testMissing(self):
+        with self.assertRaises(FileNotFoundError):
+            SharedFrame.attach("rgc_noSuchFrame")
+        with self.assertRaises(FileExistsError):
+            SharedFrame.publish(self.path, name=self.name)
+
+
+class SharedFrameFormatterTestCase(lsst.utils.tests.TestCase):
+    """Test the raw formatter's use of published frames"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        Butler.makeRepo(self.root)
+        self.butler = Butler(self.root, writeable=True, run="raw")
+        StarTrackerFast().register(self.butler.registry)
+
+        self.path = os.path.join(self.root, "GC103_O_20221208_000211.fits")
+        with gzip.open(os.path.join(RAWDIR, "GC103_O_20221208_000211.fits.gz"), "rb") as fd:
+            with open(self.path, "wb") as out:
+                out.write(fd.read())
+        config = StarTrackerRawIngestTask.ConfigClass()
+        config.transfer = "direct"
+        StarTrackerRawIngestTask(config=config, butler=self.butler).run([self.path])
+        self.dataId = dict(instrument="StarTrackerFast", exposure=2022120800211, detector=0)
+        self.expected = self.butler.get("raw", self.dataId).image.array
+
+        self.wasEnabled = instrumentation.isEnabled()
+        instrumentation.enable()
+        instrumentation.reset()
+        patcher = unittest.mock.patch.dict(os.environ, {SHARED_FRAMES_ENV: "1"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        if not self.wasEnabled:
+            instrumentation.disable()
+        instrumentation.reset()
+
+    def publish(self, path):
+        published = SharedFrame.publish(path)
+        self.addCleanup(published.unlink)
+        self.addCleanup(published.close)
+
+    def testHit(self):
+        self.publish(self.path)
+        exposure = self.butler.get("raw", self.dataId)
+        np.testing.assert_array_equal(exposure.image.array, self.expected)
+        self.assertEqual(exposure.getDetector().getId(), 0)
+        self.assertEqual(instrumentation.getReport()["counters"].get("rawFormatter.sharedFrameHit"), 1)
+
+        del exposure
+        gc.collect()                    # mustn't raise BufferError
+
+    def testOtherFileOfSameName(self):
+        otherDir = os.path.join(self.root, "other")
+        os.mkdir(otherDir)
+        other = os.path.join(otherDir, os.path.basename(self.path))
+        shutil.copy(self.path, other)
+        self.publish(other)
+
+        exposure = self.butler.get("raw", self.dataId)
+        np.testing.assert_array_equal(exposure.image.array, self.expected)
+        counters = instrumentation.getReport()["counters"]
+        self.assertNotIn("rawFormatter.sharedFrameHit", counters)
+        self.assertGreaterEqual(counters.get("rawFormatter.sharedFrameMiss", 0), 1)
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,71 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import astropy.io.fits as pyfits
+
+from lsst.obs.rubinGenericCamera.fitsUtils import TILE, getFitsCompression
+from lsst.obs.rubinGenericCamera.transcode import findRawFiles, transcodeFiles
+
+TESTDIR = os.path.abspath(os.path.dirname(__file__))
+RAWDIR = os.path.normpath(os.path.join(TESTDIR, os.path.pardir, "data", "input", "raw"))
+
+
+class TranscodeTestCase(unittest.TestCase):
+    """Test converting gzipped raws to tile-compressed FITS"""
+
+    def setUp(self):
+        self.outputDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.outputDir, ignore_errors=True)
+
+    def testTranscode(self):
+        files = findRawFiles(RAWDIR)
+        self.assertEqual(len(files), 3)
+
+        manifest = os.path.join(self.outputDir, "manifest.json")
+        entries = transcodeFiles(files, RAWDIR, self.outputDir, processes=2, manifest=manifest)
+        self.assertEqual([e["status"] for e in entries], ["ok"] * 3)
+        with open(manifest) as fd:
+            self.assertEqual(json.load(fd), entries)
+
+        for entry in entries:
+            self.assertTrue(entry["output"].endswith(".fits.fz"))
+            self.assertEqual(getFitsCompression(entry["output"]), TILE)
+            with pyfits.open(entry["input"]) as old, pyfits.open(entry["output"]) as new:
+                self.assertTrue(np.array_equal(old[1].data, new[1].data))
+                self.assertEqual(old[0].header["OBSID"], new[0].header["OBSID"])
+                self.assertNotEqual(new[1].header["DATASUM"], "")
+
+        # Existing files are left alone
+        entries = transcodeFiles(files, RAWDIR, self.outputDir)
+        self.assertEqual([e["status"] for e in entries], ["exists"] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,10 +22,17 @@
 import os.path
 import unittest
 import astropy.units as u
-from lsst.obs.rubinGenericCamera.translator import StarTrackerNarrowTranslator, \
-    StarTrackerWideTranslator, StarTrackerFastTranslator   # noqa: F401 -- register the translators
 
-from astro_metadata_translator.tests import MetadataAssertHelper
+from astro_metadata_translator import ObservationInfo
+from astro_metadata_translator.tests import MetadataAssertHelper, read_test_file
+import lsst.obs.rubinGenericCamera
+from lsst.obs.rubinGenericCamera import (RubinGenericCamera, StarTrackerNarrow, StarTrackerWide,
+                                         StarTrackerFast, rawFormatter, translator)
+from lsst.obs.rubinGenericCamera.cameras import GENERIC_CAMERAS, getCameraDefinition
+from lsst.obs.rubinGenericCamera.translator import (RubinGenericCameraTranslator, StarTrackerNarrowTranslator,
+                                                    StarTrackerWideTranslator, StarTrackerFastTranslator,
+                                                    parseStarTrackerFilename, findStarTrackerTranslator,
+                                                    findStarTrackerTranslatorForHeader)
 
 TESTDIR = os.path.abspath(os.path.dirname(__file__))
 
@@ -123,5 +130,109 @@ class RubinGenericCameraMetadataTranslatorTestCase(unittest.TestCase, MetadataAs
                 self.assertObservationInfoFromYaml(filename, dir=self.datadir, **expected)
 
 
+class BatchTranslationTestCase(unittest.TestCase):
+    """Test translating many headers at once"""
+
+    datadir = os.path.join(TESTDIR, "headers")
+
+    def test_translate_headers(self):
+        filenames = [f"GC10{i}_O_20221208_000211.yaml" for i in (1, 2, 3)]
+        headers = [read_test_file(f, dir=self.datadir) for f in filenames]
+        table = RubinGenericCameraTranslator.translate_headers(headers, filenames=filenames)
+
+        self.assertEqual(len(table), len(headers))
+        for row, header in zip(table, headers):
+            obsInfo = ObservationInfo(header)
+            with self.subTest(observation_id=obsInfo.observation_id):
+                self.assertEqual(row["observation_id"], obsInfo.observation_id)
+                self.assertEqual(row["instrument"], obsInfo.instrument)
+                self.assertEqual(row["exposure_id"], obsInfo.exposure_id)
+                self.assertEqual(row["day_obs"], obsInfo.observing_day)
+                self.assertEqual(row["seq_num"], obsInfo.observation_counter)
+                self.assertEqual(row["group_id"], obsInfo.exposure_group)
+                self.assertAlmostEqual(row["datetime_begin"].mjd, obsInfo.datetime_begin.mjd)
+                self.assertEqual(row["exposure_time"], obsInfo.exposure_time)
+                self.assertEqual(row["dark_time"], obsInfo.dark_time)
+
+    def test_missing_exposure_time(self):
+        header = read_test_file("GC103_O_20221208_000211.yaml", dir=self.datadir)
+        del header["EXPTIME"]
+        table = RubinGenericCameraTranslator.translate_headers([header])
+        self.assertEqual(table["exposure_time"][0], -1.0 * u.s)
+        self.assertEqual(table["dark_time"][0], -1.0 * u.s)
+
+    def test_scalar_fallback(self):
+        headers = [read_test_file(f"GC10{i}_O_20221208_000211.yaml", dir=self.datadir) for i in (1, 2, 3)]
+        del headers[0]["DAYOBS"]        # can be derived from the date
+        headers[1]["SEQNUM"] = 100000   # too large for an exposure ID
+        table = RubinGenericCameraTranslator.translate_headers(headers)
+
+        obsInfo = ObservationInfo(headers[0], pedantic=False)
+        self.assertEqual(table["exposure_id"][0], -1 if obsInfo.exposure_id is None else obsInfo.exposure_id)
+        self.assertEqual(table["exposure_id"][1], -1)
+        # The other headers are unaffected
+        self.assertEqual(table["exposure_id"][2], ObservationInfo(headers[2]).exposure_id)
+
+
+class StarTrackerFilenameTestCase(unittest.TestCase):
+    """Test choosing translators from filenames"""
+
+    def test_parse(self):
+        self.assertEqual(parseStarTrackerFilename("/data/GC103_O_20221208_000211.fits.gz"),
+                         dict(camCode="GC", camId=103, controller="O", dayObs=20221208, seqNum=211))
+        self.assertIsNone(parseStarTrackerFilename("GC103_O_20221208_000211.yaml"))
+
+    def test_dispatch(self):
+        for filename, translatorClass in [
+                ("GC101_O_20221208_000211.fits.gz", StarTrackerWideTranslator),
+                ("GC102_O_20221208_000211.fits", StarTrackerNarrowTranslator),
+                ("GC103_O_20221208_000211.fits.fz", StarTrackerFastTranslator),
+                ("GC104_O_20221208_000211.fits", None),
+                ("AT_O_20221208_000211.fits", None),
+                ("MC_O_20221208_000211_R22_S11.fits", None),
+        ]:
+            with self.subTest(filename=filename):
+                self.assertIs(findStarTrackerTranslator(filename, readHeader=False), translatorClass)
+
+    def test_header_dispatch(self):
+        header = dict(INSTRUME="StarTracker", OBSID="GC102_O_20221208_000211")
+        self.assertIs(findStarTrackerTranslatorForHeader(header), StarTrackerNarrowTranslator)
+        self.assertTrue(StarTrackerNarrowTranslator.can_translate(header))
+        self.assertFalse(StarTrackerWideTranslator.can_translate(header))
+        for header in (dict(INSTRUME="StarTracker", OBSID="GC104_O_20221208_000211"),
+                       dict(INSTRUME="StarTracker", OBSID="GCxyz"),
+                       dict(INSTRUME="LATISS", OBSID="AT_O_20221208_000211")):
+            with self.subTest(header=header):
+                self.assertIsNone(findStarTrackerTranslatorForHeader(header))
+
+
+class GenericCameraRegistryTestCase(unittest.TestCase):
+    """Test the classes generated from the table of generic cameras"""
+
+    def test_generated_classes(self):
+        for camera in GENERIC_CAMERAS:
+            with self.subTest(camera=camera.name):
+                translatorClass = getattr(translator, f"{camera.name}Translator")
+                instrumentClass = getattr(lsst.obs.rubinGenericCamera, camera.name)
+                formatterClass = getattr(rawFormatter, f"{camera.name}RawFormatter")
+
+                self.assertIs(getCameraDefinition(camera.cameraId), camera)
+                self.assertEqual(translatorClass.supported_instrument, camera.name)
+                self.assertEqual(translatorClass.cameraId, camera.cameraId)
+                self.assertEqual(instrumentClass.policyName, camera.policyName)
+                self.assertIs(instrumentClass.translatorClass, translatorClass)
+                self.assertIs(instrumentClass().getRawFormatter({}), formatterClass)
+                self.assertIs(formatterClass.cameraClass, instrumentClass)
+                # The butler records formatters by their full names
+                self.assertEqual(f"{formatterClass.__module__}.{formatterClass.__qualname__}",
+                                 f"lsst.obs.rubinGenericCamera.rawFormatter.{camera.name}RawFormatter")
+
+    def test_instrument_hierarchy(self):
+        self.assertTrue(issubclass(StarTrackerNarrow, RubinGenericCamera))
+        for instrumentClass in (StarTrackerWide, StarTrackerFast):
+            with self.subTest(instrument=instrumentClass.__name__):
+                self.assertIsInstance(instrumentClass(), StarTrackerNarrow)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,98 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import types
+import unittest
+
+from lsst.obs.base import VisitSystem
+from lsst.obs.rubinGenericCamera.visits import (StarTrackerDefineVisitsConfig, StarTrackerGroupExposuresTask,
+                                                groupExposureSequences)
+
+
+def makeExposure(seqNum, seqStart, seqEnd, dayObs=20221208, group="", instrument="StarTrackerFast"):
+    """Make something that looks enough like an exposure record"""
+    return types.SimpleNamespace(instrument=instrument, id=dayObs * 100000 + seqNum, day_obs=dayObs,
+                                 seq_num=seqNum, seq_start=seqStart, seq_end=seqEnd, group=group,
+                                 obs_id=f"GC103_O_{dayObs}_{seqNum:06d}")
+
+
+class VisitsTestCase(unittest.TestCase):
+    """Test grouping star tracker exposures into visits"""
+
+    def setUp(self):
+        # A sequence of three, a single exposure, and a sequence of two on
+        # the next day, given out of order
+        self.exposures = [makeExposure(12, 10, 12), makeExposure(20, 20, 20),
+                          makeExposure(2, 1, 2, dayObs=20221209), makeExposure(10, 10, 12),
+                          makeExposure(1, 1, 2, dayObs=20221209), makeExposure(11, 10, 12)]
+
+    def testGroupExposureSequences(self):
+        sequences = groupExposureSequences(self.exposures)
+
+        self.assertEqual(list(sequences), [(20221208, 10, 12, ""), (20221208, 20, 20, ""),
+                                           (20221209, 1, 2, "")])
+        self.assertEqual([[e.seq_num for e in sequence] for sequence in sequences.values()],
+                         [[10, 11, 12], [20], [1, 2]])
+
+    def testGroup(self):
+        task = StarTrackerGroupExposuresTask()
+        visits = {visit.id: visit for visit in task.group(self.exposures)}
+
+        # A one-to-one visit for each exposure, and one for each of the two
+        # multi-exposure sequences
+        self.assertEqual(len(visits), len(self.exposures) + 2)
+        sequence = visits[2022120800010]
+        self.assertEqual(sequence.visit_systems, {VisitSystem.BY_SEQ_START_END})
+        self.assertEqual([e.seq_num for e in sequence.exposures], [10, 11, 12])
+        first = visits[92022120800010]
+        self.assertEqual(first.visit_systems, {VisitSystem.ONE_TO_ONE})
+        self.assertEqual(first.name, "GC103_O_20221208_000010_first")
+        self.assertEqual([e.seq_num for e in first.exposures], [10])
+        self.assertEqual(visits[2022120800011].visit_systems, {VisitSystem.ONE_TO_ONE})
+        self.assertEqual(visits[2022120800020].visit_systems,
+                         {VisitSystem.ONE_TO_ONE, VisitSystem.BY_SEQ_START_END})
+        self.assertEqual(task.getVisitSystems(), {VisitSystem.ONE_TO_ONE, VisitSystem.BY_SEQ_START_END})
+
+    def testGroupPartialSequence(self):
+        task = StarTrackerGroupExposuresTask()
+
+        # Only the first exposure of a sequence of three has been ingested
+        visits = {visit.id: visit for visit in task.group([makeExposure(10, 10, 12)])}
+        self.assertEqual(set(visits), {2022120800010, 92022120800010})
+        self.assertEqual(visits[2022120800010].visit_systems, {VisitSystem.BY_SEQ_START_END})
+        self.assertEqual(visits[92022120800010].visit_systems, {VisitSystem.ONE_TO_ONE})
+
+        # The first exposure is missing, so there's no sequence visit
+        with self.assertLogs(level="WARNING"):
+            visits = {visit.id: visit for visit in task.group([makeExposure(11, 10, 12),
+                                                               makeExposure(12, 10, 12)])}
+        self.assertEqual(set(visits), {2022120800011, 2022120800012})
+        for visit in visits.values():
+            self.assertEqual(visit.visit_systems, {VisitSystem.ONE_TO_ONE})
+
+    def testConfig(self):
+        config = StarTrackerDefineVisitsConfig()
+        self.assertIsInstance(config.groupExposures.apply(), StarTrackerGroupExposuresTask)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# This file is part of obs_rubinGenericCamera.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import unittest
+
+import lsst.geom as geom
+import lsst.utils.tests
+from lsst.obs.base import createInitialSkyWcsFromBoresight
+from lsst.obs.rubinGenericCamera import StarTrackerNarrow, StarTrackerWide
+from lsst.obs.rubinGenericCamera.wcs import getPixelsToFieldAngle, makeRawWcs
+
+
+class RawWcsTestCase(lsst.utils.tests.TestCase):
+    """Test making raw WCSs with a cached pixels -> field angle transform"""
+
+    def testCache(self):
+        wide = getPixelsToFieldAngle(StarTrackerWide, 0)
+        self.assertIs(getPixelsToFieldAngle(StarTrackerWide, 0), wide)
+        self.assertIsNot(getPixelsToFieldAngle(StarTrackerNarrow, 0), wide)
+
+    def testMakeRawWcs(self):
+        detector = StarTrackerWide.getCamera()[0]
+        bbox = detector.getBBox()
+        pixels = [geom.Point2D(bbox.getMin()), geom.Point2D(bbox.getMax()), geom.Point2D(bbox.getCenter())]
+
+        for ra, dec, rot in [(10.0, -30.0, 0.0), (200.0, 45.0, 75.0), (359.0, -89.0, 180.0)]:
+            with self.subTest(ra=ra, dec=dec, rot=rot):
+                boresight = geom.SpherePoint(ra, dec, geom.degrees)
+                orientation = rot * geom.degrees
+                wcs = makeRawWcs(StarTrackerWide, 0, boresight, orientation)
+                expected = createInitialSkyWcsFromBoresight(boresight, orientation, detector)
+
+                for pixel in pixels:
+                    self.assertSpherePointsAlmostEqual(wcs.pixelToSky(pixel), expected.pixelToSky(pixel),
+                                                       maxSep=1e-6 * geom.arcseconds)
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()